@@ -7,7 +7,7 @@ from wtforms import StringField, FloatField, SelectField, TextAreaField, DateFie
 from wtforms.validators import DataRequired, Email, Length, NumberRange
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import pandas as pd
 import numpy as np
 import plotly
@@ -65,6 +65,11 @@ class Expense(db.Model):
     tags = db.Column(db.String(200), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_expense_user_date_id', 'user_id', 'date', 'id'),
+        db.Index('ix_expense_user_category_date_id', 'user_id', 'category', 'date', 'id'),
+    )
+
 class Budget(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -75,6 +80,10 @@ class Budget(db.Model):
     alert_threshold = db.Column(db.Float, default=80.0)  # percentage
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_budget_user_year_month', 'user_id', 'year', 'month'),
+    )
+
 class Goal(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -261,12 +270,17 @@ def get_couple_user_ids(user_id):
     
     return user_ids
 
+def month_bounds(year, month):
+    """First day of a month and of the next, to filter Expense.date by range (uses its indexes)"""
+    return date(year, month, 1), date(year + month // 12, month % 12 + 1, 1)
+
 def calculate_budget_status(user_id, month, year):
     budgets = Budget.query.filter_by(user_id=user_id, month=month, year=year).all()
+    month_start, next_month = month_bounds(year, month)
     expenses = Expense.query.filter(
         Expense.user_id == user_id,
-        db.extract('month', Expense.date) == month,
-        db.extract('year', Expense.date) == year
+        Expense.date >= month_start,
+        Expense.date < next_month
     ).all()
     
     status = {}
@@ -487,10 +501,11 @@ def dashboard():
     recent_expenses = Expense.query.filter(Expense.user_id.in_(user_ids)).order_by(Expense.date.desc()).limit(10).all()
     
     # Get monthly spending by category for the couple
+    month_start, next_month = month_bounds(current_year, current_month)
     monthly_expenses = Expense.query.filter(
         Expense.user_id.in_(user_ids),
-        db.extract('month', Expense.date) == current_month,
-        db.extract('year', Expense.date) == current_year
+        Expense.date >= month_start,
+        Expense.date < next_month
     ).all()
     
     category_spending = defaultdict(float)
@@ -45,7 +45,7 @@ def create_app(config_name=None):
     login_manager.login_view = 'auth.login'
     
     # Import models to register them with SQLAlchemy
-    from app.models import User, Expense, Budget, Goal, Investment, PartnerRequest, ImportedTransaction
+    from app.models import User, Expense, Budget, Goal, Investment, PartnerRequest, ImportedTransaction, ImportJob, MerchantCategory, ParsedStatement, MonthlySpend, SpendVersion, Household, HouseholdMember
     
     @login_manager.user_loader
     def load_user(user_id):
@@ -60,6 +60,7 @@ def create_app(config_name=None):
     from app.routes.analytics import analytics_bp
     from app.routes.profile import profile_bp
     from app.routes.imports import imports
+    from app.routes.search import search_bp
     
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(main_bp)
@@ -69,11 +70,28 @@ def create_app(config_name=None):
     app.register_blueprint(analytics_bp, url_prefix='/analytics')
     app.register_blueprint(profile_bp, url_prefix='/profile')
     app.register_blueprint(imports, url_prefix='/imports')
+    app.register_blueprint(search_bp, url_prefix='/search')
     
     # Error handlers
     from app.errors import bp as errors_bp
     app.register_blueprint(errors_bp)
     
+    # Background statement import queue
+    from app.import_jobs import init_import_queue
+    init_import_queue(app)
+    
+    from app.merchant_memo import init_merchant_memo
+    init_merchant_memo(app)
+    
+    from app.spend_rollup import init_spend_rollup
+    init_spend_rollup(app)
+    
+    from app.households import init_households
+    init_households(app)
+    
+    from app.search import init_search
+    init_search(app)
+    
     # Set up logging for production
     if not app.debug and not app.testing:
         if not os.path.exists('logs'):
@@ -87,4 +105,8 @@ def create_app(config_name=None):
         app.logger.setLevel(logging.INFO)
         app.logger.info('Money Management App startup')
     
+    # Statement imports log through a queue (after the file handler above exists)
+    from app.import_logging import init_import_logging
+    init_import_logging(app)
+    
     return app
@@ -0,0 +1,167 @@
+"""Chart payloads for the analytics page
+
+The charts are written as plain Plotly JSON (traces and layout as dicts, which
+Plotly.js renders directly) rather than built as plotly.graph_objs figures and
+serialized with PlotlyJSONEncoder, so the request path never imports Plotly.
+
+Payloads are cached in-process per couple and date range, tagged with the
+couple's spend versions (app.spend_rollup). A request that finds an entry for
+older versions still gets it straight away, and the payload is rebuilt behind
+it (stale-while-revalidate); only a request with no entry at all waits for the
+database. ANALYTICS_REVALIDATE = 'inline' rebuilds stale entries within the
+request instead, e.g. for tests on an in-memory database.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+
+from flask import current_app
+from jinja2.utils import htmlsafe_json_dumps
+
+from app.spend_rollup import spend_versions
+from app.utils import spending_summary
+
+logger = logging.getLogger(__name__)
+
+CHART_CACHE_SIZE = 256
+
+CacheKey = Tuple[Tuple[int, ...], date, date]
+
+
+def _axis(title: str) -> Dict:
+    return {'title': {'text': title}}
+
+
+def build_chart_payload(category_totals: Dict[str, Tuple[float, int]], monthly_data: Dict[str, float],
+                        start: date, end: date) -> Dict:
+    """
+    Summary figures and chart JSON from spending_summary output
+
+    'charts' is HTML-safe JSON with spending, trend and category figures
+    ({'data': [...], 'layout': {...}}), or None when nothing was spent.
+    """
+    total = sum(amount for amount, _ in category_totals.values())
+    payload = {
+        'summary': {
+            'total': total,
+            'daily': total / max((end - start).days + 1, 1),
+            'top_category': max(category_totals, key=lambda c: category_totals[c][0]) if category_totals else '-',
+            'count': sum(count for _, count in category_totals.values())
+        },
+        'charts': None
+    }
+    if not category_totals:
+        return payload
+
+    categories = list(category_totals)
+    amounts = [round(category_totals[category][0], 2) for category in categories]
+    months = sorted(monthly_data)
+
+    payload['charts'] = htmlsafe_json_dumps({
+        'spending': {
+            'data': [{'type': 'pie', 'labels': categories, 'values': amounts,
+                      'title': {'text': 'Combined Spending by Category'}}],
+            'layout': {}
+        },
+        'trend': {
+            'data': [{'type': 'scatter', 'x': months, 'y': [round(monthly_data[month], 2) for month in months],
+                      'mode': 'lines+markers', 'name': 'Combined Monthly Spending'}],
+            'layout': {'title': {'text': 'Combined Monthly Spending Trend'},
+                       'xaxis': _axis('Month'), 'yaxis': _axis('Amount (£)')}
+        },
+        'category': {
+            'data': [{'type': 'bar', 'x': categories, 'y': amounts}],
+            'layout': {'title': {'text': 'Combined Category Spending Comparison'},
+                       'xaxis': _axis('Category'), 'yaxis': _axis('Amount (£)')}
+        }
+    })
+    return payload
+
+
+class _ChartCache:
+    """Thread-safe LRU of cache key -> (spend versions, payload)"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get(self, key: CacheKey) -> Optional[Tuple[Tuple[int, ...], Dict]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: CacheKey, versions: Tuple[int, ...], payload: Dict) -> None:
+        with self._lock:
+            current = self._entries.get(key)
+            # A slow rebuild must not replace one made from newer data
+            if current is not None and current[0] > versions:
+                return
+            self._entries[key] = (versions, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def start_refresh(self, key: CacheKey) -> bool:
+        """Claim the rebuild of a stale entry; False if one is already running"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def finish_refresh(self, key: CacheKey) -> None:
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = _ChartCache(CHART_CACHE_SIZE)
+
+
+def _build(key: CacheKey) -> Tuple[Tuple[int, ...], Dict]:
+    user_ids, start, end = key
+    # Versions first: if expenses change while we read, the entry is already stale
+    versions = spend_versions(user_ids)
+    payload = build_chart_payload(*spending_summary(user_ids, start, end), start, end)
+    _cache.put(key, versions, payload)
+    return versions, payload
+
+
+def _refresh_in_background(app, key: CacheKey) -> None:
+    try:
+        with app.app_context():
+            _build(key)
+    except Exception:
+        logger.exception('Rebuilding analytics charts for users %s failed', key[0])
+    finally:
+        _cache.finish_refresh(key)
+
+
+def chart_payload(user_ids: Iterable[int], start: date, end: date) -> Dict:
+    """Summary and chart JSON for a couple's spending between two dates, cached"""
+    key = (tuple(sorted(set(user_ids))), start, end)
+    entry = _cache.get(key)
+    if entry is None:
+        return _build(key)[1]
+
+    versions, payload = entry
+    if versions != spend_versions(key[0]) and _cache.start_refresh(key):
+        if current_app.config.get('ANALYTICS_REVALIDATE', 'background') == 'inline':
+            try:
+                payload = _build(key)[1]
+            finally:
+                _cache.finish_refresh(key)
+        else:
+            threading.Thread(target=_refresh_in_background, daemon=True,
+                             args=(current_app._get_current_object(), key)).start()
+    return payload
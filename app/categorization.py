@@ -0,0 +1,162 @@
+"""Keyword categorization engine for imported bank transactions
+
+Each bank's rule set is compiled once, at import time, into a single
+prefix-factored (trie) regex so a description is scanned in one pass instead
+of testing every keyword of every category in turn. Results match the original
+ordered ``any(keyword in ...)`` checks: the first category (in rule order)
+with a keyword anywhere in the description wins.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+# Rule sets: ordered (category, keywords, confidence); earlier categories win
+GENERIC_RULES = [
+    ('food', ['tesco', 'asda', 'sainsbury', 'morrisons', 'aldi', 'lidl',
+              'restaurant', 'cafe', 'takeaway', 'pizza', 'mcdonald', 'kfc',
+              'food', 'grocery', 'supermarket'], 0.9),
+    ('transportation', ['fuel', 'petrol', 'diesel', 'train', 'bus', 'taxi', 'uber',
+                        'parking', 'mot', 'insurance', 'car', 'vehicle'], 0.8),
+    ('utilities', ['electric', 'gas', 'water', 'phone', 'internet', 'broadband',
+                   'mobile', 'energy', 'utility'], 0.9),
+    ('entertainment', ['netflix', 'spotify', 'amazon prime', 'cinema', 'theatre',
+                       'gym', 'fitness', 'sport', 'game'], 0.8),
+    ('shopping', ['amazon', 'ebay', 'argos', 'currys', 'john lewis', 'marks spencer',
+                  'next', 'zara', 'h&m', 'clothes', 'clothing'], 0.7),
+    ('healthcare', ['pharmacy', 'chemist', 'doctor', 'dentist', 'hospital',
+                    'medical', 'health', 'prescription'], 0.9),
+    ('housing', ['rent', 'mortgage', 'council tax', 'home insurance',
+                 'maintenance', 'repair', 'diy'], 0.9),
+]
+
+# HSBC-specific merchant recognition based on the sample statement
+HSBC_RULES = [
+    ('transportation', ['tfl travel ch', 'tfl.gov.uk/cp', 'fuel', 'petrol', 'parking'], 0.95),
+    ('food', ['circolo popolare', 'ristorante venezia', 'restaurant', 'food'], 0.9),
+    ('transfers', ['ritika sneh', 'shivam dubey', 'internet transfer', 'sent from revolut'], 0.95),
+    ('income', ['cognizant', 'salary', 'payroll'], 0.95),
+    ('cash', ['atm cash', 'cash withdrawal'], 0.9),
+    ('shopping', ['amazon prime', 'apple.com/bill', 'revolut'], 0.85),
+    ('utilities', ['american express', 'hsbc card pymt'], 0.9),
+    ('rent', ['rent28-31aug', 'rent'], 0.95),
+    ('entertainment', ['fca stratford', 'london', 'cinema', 'theatre', 'entertainment'], 0.8),
+]
+
+# Lloyds-specific merchant recognition
+LLOYDS_RULES = [
+    ('food', ['tesco', 'asda', 'sainsbury', 'morrisons', 'aldi', 'lidl', 'waitrose',
+              'chopstix', 'amazon* rj', 'great indian', 'subway', 'ppoint'], 0.9),
+    ('transportation', ['flix', 'fuel', 'petrol', 'parking', 'train', 'bus'], 0.9),
+    ('utilities', ['lebara mobile', 'phone', 'mobile', 'internet', 'gas', 'electric'], 0.9),
+    ('transfers', ['sneh r', 'shivam dubey', 's dubey', 'sakshi sharma', 'ritika sneh'], 0.95),
+    ('rent', ['velour homes', 'alliance east lond', 'rent', 'housing'], 0.95),
+    ('cash', ['lloyds bank cashba', 'atm', 'cash'], 0.9),
+    ('shopping', ['amazon', 'selecta', 'maryland s', 'mary ley'], 0.8),
+]
+
+# Lloyds Faster Payments In from these names are transfers between partners
+LLOYDS_TRANSFER_NAMES = ['sneh', 'dubey', 'sharma']
+
+DEFAULT_CATEGORY = ('other', 0.3)
+
+# Confidence for a merchant the couple has approved before (app.merchant_memo)
+MEMO_CONFIDENCE = 0.99
+
+# Distinct descriptions remembered per matcher; statements repeat merchants heavily
+MATCH_CACHE_SIZE = 8192
+
+
+def _trie_pattern(keywords: List[str]) -> str:
+    """Build a regex alternation factored on common prefixes, e.g. car|cafe -> ca(?:fe|r)"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        is_keyword = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not is_keyword:
+            return branches[0]
+        group = '(?:' + '|'.join(branches) + ')'
+        return group + '?' if is_keyword else group
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Ordered keyword rules compiled into one multi-pattern regex"""
+
+    def __init__(self, rules: List[Tuple[str, List[str], float]], default: Tuple[str, float] = DEFAULT_CATEGORY):
+        self.results = [(category, confidence) for category, _, confidence in rules]
+        self.default = default
+
+        # Rank of each keyword is the position of the first category listing it
+        ranks: Dict[str, int] = {}
+        for rank, (_, keywords, _) in enumerate(rules):
+            for keyword in keywords:
+                ranks.setdefault(keyword, rank)
+
+        # The zero-width lookahead reports the longest keyword starting at every
+        # position. Any other keyword starting there is a prefix of it, so each
+        # keyword maps to the best rank among its keyword prefixes.
+        self.ranks = {
+            keyword: min(rank for prefix, rank in ranks.items() if keyword.startswith(prefix))
+            for keyword in ranks
+        }
+        self.regex = re.compile('(?=(' + _trie_pattern(list(ranks)) + '))')
+
+        self.match = lru_cache(maxsize=MATCH_CACHE_SIZE)(self._match)
+
+    def _match(self, description: str) -> Tuple[str, float]:
+        """Return (category, confidence) for a description"""
+        best = None
+        for found in self.regex.finditer(description.lower()):
+            rank = self.ranks[found.group(1)]
+            if best is None or rank < best:
+                best = rank
+                if best == 0:
+                    break
+
+        return self.results[best] if best is not None else self.default
+
+    def matches_any(self, description: str) -> bool:
+        """Whether any keyword occurs in the description"""
+        return self.regex.search(description.lower()) is not None
+
+
+GENERIC_MATCHER = KeywordMatcher(GENERIC_RULES)
+HSBC_MATCHER = KeywordMatcher(HSBC_RULES)
+LLOYDS_MATCHER = KeywordMatcher(LLOYDS_RULES)
+LLOYDS_TRANSFER_MATCHER = KeywordMatcher([('transfers', LLOYDS_TRANSFER_NAMES, 0.95)])
+
+
+def categorize(description: str, bank_name: str = 'generic') -> Tuple[str, float]:
+    """Auto-categorize a transaction description for a bank"""
+    # HSBC-specific merchant recognition first
+    if bank_name == 'hsbc':
+        hsbc_category, hsbc_confidence = HSBC_MATCHER.match(description)
+        if hsbc_confidence > 0.7:
+            return hsbc_category, hsbc_confidence
+
+    return GENERIC_MATCHER.match(description)
+
+
+def categorize_lloyds(description: str, trans_type: str) -> Tuple[str, float]:
+    """Enhanced categorization for Lloyds Bank transactions"""
+    # Enhanced categorization based on transaction type
+    if trans_type == 'FPI' and LLOYDS_TRANSFER_MATCHER.matches_any(description):
+        return 'transfers', 0.95
+    elif trans_type == 'FPO' and 'alliance' in description.lower():
+        return 'rent', 0.95
+
+    category, confidence = LLOYDS_MATCHER.match(description)
+    if category == DEFAULT_CATEGORY[0] and trans_type == 'CPT':
+        # Unrecognised card payments are most likely shopping
+        return 'shopping', 0.7
+    return category, confidence
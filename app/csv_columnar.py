@@ -0,0 +1,271 @@
+"""
+Columnar CSV Statement Parser
+Parses CSV statement exports a block of rows at a time with NumPy
+
+Dates and amounts are converted as whole arrays and descriptions are
+categorized once per distinct value. Cells that aren't in the common shapes
+(e.g. '1 Aug 2025' or '£1,234.50 CR') fall back to the same per-value parsing
+as the row-by-row parsers in app.parsers, so both paths produce identical transactions.
+"""
+
+import csv
+import logging
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.categorization import categorize_lloyds, MEMO_CONFIDENCE
+from app.pdf_processor import BankStatementProcessor
+from app.date_parsing import strptime_date
+from app.import_logging import ImportStats
+
+logger = logging.getLogger(__name__)
+
+# Rows converted per NumPy pass; bounds memory on large files
+COLUMNAR_BLOCK_ROWS = 20_000
+
+# Distinct descriptions remembered between blocks before the cache is reset
+DESCRIPTION_CACHE_SIZE = 50_000
+
+AMOUNT_NOISE = ('£', '$', ',', ' ')
+LLOYDS_DEBIT_TYPES = ('DEB', 'FPO', 'CPT')
+
+
+def _iter_blocks(rows: Iterable[List[str]], size: int) -> Iterator[List[List[str]]]:
+    rows = iter(rows)
+    while True:
+        block = list(islice(rows, size))
+        if not block:
+            return
+        yield block
+
+
+def _columns(block: List[List[str]], indexes: List[Optional[int]]) -> List[np.ndarray]:
+    """
+    String arrays for the given column indexes of a block of csv.reader rows
+
+    Mirrors csv.DictReader + row.get(name, ''): a column missing from the
+    header reads as '', and blank lines and rows too short to reach a column
+    are dropped, since the row path skips or fails on them too.
+    """
+    width = max((index + 1 for index in indexes if index is not None), default=1)
+    block = [row for row in block if len(row) >= width]
+    return [np.array([row[index] for row in block] if index is not None else [''] * len(block), dtype=str)
+            for index in indexes]
+
+
+def parse_dates(values: List[str], separators: str = '/-.', fallback=None) -> List:
+    """
+    Parse DD/MM/YYYY dates as an array
+
+    Values of exactly that shape (with any one of separators) are converted
+    with integer arithmetic on the character codes; anything else, including
+    impossible dates like 31/02/2025, goes through fallback one at a time.
+    Returns datetime.date objects, or None where a value didn't parse.
+    """
+    dates = [None] * len(values)
+    if not values:
+        return dates
+
+    strings = np.array(values, dtype=str)
+    shaped = np.flatnonzero(np.strings.str_len(strings) == 10)
+    parsed = np.zeros(len(values), dtype=bool)
+
+    if len(shaped):
+        codes = strings[shaped].astype('U10').view(np.uint32).reshape(-1, 10)
+        digits = codes[:, [0, 1, 3, 4, 6, 7, 8, 9]] - ord('0')
+        separator = codes[:, 2]
+        ok = (np.isin(separator, [ord(s) for s in separators]) & (codes[:, 5] == separator)
+              & (digits <= 9).all(axis=1))
+
+        day = digits[:, 0] * 10 + digits[:, 1]
+        month = digits[:, 2] * 10 + digits[:, 3]
+        year = digits[:, 4] * 1000 + digits[:, 5] * 100 + digits[:, 6] * 10 + digits[:, 7]
+        ok &= (day >= 1) & (month >= 1) & (month <= 12) & (year >= 1)
+
+        months = ((year.astype(np.int64) - 1970) * 12 + month - 1).astype('datetime64[M]')
+        days = months.astype('datetime64[D]') + (day.astype(np.int64) - 1)
+        ok &= days.astype('datetime64[M]') == months  # day fits in the month
+
+        for position, value in zip(shaped[ok].tolist(), days[ok].tolist()):
+            dates[position] = value
+        parsed[shaped[ok]] = True
+
+    if fallback is not None:
+        for position in np.flatnonzero(~parsed).tolist():
+            dates[position] = fallback(values[position])
+    return dates
+
+
+def parse_amounts(values: List[str], fallback) -> np.ndarray:
+    """
+    Parse amount strings as a float array, 0.0 where empty or unparseable
+
+    Currency symbols, thousands separators and spaces are stripped as array
+    operations. If any value still isn't a plain number the block is parsed
+    with fallback instead, so odd cells give the same result as the row path.
+    """
+    strings = np.array(values, dtype=str)
+    for noise in AMOUNT_NOISE:
+        strings = np.strings.replace(strings, noise, '')
+    try:
+        return np.where(strings == '', '0', strings).astype(np.float64)
+    except ValueError:
+        return np.array([fallback(value) for value in values], dtype=np.float64)
+
+
+def _is_plain_number(amounts: np.ndarray) -> np.ndarray:
+    """Digits with optional '.' and ',' separators, as the Lloyds row path checks"""
+    return np.strings.isdigit(np.strings.replace(np.strings.replace(amounts, '.', ''), ',', ''))
+
+
+class _DescriptionCache:
+    """Categorization results per distinct description, for one file"""
+
+    def __init__(self, compute):
+        self.compute = compute
+        self.results = {}
+
+    def get(self, key):
+        result = self.results.get(key)
+        if result is None:
+            if len(self.results) >= DESCRIPTION_CACHE_SIZE:
+                self.results.clear()
+            result = self.results[key] = self.compute(key)
+        return result
+
+
+def _learned_or(processor: BankStatementProcessor, merchant_memo, description: str,
+                categorize) -> Tuple[str, float, str]:
+    """Category, confidence and cleaned description, preferring the merchant memo"""
+    learned = merchant_memo.lookup(description) if merchant_memo else None
+    if learned:
+        return learned[0], MEMO_CONFIDENCE, learned[1] or processor._clean_description(description)
+    category, confidence = categorize()
+    return category, confidence, processor._clean_description(description)
+
+
+def iter_generic_csv_columnar(lines: Iterable[str], date_column: str, description_column: str,
+                              amount_column: str, has_header: bool,
+                              merchant_memo=None, stats: Optional[ImportStats] = None) -> Iterator[Dict]:
+    """Columnar version of GenericCSVParser (app.parsers.generic_csv)"""
+    processor = BankStatementProcessor('generic', stats=stats)
+    reader = csv.reader(lines)
+
+    if has_header:
+        header = next(reader, None)
+        if header is None:
+            return
+        # DictReader semantics: the last column of a repeated name wins
+        positions = {name: index for index, name in enumerate(header)}
+        indexes = [positions.get(column) for column in (date_column, description_column, amount_column)]
+    else:
+        # Assume first 3 columns are date, description, amount
+        indexes = [0, 1, 2]
+
+    def describe(description):
+        stripped = description.strip()
+        category, confidence, cleaned = _learned_or(
+            processor, merchant_memo, stripped, lambda: processor.categorize_transaction(stripped))
+        return processor._determine_transaction_type(description, 0), category, confidence, cleaned
+
+    descriptions = _DescriptionCache(describe)
+
+    for block in _iter_blocks(reader, COLUMNAR_BLOCK_ROWS):
+        date_strs, description_strs, amount_strs = _columns(block, indexes)
+        keep = (date_strs != '') & (description_strs != '') & (amount_strs != '')
+        if not keep.any():
+            continue
+        date_strs, description_strs, amount_strs = date_strs[keep], description_strs[keep], amount_strs[keep]
+
+        dates = parse_dates(date_strs.tolist(), fallback=processor._parse_date)
+        amounts = parse_amounts(amount_strs.tolist(), processor._parse_amount)
+        finite = np.isfinite(amounts)
+        if not finite.all():
+            processor.stats.add('parsing', 'bad_amounts', int((~finite).sum()))
+        valid = np.flatnonzero(finite & (amounts > 0) & np.array([d is not None for d in dates], dtype=bool))
+
+        for position, description, amount in zip(valid.tolist(), description_strs[valid].tolist(),
+                                                  amounts[valid].tolist()):
+            transaction_type, category, confidence, cleaned = descriptions.get(description)
+            yield {
+                'date': dates[position],
+                'description': description.strip(),
+                'amount': amount,
+                'type': transaction_type,
+                'suggested_category': category,
+                'confidence_score': confidence,
+                'suggested_description': cleaned
+            }
+
+
+def iter_lloyds_csv_columnar(lines: Iterable[str], merchant_memo=None,
+                             stats: Optional[ImportStats] = None) -> Iterator[Dict]:
+    """Columnar version of LloydsCSVParser (app.parsers.lloyds_csv)"""
+    processor = BankStatementProcessor('lloyds', stats=stats)
+    reader = csv.reader(lines)
+
+    header = next(reader, None)
+    if header is None:
+        return
+    positions = {name: index for index, name in enumerate(header)}
+    indexes = [positions.get(name) for name in ('Transaction Date', 'Transaction Type',
+                                                'Transaction Description', 'Debit Amount',
+                                                'Credit Amount', 'Balance')]
+
+    def describe(key):
+        description, trans_type = key
+        return _learned_or(processor, merchant_memo, description,
+                           lambda: categorize_lloyds(description, trans_type))
+
+    descriptions = _DescriptionCache(describe)
+
+    for block in _iter_blocks(reader, COLUMNAR_BLOCK_ROWS):
+        cells = _columns(block, indexes)
+        if not len(cells[0]):
+            continue
+        cells = [np.strings.strip(column) for column in cells]
+        keep = (cells[0] != '') & (cells[2] != '')
+        if not keep.any():
+            continue
+        date_strs, types, description_strs, debits, credits, balances = (column[keep] for column in cells)
+
+        # Parse date (DD/MM/YYYY format)
+        dates = parse_dates(date_strs.tolist(), separators='/', fallback=_lloyds_date)
+
+        # The credit column wins when it holds a plain number, like the row path
+        credit_ok = _is_plain_number(credits)
+        debit_ok = _is_plain_number(debits)
+        amounts = np.where(credit_ok, parse_amounts(credits.tolist(), processor._parse_amount),
+                           np.where(debit_ok, parse_amounts(debits.tolist(), processor._parse_amount), 0.0))
+        is_credit = credit_ok & ~np.isin(types, LLOYDS_DEBIT_TYPES)
+        # Empty, 'nan' and 'inf' balances are missing, None rather than a non-finite float
+        balance_values = parse_amounts(balances.tolist(), processor._parse_amount)
+        has_balance = (balances != '') & np.isfinite(balance_values)
+
+        valid = np.flatnonzero(~(amounts <= 0) & np.array([d is not None for d in dates], dtype=bool))
+        for position, description, trans_type, amount, balance, known, credit in zip(
+                valid.tolist(), description_strs[valid].tolist(), types[valid].tolist(),
+                amounts[valid].tolist(), balance_values[valid].tolist(), has_balance[valid].tolist(),
+                is_credit[valid].tolist()):
+            category, confidence, cleaned = descriptions.get((description, trans_type))
+            yield {
+                'date': dates[position],
+                'description': description,
+                'amount': amount,
+                'balance': balance if known else None,
+                'type': 'credit' if credit else 'debit',
+                'lloyds_type': trans_type,
+                'suggested_category': category,
+                'suggested_description': cleaned,
+                'confidence_score': confidence
+            }
+
+
+def _lloyds_date(date_str: str):
+    try:
+        return strptime_date(date_str, '%d/%m/%Y')
+    except ValueError:
+        logger.debug('Could not parse date: %s', date_str)
+        return None
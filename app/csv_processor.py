@@ -0,0 +1,122 @@
+"""
+CSV Bank Statement Processor
+Parses CSV statement exports from a text stream, with the bank's parser
+from app.parsers
+"""
+
+import io
+import logging
+import uuid
+from itertools import chain
+from typing import Dict, Iterable, Iterator, Optional, TextIO
+
+from app.categorization import categorize_lloyds
+from app.import_logging import ImportStats
+from app.parsers import (DEFAULT_PARSERS, LLOYDS_CSV_HEADER, detect_parser, get_parser_spec,
+                         load_parser)
+
+logger = logging.getLogger(__name__)
+
+
+def open_csv_text(binary_stream) -> TextIO:
+    """Decode a binary file object as UTF-8 incrementally, for csv.reader"""
+    return io.TextIOWrapper(binary_stream, encoding='utf-8', newline='')
+
+
+def stream_csv_statement(text_stream: Iterable[str], date_column: str, description_column: str,
+                         amount_column: str, has_header: bool,
+                         merchant_memo=None, mode: str = 'rows',
+                         stats: Optional[ImportStats] = None) -> Iterator[Dict]:
+    """
+    Stream categorized transactions from a CSV statement
+
+    Rows are read, parsed and categorized one at a time, so memory use does
+    not depend on the size of the file. Bank exports with their own column
+    layout (e.g. Lloyds Bank) are recognised from their header row.
+
+    mode='columnar' parses blocks of rows with NumPy instead (see
+    app.csv_columnar); the transactions are the same, only faster on large files.
+    Counts go to stats if one is given (see app.import_logging).
+    """
+    lines = iter(text_stream)
+    first_line = next(lines, '')
+    lines = chain([first_line], lines)
+
+    # Detect the bank (e.g. Lloyds Bank) from the header row
+    spec = get_parser_spec(detect_parser(first_line, kind='csv'), kind='csv')
+    if spec.name != DEFAULT_PARSERS['csv']:
+        logger.info('Detected %s CSV format', spec.label)
+
+    parser = spec.load()(date_column, description_column, amount_column, has_header, stats=stats)
+    return _counted(parser.iter_transactions(lines, merchant_memo, mode), parser.stats)
+
+
+def _counted(transactions: Iterable[Dict], stats: ImportStats) -> Iterator[Dict]:
+    for transaction in transactions:
+        stats.add('parsing', 'transactions')
+        yield transaction
+
+
+def categorize_lloyds_transaction(description: str, trans_type: str) -> tuple:
+    """Enhanced categorization for Lloyds Bank transactions"""
+    return categorize_lloyds(description, trans_type)
+
+
+def process_csv_statement(csv_content: str, date_column: str, description_column: str,
+                          amount_column: str, has_header: bool, filename: str,
+                          merchant_memo=None) -> dict:
+    """Process CSV bank statement held in memory"""
+    try:
+        if LLOYDS_CSV_HEADER in csv_content.split('\n')[0]:
+            return process_lloyds_csv(csv_content, filename, merchant_memo)
+
+        transactions = list(stream_csv_statement(
+            io.StringIO(csv_content), date_column, description_column, amount_column,
+            has_header, merchant_memo
+        ))
+
+        batch_id = str(uuid.uuid4())
+
+        return {
+            'success': True,
+            'batch_id': batch_id,
+            'transactions': transactions,
+            'total_transactions': len(transactions)
+        }
+
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'transactions': [],
+            'total_transactions': 0
+        }
+
+
+def process_lloyds_csv(csv_content: str, filename: str, merchant_memo=None) -> dict:
+    """Process Lloyds Bank CSV format specifically"""
+    try:
+        parser = load_parser('lloyds_csv', kind='csv')()
+        transactions = list(parser.iter_transactions(io.StringIO(csv_content), merchant_memo))
+
+        batch_id = str(uuid.uuid4())
+
+        logger.info('Processed %d Lloyds CSV transactions', len(transactions))
+
+        return {
+            'success': True,
+            'batch_id': batch_id,
+            'transactions': transactions,
+            'total_transactions': len(transactions),
+            'bank_name': 'Lloyds Bank',
+            'format': 'CSV'
+        }
+
+    except Exception as e:
+        logger.exception('Error processing Lloyds CSV')
+        return {
+            'success': False,
+            'error': str(e),
+            'transactions': [],
+            'total_transactions': 0
+        }
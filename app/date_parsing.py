@@ -0,0 +1,125 @@
+"""
+Date parsing for statement imports
+
+A statement uses one date format throughout and repeats the same few dates
+many times, so DateParser remembers which format worked (the format is
+"pinned" for the rest of the file) and caches results per string. The two
+shapes that statements mostly use, DD/MM/YYYY and DD Mon YY, are parsed by
+hand instead of through datetime.strptime.
+"""
+
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Sequence
+
+# Formats tried by BankStatementProcessor._parse_date, in order
+DATE_FORMATS = (
+    '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y',
+    '%d/%m/%y', '%d-%m-%y', '%d.%m.%y',
+    '%d %b %Y', '%d %B %Y'
+)
+
+DATE_CACHE_SIZE = 4096
+
+MONTH_ABBREVIATIONS = {
+    name: number for number, name in enumerate(
+        ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), 1)
+}
+
+
+def _parse_dd_mm_yyyy(date_str: str) -> Optional[date]:
+    """'21/07/2025' without strptime; None if the string isn't exactly that shape"""
+    if (len(date_str) != 10 or date_str[2] != '/' or date_str[5] != '/' or not date_str.isascii()):
+        return None
+    day, month, year = date_str[:2], date_str[3:5], date_str[6:]
+    if not (day.isdigit() and month.isdigit() and year.isdigit()):
+        return None
+    try:
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+def _parse_dd_mon_yy(date_str: str) -> Optional[date]:
+    """'21 Jul 25' without strptime; None if the string isn't exactly that shape"""
+    if len(date_str) != 9 or date_str[2] != ' ' or date_str[6] != ' ' or not date_str.isascii():
+        return None
+    day, year = date_str[:2], date_str[7:]
+    month = MONTH_ABBREVIATIONS.get(date_str[3:6].lower())
+    if month is None or not (day.isdigit() and year.isdigit()):
+        return None
+    # strptime's %y pivot: 69-99 are 1900s, 00-68 are 2000s
+    year = int(year)
+    year += 1900 if year >= 69 else 2000
+    try:
+        return date(year, month, int(day))
+    except ValueError:
+        return None
+
+
+# Hand-written parsers by strptime format; strptime still handles other shapes
+# those formats accept, such as '1/7/2025'
+FAST_PARSERS: Dict[str, Callable[[str], Optional[date]]] = {
+    '%d/%m/%Y': _parse_dd_mm_yyyy,
+    '%d %b %y': _parse_dd_mon_yy,
+}
+
+
+def _parse_with(date_str: str, fmt: str) -> Optional[date]:
+    fast = FAST_PARSERS.get(fmt)
+    if fast is not None:
+        parsed = fast(date_str)
+        if parsed is not None:
+            return parsed
+    try:
+        return datetime.strptime(date_str, fmt).date()
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _cached_strptime(date_str: str, fmt: str) -> Optional[date]:
+    return _parse_with(date_str, fmt)
+
+
+def strptime_date(date_str: str, fmt: str) -> date:
+    """
+    datetime.strptime(date_str, fmt).date(), with caching and fast paths
+
+    Raises ValueError like strptime when the string doesn't match.
+    """
+    parsed = _cached_strptime(date_str, fmt)
+    if parsed is None:
+        raise ValueError(f"time data {date_str!r} does not match format {fmt!r}")
+    return parsed
+
+
+class DateParser:
+    """
+    Parse dates in whichever of several formats a statement uses
+
+    The first format that parses a string is pinned and tried first from
+    then on. The default formats can't both match the same string (their
+    separators and year widths differ, and 'May' parses the same either
+    way), so pinning changes the speed but never the result.
+    """
+
+    def __init__(self, formats: Sequence[str] = DATE_FORMATS, cache_size: int = DATE_CACHE_SIZE):
+        self.formats = tuple(formats)
+        self.pinned = None
+        self.parse = lru_cache(maxsize=cache_size)(self._parse)
+
+    def _parse(self, date_str: str) -> Optional[date]:
+        if self.pinned is not None:
+            parsed = _parse_with(date_str, self.pinned)
+            if parsed is not None:
+                return parsed
+
+        for fmt in self.formats:
+            if fmt == self.pinned:
+                continue
+            parsed = _parse_with(date_str, fmt)
+            if parsed is not None:
+                self.pinned = fmt
+                return parsed
+        return None
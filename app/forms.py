@@ -162,7 +162,7 @@ class PDFImportForm(FlaskForm):
         FileAllowed(['pdf'], 'PDF files only!')
     ])
     bank_name = SelectField('Bank', choices=[
-        ('', 'Select Bank'),
+        ('auto', 'Detect automatically'),
         ('hsbc', 'HSBC'),
         ('barclays', 'Barclays'),
         ('lloyds', 'Lloyds'),
@@ -176,7 +176,7 @@ class PDFImportForm(FlaskForm):
         ('starling', 'Starling Bank'),
         ('revolut', 'Revolut'),
         ('other', 'Other')
-    ], validators=[DataRequired()])
+    ], default='auto', validators=[DataRequired()])
     statement_month = SelectField('Statement Month', choices=[
         ('', 'Select Month'),
         ('1', 'January'), ('2', 'February'), ('3', 'March'),
@@ -0,0 +1,162 @@
+"""Households: the couples whose finances are viewed together
+
+A household groups a user with their partner through HouseholdMember rows,
+so finding a couple is one lookup in either direction rather than following
+the one-way User.partner_id and scanning for users pointing back.
+
+User.partner_id stays the way partners are linked and unlinked (the partner
+request and profile flows, or setting it directly); a flush hook mirrors each
+change into the membership table in the same transaction.
+
+household_user_ids answers from an in-process cache keyed on user id. Commits
+that change a household clear it; entries also expire after
+HOUSEHOLD_CACHE_TTL seconds so links made by other processes are picked up.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, event, func, insert, inspect, select
+
+from app import db
+from app.models import User, Household, HouseholdMember
+
+HOUSEHOLD_CACHE_TTL = 300  # seconds
+
+_CHANGED = 'households_changed'
+
+
+class _HouseholdCache:
+    """Thread-safe user id -> household user ids, with expiry"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[int, Tuple[Tuple[int, ...], float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Tuple[int, ...]]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            user_ids, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            return user_ids
+
+    def put(self, user_ids: Tuple[int, ...]) -> None:
+        """Remember a household for each of its members"""
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for user_id in user_ids:
+                self._entries[user_id] = (user_ids, expires_at)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = _HouseholdCache(HOUSEHOLD_CACHE_TTL)
+
+
+def household_user_ids(user_id: int) -> List[int]:
+    """A user's id followed by their partners' ids (just the user's without a household)"""
+    user_ids = _cache.get(user_id)
+    if user_ids is None:
+        household = select(HouseholdMember.household_id).where(HouseholdMember.user_id == user_id)
+        members = db.session.execute(
+            select(HouseholdMember.user_id).where(HouseholdMember.household_id.in_(household))
+        ).scalars()
+        user_ids = tuple(sorted(set(members) | {user_id}))
+        _cache.put(user_ids)
+    return [user_id] + [member for member in user_ids if member != user_id]
+
+
+def invalidate_households() -> None:
+    """Forget all cached households, e.g. after partners were linked outside the ORM"""
+    _cache.clear()
+
+
+def _household_of(connection, user_id: int) -> Optional[int]:
+    return connection.execute(
+        select(HouseholdMember.household_id).where(HouseholdMember.user_id == user_id)
+    ).scalar()
+
+
+def _leave(connection, user_id: int) -> None:
+    """Take a user out of their household, dissolving it once nobody is left to share it"""
+    household_id = _household_of(connection, user_id)
+    if household_id is None:
+        return
+    connection.execute(delete(HouseholdMember.__table__).where(HouseholdMember.user_id == user_id))
+    remaining = connection.execute(
+        select(func.count()).where(HouseholdMember.household_id == household_id)
+    ).scalar()
+    if remaining < 2:
+        connection.execute(delete(HouseholdMember.__table__).where(HouseholdMember.household_id == household_id))
+        connection.execute(delete(Household.__table__).where(Household.id == household_id))
+
+
+def _link(connection, user_id: int, partner_id: int) -> None:
+    """Put a user in their partner's household, creating one for the two of them if needed"""
+    household_id = _household_of(connection, user_id)
+    partner_household_id = _household_of(connection, partner_id)
+    if household_id is not None and household_id == partner_household_id:
+        return
+
+    _leave(connection, user_id)
+    if partner_household_id is None:
+        partner_household_id = connection.execute(insert(Household.__table__)).inserted_primary_key[0]
+        connection.execute(insert(HouseholdMember.__table__),
+                           [{'household_id': partner_household_id, 'user_id': partner_id}])
+    connection.execute(insert(HouseholdMember.__table__),
+                       [{'household_id': partner_household_id, 'user_id': user_id}])
+
+
+def _sync_households(session, flush_context):
+    """Mirror User.partner_id changes made in this flush into household memberships"""
+    # new/dirty/deleted and attribute history still describe this flush here
+    changes = [(user.id, None) for user in session.deleted if isinstance(user, User)]
+    for user in [*session.new, *session.dirty]:
+        if isinstance(user, User):
+            history = inspect(user).attrs.partner_id.history
+            if history.added or history.deleted:
+                changes.append((user.id, user.partner_id))
+    if not changes:
+        return
+
+    connection = session.connection()
+    for user_id, partner_id in changes:
+        if partner_id is None:
+            _leave(connection, user_id)
+        else:
+            _link(connection, user_id, partner_id)
+    session.info[_CHANGED] = True
+    _cache.clear()
+
+
+def _clear_if_changed(session):
+    # Also after a rollback: entries read inside the transaction may be gone
+    if session.info.pop(_CHANGED, False):
+        _cache.clear()
+
+
+def backfill_households() -> int:
+    """Create households for partners linked before households existed; the caller commits"""
+    connection = db.session.connection()
+    users = User.query.filter(User.partner_id != None).all()
+    for user in users:
+        _link(connection, user.id, user.partner_id)
+    _cache.clear()
+    return len(users)
+
+
+def init_households(app):
+    """Keep households in step with User.partner_id"""
+    for identifier, listener in (('after_flush', _sync_households),
+                                 ('after_commit', _clear_if_changed),
+                                 ('after_rollback', _clear_if_changed)):
+        if not event.contains(db.session, identifier, listener):
+            event.listen(db.session, identifier, listener)
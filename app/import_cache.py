@@ -0,0 +1,178 @@
+"""Duplicate detection for statement imports
+
+Works at two levels:
+
+* Files - uploads are identified by the SHA-256 of their bytes. The parsed
+  transactions of each PDF are kept in ParsedStatement, keyed on hash, bank
+  parser and PARSER_VERSION, so uploading the same statement again skips text
+  extraction and parsing entirely.
+* Rows - each imported transaction gets a fingerprint of its date, amount,
+  description and balance. Rows whose fingerprint the user already has are
+  skipped, so overlapping exports only add the transactions that are new.
+"""
+
+import hashlib
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import ImportedTransaction, ParsedStatement
+from app.pdf_processor import PARSER_VERSION
+
+HASH_BUFFER_SIZE = 64 * 1024
+
+# Fields produced by the statement parsers, before filtering and categorization
+PARSED_FIELDS = ('date', 'description', 'amount', 'balance', 'type')
+
+
+def hash_bytes(content: bytes) -> str:
+    """SHA-256 hex digest of an uploaded file held in memory"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 hex digest of a file on disk, read a buffer at a time"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for buffer in iter(lambda: f.read(HASH_BUFFER_SIZE), b''):
+            digest.update(buffer)
+    return digest.hexdigest()
+
+
+class StatementParseCache:
+    """Stored parser output for one statement file and parser"""
+
+    def __init__(self, content_hash: str, parser: str, parser_version: int = PARSER_VERSION):
+        self.content_hash = content_hash
+        self.parser = parser
+        self.parser_version = parser_version
+
+    def load(self) -> Optional[List[Dict]]:
+        """Return the cached transactions, or None if this file hasn't been parsed"""
+        cached = ParsedStatement.query.filter_by(
+            content_hash=self.content_hash,
+            parser=self.parser,
+            parser_version=self.parser_version
+        ).first()
+        if cached is None:
+            return None
+
+        return [
+            dict(transaction, date=date.fromisoformat(transaction['date']))
+            for transaction in cached.transactions
+        ]
+
+    def save(self, transactions: Iterable[Dict]) -> None:
+        """Store parsed transactions; the caller commits"""
+        stored = [
+            dict({field: transaction.get(field) for field in PARSED_FIELDS},
+                 date=transaction['date'].isoformat())
+            for transaction in transactions
+        ]
+
+        # Another worker may have parsed the same file at the same time
+        try:
+            with db.session.begin_nested():
+                db.session.add(ParsedStatement(
+                    content_hash=self.content_hash,
+                    parser=self.parser,
+                    parser_version=self.parser_version,
+                    transactions=stored,
+                    transaction_count=len(stored)
+                ))
+        except IntegrityError:
+            pass
+
+
+def transaction_fingerprint(transaction: Dict, occurrence: int = 1) -> str:
+    """
+    Identify a statement row by date, amount, description and balance
+
+    occurrence tells apart identical rows in the same file, e.g. two coffees
+    bought at the same place on the same day on a statement with no balance.
+    """
+    balance = transaction.get('balance')
+    key = '|'.join((
+        transaction['date'].isoformat(),
+        f"{transaction['amount']:.2f}",
+        ' '.join(transaction['description'].lower().split()),
+        f'{balance:.2f}' if balance is not None else '',
+        str(occurrence)
+    ))
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+class _OccurrenceCounter:
+    """
+    How many times each row has been seen in a statement, in little memory
+
+    Rows are counted by a 60-bit digest of their fingerprint. The latest rows'
+    counts are kept in a Counter; every PACK_ROWS distinct rows they are
+    merged into one sorted array holding a digest per row, 8 bytes each. A
+    fixed bitmap of digests seen skips the array search for most new rows.
+    """
+
+    PACK_ROWS = 64 * 1024
+    SEEN_BITS = 1 << 23  # 1MB
+
+    def __init__(self):
+        self.recent = Counter()
+        self.packed = np.empty(0, dtype=np.int64)
+        self.seen = bytearray(self.SEEN_BITS // 8)
+
+    def add(self, fingerprint: str) -> int:
+        """Count a row and return its occurrence, 1 the first time"""
+        digest = int(fingerprint[:15], 16)
+        bit = digest % self.SEEN_BITS
+        count = self.recent[digest] + 1
+        self.recent[digest] = count
+        if self.seen[bit >> 3] & (1 << (bit & 7)):
+            start = self.packed.searchsorted(digest)
+            if start < len(self.packed) and self.packed[start] == digest:
+                count += int(self.packed.searchsorted(digest, side='right') - start)
+        else:
+            self.seen[bit >> 3] |= 1 << (bit & 7)
+        if len(self.recent) >= self.PACK_ROWS:
+            self._pack()
+        return count
+
+    def _pack(self):
+        recent = np.fromiter(self.recent.elements(), dtype=np.int64)
+        recent.sort()
+        # Two sorted runs, which a stable sort merges in linear time
+        self.packed = np.concatenate((self.packed, recent))
+        self.packed.sort(kind='stable')
+        self.recent = Counter()
+
+
+def fingerprint_transactions(transactions: Iterable[Dict]) -> Iterator[Dict]:
+    """
+    Add a 'fingerprint' to each transaction in a statement
+
+    Identical rows are counted over the whole statement, since CSV exports
+    aren't necessarily in date order, in about 8 bytes per row.
+    """
+    occurrences = _OccurrenceCounter()
+    for transaction in transactions:
+        base = transaction_fingerprint(transaction)
+        occurrence = occurrences.add(base)
+        transaction['fingerprint'] = (base if occurrence == 1
+                                      else transaction_fingerprint(transaction, occurrence))
+        yield transaction
+
+
+def existing_fingerprints(user_id: int, fingerprints: List[str]) -> set:
+    """Which of the given fingerprints the user has already imported"""
+    if not fingerprints:
+        return set()
+    return set(db.session.execute(
+        select(ImportedTransaction.fingerprint).where(
+            ImportedTransaction.user_id == user_id,
+            ImportedTransaction.fingerprint.in_(fingerprints)
+        )
+    ).scalars())
@@ -0,0 +1,650 @@
+"""Background job queue for bank statement imports
+
+Uploads are written to IMPORT_JOB_FOLDER and recorded as ImportJob rows; the
+row is the source of truth for job status whichever backend runs the work.
+
+Backends (IMPORT_QUEUE_BACKEND):
+    thread   - in-process worker pool, suitable for development
+    database - ImportJob table polled by ``flask import-worker``
+    redis    - job ids pushed to a Redis list consumed by ``flask import-worker``
+    inline   - processed immediately inside the request (testing)
+
+A running job records a heartbeat with every chunk it saves. Jobs whose
+worker died without finishing them are failed once they have gone
+IMPORT_JOB_TIMEOUT seconds without one, when a worker starts or claims a job.
+Chunked uploads abandoned for IMPORT_UPLOAD_TTL seconds are deleted, with
+their partial files, when a worker starts or another upload begins.
+"""
+
+import os
+import time
+import uuid
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+from flask import current_app
+from sqlalchemy import bindparam, func, insert, select, update
+
+from app import db
+from app.models import ImportJob, ImportedTransaction, Expense
+from app.import_cache import (hash_bytes, hash_file, StatementParseCache, transaction_fingerprint,
+                              fingerprint_transactions, existing_fingerprints)
+from app.import_logging import ImportStats
+from app.search import index_rows
+from app.spend_rollup import add_expense_rows
+
+logger = logging.getLogger(__name__)
+
+REDIS_QUEUE_KEY = 'couplesbudget:import_jobs'
+
+# Bytes copied at a time when writing uploads to IMPORT_JOB_FOLDER
+UPLOAD_BUFFER_SIZE = 64 * 1024
+
+
+class InlineJobQueue:
+    """Run jobs synchronously in the submitting request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def submit(self, job_id):
+        run_import_job(job_id)
+
+    def next_job_id(self, timeout):
+        return None
+
+
+class ThreadJobQueue:
+    """Run jobs on a pool of threads inside the web process"""
+
+    def __init__(self, app):
+        self.app = app
+        self.executor = ThreadPoolExecutor(
+            max_workers=app.config.get('IMPORT_QUEUE_WORKERS', 2),
+            thread_name_prefix='import-job'
+        )
+
+    def submit(self, job_id):
+        self.executor.submit(self._run, job_id)
+
+    def _run(self, job_id):
+        with self.app.app_context():
+            try:
+                run_import_job(job_id)
+            finally:
+                db.session.remove()
+
+    def next_job_id(self, timeout):
+        return None
+
+
+class DatabaseJobQueue:
+    """Use the ImportJob table itself as the queue"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def submit(self, job_id):
+        # Nothing to do - workers poll for queued rows
+        pass
+
+    def next_job_id(self, timeout):
+        job = ImportJob.query.filter_by(status='queued').order_by(ImportJob.created_at.asc()).first()
+        if job is None:
+            time.sleep(timeout)
+            return None
+        return job.id
+
+
+class RedisJobQueue:
+    """Push job ids onto a Redis list for external workers"""
+
+    def __init__(self, app):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('The redis package is required for IMPORT_QUEUE_BACKEND=redis')
+        self.app = app
+        self.client = redis.Redis.from_url(app.config['REDIS_URL'])
+
+    def submit(self, job_id):
+        self.client.rpush(REDIS_QUEUE_KEY, job_id)
+
+    def next_job_id(self, timeout):
+        item = self.client.blpop(REDIS_QUEUE_KEY, timeout=max(int(timeout), 1))
+        if item is None:
+            return None
+        return item[1].decode('utf-8')
+
+
+QUEUE_BACKENDS = {
+    'inline': InlineJobQueue,
+    'thread': ThreadJobQueue,
+    'database': DatabaseJobQueue,
+    'redis': RedisJobQueue,
+}
+
+
+def get_job_queue(app=None):
+    """Return the job queue for the app, creating it on first use"""
+    app = app or current_app._get_current_object()
+    queue = app.extensions.get('import_queue')
+    if queue is None:
+        backend = app.config.get('IMPORT_QUEUE_BACKEND', 'thread')
+        if backend not in QUEUE_BACKENDS:
+            raise ValueError(f'Unknown import queue backend: {backend}')
+        queue = QUEUE_BACKENDS[backend](app)
+        app.extensions['import_queue'] = queue
+    return queue
+
+
+class UploadOffsetError(ValueError):
+    """A chunk of a chunked upload did not start where the file currently ends"""
+
+    def __init__(self, expected_offset: int):
+        super().__init__(f'Upload chunk must start at byte {expected_offset}')
+        self.expected_offset = expected_offset
+
+
+def _job_file_path(job_id: str, kind: str) -> str:
+    job_folder = current_app.config['IMPORT_JOB_FOLDER']
+    os.makedirs(job_folder, exist_ok=True)
+    return os.path.join(job_folder, f'{job_id}.{kind}')
+
+
+def enqueue_import_job(user_id: int, content, source_file: str, kind: str = 'pdf',
+                       bank_name: str = None, statement_month: int = None,
+                       statement_year: int = None, options: dict = None) -> ImportJob:
+    """
+    Store an uploaded statement and queue it for processing
+    
+    content is either bytes or a binary file object; file objects are copied
+    to disk a buffer at a time rather than read into memory.
+    """
+    job_id = str(uuid.uuid4())
+    file_path = _job_file_path(job_id, kind)
+
+    with open(file_path, 'wb') as f:
+        if isinstance(content, bytes):
+            f.write(content)
+            content_hash = hash_bytes(content)
+        else:
+            digest = hashlib.sha256()
+            for buffer in iter(lambda: content.read(UPLOAD_BUFFER_SIZE), b''):
+                f.write(buffer)
+                digest.update(buffer)
+            content_hash = digest.hexdigest()
+
+    job = ImportJob(
+        id=job_id,
+        user_id=user_id,
+        kind=kind,
+        source_file=source_file,
+        file_path=file_path,
+        bank_name=bank_name,
+        statement_month=statement_month,
+        statement_year=statement_year,
+        content_hash=content_hash,
+        options=options
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    get_job_queue().submit(job_id)
+    return job
+
+
+def _remove_job_file(file_path: str) -> None:
+    if os.path.exists(file_path):
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+
+
+def expire_stale_uploads(ttl: float = None) -> int:
+    """
+    Delete chunked uploads that have had no chunk for ttl seconds (default IMPORT_UPLOAD_TTL)
+
+    Their partial files are removed too. Returns the number of uploads deleted.
+    """
+    if ttl is None:
+        ttl = current_app.config.get('IMPORT_UPLOAD_TTL', 24 * 60 * 60)
+    cutoff = datetime.utcnow() - timedelta(seconds=ttl)
+    last_seen = func.coalesce(ImportJob.heartbeat_at, ImportJob.created_at)
+
+    expired = 0
+    for job in ImportJob.query.filter(ImportJob.status == 'uploading', last_seen < cutoff).all():
+        file_path = job.file_path
+        # Only if it is still abandoned, in case a chunk arrived or it was completed meanwhile
+        deleted = ImportJob.query.filter(
+            ImportJob.id == job.id, ImportJob.status == 'uploading', last_seen < cutoff
+        ).delete(synchronize_session=False)
+        if deleted:
+            _remove_job_file(file_path)
+            expired += 1
+    db.session.commit()
+
+    if expired:
+        logger.info('Deleted %d abandoned chunked uploads', expired)
+    return expired
+
+
+def start_chunked_upload(user_id: int, source_file: str, kind: str = 'csv') -> ImportJob:
+    """Create an import job whose file will arrive in several requests"""
+    expire_stale_uploads()
+
+    job_id = str(uuid.uuid4())
+    file_path = _job_file_path(job_id, kind)
+    open(file_path, 'wb').close()
+
+    job = ImportJob(
+        id=job_id,
+        user_id=user_id,
+        status='uploading',
+        kind=kind,
+        source_file=source_file,
+        file_path=file_path,
+        heartbeat_at=datetime.utcnow()
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def append_upload_chunk(job: ImportJob, offset: int, stream) -> int:
+    """
+    Append the next chunk of a chunked upload and return the bytes received so far
+    
+    Raises:
+        UploadOffsetError: if offset is not the current end of the file, e.g.
+            a chunk was lost or is being retried
+        ValueError: if the upload would exceed IMPORT_MAX_UPLOAD_SIZE
+    """
+    if job.status != 'uploading':
+        raise ValueError('This upload has already been completed')
+
+    size = os.path.getsize(job.file_path)
+    if offset != size:
+        raise UploadOffsetError(size)
+
+    max_size = current_app.config.get('IMPORT_MAX_UPLOAD_SIZE', 1024 * 1024 * 1024)
+    with open(job.file_path, 'ab') as f:
+        while True:
+            buffer = stream.read(UPLOAD_BUFFER_SIZE)
+            if not buffer:
+                break
+            size += len(buffer)
+            if size > max_size:
+                # Drop the partial chunk so the file stays consistent
+                f.truncate(offset)
+                raise ValueError(f'Uploads are limited to {max_size // (1024 * 1024)}MB')
+            f.write(buffer)
+
+    job.heartbeat_at = datetime.utcnow()
+    db.session.commit()
+    return size
+
+
+def finish_chunked_upload(job: ImportJob, options: dict = None) -> ImportJob:
+    """Queue a chunked upload once its last chunk has arrived"""
+    if job.status != 'uploading':
+        raise ValueError('This upload has already been completed')
+
+    job.options = options
+    job.content_hash = hash_file(job.file_path)
+    job.status = 'queued'
+    db.session.commit()
+
+    get_job_queue().submit(job.id)
+    return job
+
+
+def fail_stale_jobs(timeout: float = None) -> int:
+    """
+    Fail running jobs that have gone timeout seconds (default IMPORT_JOB_TIMEOUT) without a heartbeat
+
+    Their worker is taken to have died, so their partly saved transactions
+    and uploaded files are removed. Returns the number of jobs failed.
+    """
+    if timeout is None:
+        timeout = current_app.config.get('IMPORT_JOB_TIMEOUT', 15 * 60)
+    cutoff = datetime.utcnow() - timedelta(seconds=timeout)
+    last_seen = func.coalesce(ImportJob.heartbeat_at, ImportJob.started_at)
+
+    failed = 0
+    for job in ImportJob.query.filter(ImportJob.status == 'running', last_seen < cutoff).all():
+        batch_id, file_path = job.batch_id, job.file_path
+        # Only if it is still stale, in case the job finished or its worker checked in meanwhile
+        updated = ImportJob.query.filter(
+            ImportJob.id == job.id, ImportJob.status == 'running', last_seen < cutoff
+        ).update({
+            'status': 'failed',
+            'error': 'The import stopped unexpectedly. Please upload the statement again.',
+            'batch_id': None,
+            'finished_at': datetime.utcnow()
+        }, synchronize_session=False)
+        if not updated:
+            continue
+        if batch_id:
+            ImportedTransaction.query.filter_by(import_batch_id=batch_id).delete(synchronize_session=False)
+        _remove_job_file(file_path)
+        failed += 1
+    db.session.commit()
+
+    if failed:
+        logger.warning('Failed %d import jobs whose worker stopped responding', failed)
+    return failed
+
+
+def _claim_job(job_id: str, batch_id: str) -> bool:
+    """Atomically move a job from queued to running so only one worker runs it"""
+    fail_stale_jobs()
+    now = datetime.utcnow()
+    claimed = ImportJob.query.filter_by(id=job_id, status='queued').update(
+        {'status': 'running', 'started_at': now, 'heartbeat_at': now, 'batch_id': batch_id},
+        synchronize_session=False
+    )
+    db.session.commit()
+    return claimed == 1
+
+
+def _heartbeat(job_id: str) -> None:
+    """Record that a running job's worker is alive; the caller commits"""
+    alive = ImportJob.query.filter_by(id=job_id, status='running').update(
+        {'heartbeat_at': datetime.utcnow()},
+        synchronize_session=False
+    )
+    if not alive:
+        raise RuntimeError('The import was stopped after its worker stopped responding')
+
+
+def _chunked(iterable, size):
+    """Yield lists of up to size items from an iterable"""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def save_imported_transactions(user_id: int, transactions, batch_id: str, source_file: str,
+                               chunk_size: int = None, skip_duplicates: bool = True) -> int:
+    """
+    Persist parsed statement transactions for review and return the count saved
+    
+    Rows go straight to the table as executemany INSERTs of chunk_size rows
+    (default IMPORT_INSERT_CHUNK_SIZE), skipping the ORM unit of work, so
+    transactions can be any iterable, including a generator over a huge file.
+    Rows whose fingerprint the user already has are skipped unless
+    skip_duplicates is False; pass transactions through
+    fingerprint_transactions first to tell apart identical rows within a file.
+    The caller commits.
+    """
+    chunk_size = chunk_size or current_app.config.get('IMPORT_INSERT_CHUNK_SIZE', 500)
+    statement = insert(ImportedTransaction.__table__)
+    import_date = datetime.utcnow()
+    
+    saved_count = 0
+    for chunk in _chunked(transactions, chunk_size):
+        fingerprints = [t.get('fingerprint') or transaction_fingerprint(t) for t in chunk]
+        seen = existing_fingerprints(user_id, fingerprints) if skip_duplicates else set()
+        
+        rows = []
+        for transaction_data, fingerprint in zip(chunk, fingerprints):
+            if fingerprint in seen:
+                continue
+            if skip_duplicates:
+                seen.add(fingerprint)
+            rows.append({
+                'user_id': user_id,
+                'raw_description': transaction_data['description'],
+                'amount': transaction_data['amount'],
+                'transaction_date': transaction_data['date'],
+                'balance': transaction_data.get('balance'),
+                'transaction_type': transaction_data['type'],
+                'import_batch_id': batch_id,
+                'source_file': source_file,
+                'import_date': import_date,
+                'fingerprint': fingerprint,
+                'is_processed': False,
+                'is_expense': transaction_data['type'] == 'debit',
+                'suggested_category': transaction_data.get('suggested_category'),
+                'suggested_description': transaction_data.get('suggested_description'),
+                'confidence_score': transaction_data.get('confidence_score'),
+                'is_reviewed': False,
+                'is_approved': False
+            })
+        
+        if rows:
+            last_id = db.session.execute(select(func.max(ImportedTransaction.id))).scalar() or 0
+            db.session.execute(statement, rows)
+            # No other import writes to this batch, so its rows past last_id are this chunk
+            index_rows(ImportedTransaction, ImportedTransaction.import_batch_id == batch_id,
+                       ImportedTransaction.id > last_id)
+        saved_count += len(rows)
+    return saved_count
+
+
+def _insert_expenses(rows) -> list:
+    """Insert expense rows and return their new ids in the same order"""
+    dialect = db.engine.dialect
+    if dialect.insert_executemany_returning_sort_by_parameter_order:
+        expense_table = Expense.__table__
+        result = db.session.execute(
+            insert(expense_table).returning(expense_table.c.id, sort_by_parameter_order=True),
+            rows
+        )
+        expense_ids = list(result.scalars())
+        # Core inserts skip the ORM events that maintain the rollup and search index. The
+        # ids are handed out in order while this transaction holds the write lock
+        add_expense_rows(rows)
+        index_rows(Expense, Expense.id.between(min(expense_ids), max(expense_ids)))
+        return expense_ids
+
+    # No ordered RETURNING (e.g. MySQL): let the ORM fetch each new id
+    expenses = [Expense(**row) for row in rows]
+    db.session.add_all(expenses)
+    db.session.flush()
+    return [expense.id for expense in expenses]
+
+
+def create_expenses_from_batch(user_id: int, batch_id: str):
+    """
+    Turn the approved transactions of an import batch into expenses
+    
+    Works on columns rather than ORM objects: one SELECT of the approved rows,
+    one bulk INSERT of the expenses (returning their ids where the database
+    supports it) and one bulk UPDATE linking each transaction to its expense
+    and marking it processed. The caller commits.
+    
+    Returns:
+        (number of expenses created, approved transaction rows)
+    """
+    approved = db.session.execute(
+        select(
+            ImportedTransaction.id,
+            ImportedTransaction.raw_description,
+            ImportedTransaction.amount,
+            ImportedTransaction.transaction_date,
+            ImportedTransaction.is_expense,
+            ImportedTransaction.suggested_category,
+            ImportedTransaction.suggested_description
+        ).where(
+            ImportedTransaction.user_id == user_id,
+            ImportedTransaction.import_batch_id == batch_id,
+            ImportedTransaction.is_approved == True,
+            ImportedTransaction.is_processed == False
+        ).order_by(ImportedTransaction.id)
+    ).all()
+    
+    to_create = [t for t in approved if t.suggested_category != 'ignore' and t.is_expense]
+    if not to_create:
+        return 0, approved
+    
+    tags = f"imported,{batch_id[:8]}"  # Add import tags
+    expense_ids = _insert_expenses([
+        {
+            'user_id': user_id,
+            'amount': t.amount,
+            'description': t.suggested_description or t.raw_description,
+            'category': t.suggested_category,
+            'date': t.transaction_date,
+            'tags': tags
+        }
+        for t in to_create
+    ])
+    
+    # Link each transaction to the expense created from it
+    transaction_table = ImportedTransaction.__table__
+    db.session.execute(
+        update(transaction_table)
+        .where(transaction_table.c.id == bindparam('transaction_id'))
+        .values(expense_id=bindparam('new_expense_id'), is_processed=True),
+        [
+            {'transaction_id': t.id, 'new_expense_id': expense_id}
+            for t, expense_id in zip(to_create, expense_ids)
+        ]
+    )
+    return len(to_create), approved
+
+
+def _iter_pdf_job(job: ImportJob, stats: ImportStats):
+    """Stream categorized transactions from a queued PDF statement"""
+    from app.pdf_processor import stream_pdf_statement
+    from app.merchant_memo import MerchantMemo
+
+    with open(job.file_path, 'rb') as f:
+        pdf_content = f.read()
+
+    config = current_app.config
+    return stream_pdf_statement(
+        pdf_content=pdf_content,
+        bank_name=job.bank_name,
+        statement_month=job.statement_month,
+        statement_year=job.statement_year,
+        extraction_mode=config.get('PDF_EXTRACTION_MODE', 'serial'),
+        extraction_workers=config.get('PDF_EXTRACTION_WORKERS'),
+        parallel_min_pages=config.get('PDF_PARALLEL_MIN_PAGES', 8),
+        merchant_memo=MerchantMemo.for_user(job.user_id),
+        parse_cache=StatementParseCache(job.content_hash or hash_bytes(pdf_content), job.bank_name),
+        stats=stats
+    )
+
+
+def _iter_csv_job(job: ImportJob, stats: ImportStats):
+    """Stream categorized transactions from a queued CSV statement"""
+    from app.csv_processor import open_csv_text, stream_csv_statement
+    from app.merchant_memo import MerchantMemo
+
+    options = job.options or {}
+    merchant_memo = MerchantMemo.for_user(job.user_id)
+
+    with open(job.file_path, 'rb') as f:
+        yield from stream_csv_statement(
+            open_csv_text(f),
+            date_column=options.get('date_column', 'Date'),
+            description_column=options.get('description_column', 'Description'),
+            amount_column=options.get('amount_column', 'Amount'),
+            has_header=options.get('has_header', True),
+            merchant_memo=merchant_memo,
+            mode=current_app.config.get('CSV_PARSE_MODE', 'rows'),
+            stats=stats
+        )
+
+
+JOB_PROCESSORS = {
+    'pdf': _iter_pdf_job,
+    'csv': _iter_csv_job,
+}
+
+
+def run_import_job(job_id: str) -> None:
+    """Process a queued import job and record its outcome"""
+    # The batch id is stored from the start so a stale job's rows can be found and removed
+    batch_id = str(uuid.uuid4())
+    if not _claim_job(job_id, batch_id):
+        return
+
+    job = db.session.get(ImportJob, job_id)
+    logger.info('Running import job %s (%s, %s)', job.id, job.kind, job.source_file)
+
+    chunk_size = current_app.config.get('IMPORT_INSERT_CHUNK_SIZE', 500)
+    user_id, source_file, file_path = job.user_id, job.source_file, job.file_path
+    stats = ImportStats()
+
+    try:
+        transactions = fingerprint_transactions(JOB_PROCESSORS[job.kind](job, stats))
+
+        # Commit as we go so early pages are stored while later ones are still parsing
+        saved_count = duplicate_count = 0
+        for chunk in _chunked(transactions, chunk_size):
+            with stats.timer('insert'):
+                saved = save_imported_transactions(user_id, chunk, batch_id, source_file, chunk_size)
+                _heartbeat(job_id)
+                db.session.commit()
+            saved_count += saved
+            duplicate_count += len(chunk) - saved
+        stats.add('insert', 'saved', saved_count)
+        stats.add('insert', 'duplicates', duplicate_count)
+        logger.info('Import job %s finished: %s', job_id, stats)
+
+        job = db.session.get(ImportJob, job_id)
+        job.batch_id = batch_id if saved_count else None
+        job.total_transactions = saved_count
+        job.duplicate_transactions = duplicate_count
+        job.status = 'completed'
+    except Exception as e:
+        db.session.rollback()
+        logger.exception('Import job %s failed', job_id)
+
+        # Don't leave a half-imported batch behind
+        ImportedTransaction.query.filter_by(import_batch_id=batch_id).delete(synchronize_session=False)
+        job = db.session.get(ImportJob, job_id)
+        job.batch_id = None
+        job.status = 'failed'
+        job.error = str(e)
+
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+    _remove_job_file(file_path)
+
+
+def run_worker(app, burst: bool = False) -> None:
+    """Consume jobs from the configured queue until interrupted"""
+    queue = get_job_queue(app)
+    if isinstance(queue, (InlineJobQueue, ThreadJobQueue)):
+        raise RuntimeError('import-worker needs IMPORT_QUEUE_BACKEND=database or redis')
+
+    poll_interval = app.config.get('IMPORT_QUEUE_POLL_INTERVAL', 1.0)
+    with app.app_context():
+        # Jobs left running by a worker that was killed, and uploads nobody finished
+        fail_stale_jobs()
+        expire_stale_uploads()
+        while True:
+            job_id = queue.next_job_id(poll_interval)
+            if job_id is None:
+                if burst:
+                    return
+                continue
+            try:
+                run_import_job(job_id)
+            finally:
+                db.session.remove()
+
+
+def init_import_queue(app):
+    """Register the worker CLI command with the app"""
+
+    @app.cli.command('import-worker')
+    @click.option('--burst', is_flag=True, help='Exit once the queue is empty.')
+    def import_worker(burst):
+        """Process queued bank statement imports"""
+        run_worker(app, burst=burst)
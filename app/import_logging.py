@@ -0,0 +1,111 @@
+"""Logging for statement imports
+
+Import modules log through ``logging.getLogger(__name__)`` with %-style
+arguments, so a message is only formatted when its level is enabled, and
+per-line detail is DEBUG. Instead of a message per row, each import counts
+what happened in an ImportStats and logs one summary line when it finishes.
+
+init_import_logging sends the import loggers' records through a queue: the
+request or worker thread only enqueues a record, and a QueueListener thread
+formats and writes it, so imports never wait on log I/O.
+"""
+
+import atexit
+import logging
+import queue
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Iterable, Iterator, Optional
+
+# Loggers of the import subsystem (child loggers such as app.parsers.hsbc included)
+IMPORT_LOGGERS = (
+    'app.pdf_processor', 'app.parsers', 'app.csv_processor', 'app.csv_columnar',
+    'app.import_jobs', 'app.import_cache', 'app.routes.imports',
+)
+
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+_queue_handler: Optional[QueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+class ImportStats:
+    """
+    Counters and timings for one import, grouped by stage
+
+    Stages are 'extraction', 'parsing', 'categorization' and 'insert'.
+    str() gives the one-line summary, so passing an ImportStats as a logging
+    argument defers building it until the record is actually written.
+    """
+
+    def __init__(self):
+        self.counts: Dict[str, Counter] = {}
+        self.seconds: Dict[str, float] = {}
+
+    def add(self, stage: str, counter: str, amount: int = 1) -> None:
+        counts = self.counts.get(stage)
+        if counts is None:
+            counts = self.counts[stage] = Counter()
+        counts[counter] += amount
+
+    def get(self, stage: str, counter: str) -> int:
+        counts = self.counts.get(stage)
+        return counts[counter] if counts else 0
+
+    @contextmanager
+    def timer(self, stage: str):
+        """Add the time spent in the with block to a stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + time.perf_counter() - start
+
+    def timed(self, stage: str, items: Iterable) -> Iterator:
+        """Pass items through, adding the time spent producing each one to a stage"""
+        items = iter(items)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            finally:
+                self.seconds[stage] = self.seconds.get(stage, 0.0) + time.perf_counter() - start
+            yield item
+
+    def __str__(self):
+        parts = []
+        for stage in dict.fromkeys([*self.counts, *self.seconds]):
+            fields = [f'{name}={count}' for name, count in sorted(self.counts.get(stage, {}).items())]
+            if stage in self.seconds:
+                fields.append(f'seconds={self.seconds[stage]:.3f}')
+            parts.append(f"{stage}: {' '.join(fields)}")
+        return '; '.join(parts) or 'nothing imported'
+
+
+def init_import_logging(app):
+    """Route the import loggers through a non-blocking queue handler"""
+    global _queue_handler, _listener
+
+    level = app.config.get('IMPORT_LOG_LEVEL', 'INFO')
+    if _listener is None:
+        stream_handler = logging.StreamHandler(sys.stderr)
+        stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        # Also write to the app's own handlers, e.g. the production log file
+        handlers = [stream_handler, *app.logger.handlers]
+
+        _queue_handler = QueueHandler(queue.SimpleQueue())
+        _listener = QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+    for name in IMPORT_LOGGERS:
+        logger = logging.getLogger(name)
+        logger.setLevel(level)
+        if _queue_handler not in logger.handlers:
+            logger.addHandler(_queue_handler)
+        logger.propagate = False
@@ -0,0 +1,220 @@
+"""Merchant memo: categories learned from the couple's own approvals
+
+When imported transactions are approved, their (category, description) is
+remembered against a normalized merchant key, e.g. "TESCO STORES 1234" and
+"Tesco Stores 5678" both become "tesco stores". Later imports look the merchant
+up here before falling back to the keyword engine, so anything the couple has
+already confirmed comes back with high confidence instead of needing review.
+
+Lookups go through a small in-process LRU shared by all memos; entries expire
+after MEMO_CACHE_TTL seconds so other processes' approvals are picked up. The
+LRU is cleared when a session that learned merchants commits, not before, so a
+lookup racing the commit can't cache what the database held until then.
+"""
+
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+import click
+from sqlalchemy import event
+
+from app import db
+from app.models import MerchantCategory, ImportedTransaction
+from app.utils import get_couple_user_ids
+
+MERCHANT_KEY_WORDS = 4
+MEMO_CACHE_SIZE = 4096
+MEMO_CACHE_TTL = 300  # seconds
+
+# Keys per IN (...) query, well below SQLite's bound parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+_LEARNED = 'merchant_memo_learned'
+
+_NON_WORD = re.compile(r"[^a-z0-9&']+")
+
+
+def normalize_merchant(description: str) -> str:
+    """
+    Reduce a raw statement description to a stable merchant key
+
+    Lowercases, drops punctuation and stops at the first token containing a
+    digit (store numbers, card references, dates), keeping at most
+    MERCHANT_KEY_WORDS words: "TESCO STORES 1234 LONDON" -> "tesco stores".
+    """
+    words = []
+    for word in _NON_WORD.sub(' ', (description or '').lower()).split():
+        if any(char.isdigit() for char in word):
+            if words:
+                break
+            continue
+        words.append(word)
+        if len(words) == MERCHANT_KEY_WORDS:
+            break
+    return ' '.join(words)[:200]
+
+
+class _MemoCache:
+    """Thread-safe LRU of (user ids, merchant key) -> learned value, with expiry"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (found, value); value may be None for a remembered miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = _MemoCache(MEMO_CACHE_SIZE, MEMO_CACHE_TTL)
+
+
+class MerchantMemo:
+    """Learned merchant categories shared by the partners in a couple"""
+
+    def __init__(self, user_ids: Iterable[int]):
+        self.user_ids = tuple(sorted(set(user_ids)))
+
+    @classmethod
+    def for_user(cls, user_id: int) -> 'MerchantMemo':
+        """Memo covering a user and their partner"""
+        return cls(get_couple_user_ids(user_id))
+
+    def lookup(self, description: str) -> Optional[Tuple[str, Optional[str]]]:
+        """Return the learned (category, description) for a transaction, if any"""
+        merchant_key = normalize_merchant(description)
+        if not merchant_key:
+            return None
+
+        found, value = _cache.get((self.user_ids, merchant_key))
+        if found:
+            return value
+
+        # Latest approval wins when the partners disagree
+        row = MerchantCategory.query.filter(
+            MerchantCategory.user_id.in_(self.user_ids),
+            MerchantCategory.merchant_key == merchant_key
+        ).order_by(MerchantCategory.updated_at.desc()).first()
+
+        value = (row.category, row.description) if row else None
+        _cache.put((self.user_ids, merchant_key), value)
+        return value
+
+
+def learn_merchants(user_id: int, approvals: Iterable[Tuple[str, str, Optional[str]]],
+                    recount: bool = False) -> int:
+    """
+    Remember approved categorizations for a user
+
+    Args:
+        user_id: User who approved the transactions
+        approvals: (raw description, category, description) tuples
+        recount: Set hit counts to the number of these approvals instead of
+            adding to them, for relearning from every approval the user made
+
+    Returns:
+        Number of distinct merchants learned. The caller commits the session.
+    """
+    learned = {}
+    for raw_description, category, description in approvals:
+        merchant_key = normalize_merchant(raw_description)
+        if not merchant_key or not category or category == 'ignore':
+            continue
+        _, _, count = learned.get(merchant_key, (None, None, 0))
+        learned[merchant_key] = (category, description, count + 1)
+
+    if not learned:
+        return 0
+
+    keys = list(learned)
+    existing = {}
+    for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+        for row in MerchantCategory.query.filter(
+            MerchantCategory.user_id == user_id,
+            MerchantCategory.merchant_key.in_(keys[start:start + LOOKUP_BATCH_SIZE])
+        ):
+            existing[row.merchant_key] = row
+
+    for merchant_key, (category, description, count) in learned.items():
+        row = existing.get(merchant_key)
+        if row is None:
+            db.session.add(MerchantCategory(
+                user_id=user_id,
+                merchant_key=merchant_key,
+                category=category,
+                description=description,
+                hit_count=count
+            ))
+        else:
+            row.category = category
+            row.description = description
+            row.hit_count = count if recount else (row.hit_count or 0) + count
+
+    # Cached entries are out of date for this couple once the session commits
+    db.session.info[_LEARNED] = True
+    return len(learned)
+
+
+def learn_from_transactions(user_id: int, transactions: Iterable[ImportedTransaction],
+                            recount: bool = False) -> int:
+    """Remember the categories of approved imported transactions"""
+    return learn_merchants(user_id, (
+        (t.raw_description, t.suggested_category, t.suggested_description)
+        for t in transactions
+    ), recount=recount)
+
+
+def _clear_if_learned(session):
+    # Also after a rollback: lookups inside the transaction may have cached its rows
+    if session.info.pop(_LEARNED, False):
+        _cache.clear()
+
+
+def init_merchant_memo(app):
+    """Clear the memo cache when learned merchants commit and register the backfill CLI command"""
+    for identifier in ('after_commit', 'after_rollback'):
+        if not event.contains(db.session, identifier, _clear_if_learned):
+            event.listen(db.session, identifier, _clear_if_learned)
+
+    @app.cli.command('learn-merchants')
+    def learn_merchants_command():
+        """Learn merchant categories from previously approved imports; safe to run again"""
+        user_ids = [user_id for (user_id,) in db.session.query(ImportedTransaction.user_id).filter_by(
+            is_approved=True
+        ).distinct()]
+
+        total = 0
+        for user_id in user_ids:
+            approved = ImportedTransaction.query.filter_by(
+                user_id=user_id,
+                is_approved=True
+            ).order_by(ImportedTransaction.import_date.asc())
+            total += learn_from_transactions(user_id, approved, recount=True)
+            db.session.commit()
+
+        click.echo(f'Learned {total} merchants for {len(user_ids)} users')
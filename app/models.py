@@ -4,6 +4,7 @@ from flask_login import UserMixin
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
+from app.money import MoneyType
 
 class User(UserMixin, db.Model):
     """User model for authentication and profile"""
@@ -34,20 +35,45 @@ class User(UserMixin, db.Model):
         """Check if provided password matches hash"""
         return check_password_hash(self.password_hash, password)
     
+    @property
+    def couple_user_ids(self):
+        """IDs of this user and their partner, from the household cache (app.households)"""
+        from app.households import household_user_ids
+        return household_user_ids(self.id)
+    
     def get_partner(self):
         """Get partner user object"""
-        if self.partner_id:
-            return User.query.get(self.partner_id)
-        return User.query.filter_by(partner_id=self.id).first()
+        partner_ids = [user_id for user_id in self.couple_user_ids if user_id != self.id]
+        return db.session.get(User, partner_ids[0]) if partner_ids else None
     
     def __repr__(self):
         return f'<User {self.username}>'
 
+class Household(db.Model):
+    """A couple sharing a combined view; kept in step with User.partner_id by app.households"""
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    members = db.relationship('HouseholdMember', backref='household', lazy=True, cascade='all, delete-orphan')
+    
+    def __repr__(self):
+        return f'<Household {self.id}>'
+
+class HouseholdMember(db.Model):
+    """Membership of a user in a household; a user belongs to at most one"""
+    id = db.Column(db.Integer, primary_key=True)
+    household_id = db.Column(db.Integer, db.ForeignKey('household.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, unique=True)
+    joined_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<HouseholdMember user {self.user_id} in {self.household_id}>'
+
 class Expense(db.Model):
     """Expense model for tracking spending"""
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(MoneyType, nullable=False)
     description = db.Column(db.String(200), nullable=False)
     category = db.Column(db.String(50), nullable=False)
     subcategory = db.Column(db.String(50), nullable=True)
@@ -58,20 +84,57 @@ class Expense(db.Model):
     tags = db.Column(db.String(200), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Filter months as date ranges (date >= first day, date < next month's first day)
+    # rather than extract(month/year), which can't use these indexes. The trailing
+    # id orders ties for keyset pages (app.pagination); scanned backwards for newest first
+    __table_args__ = (
+        db.Index('ix_expense_user_date_id', 'user_id', 'date', 'id'),
+        db.Index('ix_expense_user_category_date_id', 'user_id', 'category', 'date', 'id'),
+    )
+    
     def __repr__(self):
         return f'<Expense {self.description}: £{self.amount}>'
 
+class MonthlySpend(db.Model):
+    """Expense total and count per user, month and category, kept current by app.spend_rollup"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    total = db.Column(MoneyType, nullable=False, default=0)
+    expense_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'year', 'month', 'category', name='uq_monthly_spend_user_month_category'),
+    )
+
+    def __repr__(self):
+        return f'<MonthlySpend {self.year}-{self.month:02d} {self.category}: £{self.total}>'
+
+class SpendVersion(db.Model):
+    """Counter bumped by app.spend_rollup whenever a user's expense totals change"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True, autoincrement=False)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<SpendVersion user {self.user_id}: {self.version}>'
+
 class Budget(db.Model):
     """Budget model for setting spending limits"""
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     category = db.Column(db.String(50), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(MoneyType, nullable=False)
     month = db.Column(db.Integer, nullable=False)
     year = db.Column(db.Integer, nullable=False)
     alert_threshold = db.Column(db.Float, default=80.0)  # percentage
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_budget_user_year_month', 'user_id', 'year', 'month'),
+    )
+    
     def __repr__(self):
         return f'<Budget {self.category}: £{self.amount}>'
 
@@ -81,8 +144,8 @@ class Goal(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=True)
-    target_amount = db.Column(db.Float, nullable=False)
-    current_amount = db.Column(db.Float, default=0.0)
+    target_amount = db.Column(MoneyType, nullable=False)
+    current_amount = db.Column(MoneyType, default=0)
     target_date = db.Column(db.Date, nullable=False)
     category = db.Column(db.String(50), nullable=False)  # emergency, vacation, investment, etc.
     is_active = db.Column(db.Boolean, default=True)
@@ -104,9 +167,9 @@ class Investment(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     name = db.Column(db.String(100), nullable=False)
     type = db.Column(db.String(50), nullable=False)  # stocks, bonds, crypto, etc.
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(MoneyType, nullable=False)
     purchase_date = db.Column(db.Date, nullable=False)
-    current_value = db.Column(db.Float, nullable=True)
+    current_value = db.Column(MoneyType, nullable=True)
     expected_return = db.Column(db.Float, nullable=True)
     risk_level = db.Column(db.String(20), default='medium')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -126,15 +189,16 @@ class ImportedTransaction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     raw_description = db.Column(db.String(500), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(MoneyType, nullable=False)
     transaction_date = db.Column(db.Date, nullable=False)
-    balance = db.Column(db.Float, nullable=True)
+    balance = db.Column(MoneyType, nullable=True)
     transaction_type = db.Column(db.String(20), nullable=True)  # debit, credit
     
     # Import metadata
     import_batch_id = db.Column(db.String(36), nullable=False)  # UUID for grouping imports
     source_file = db.Column(db.String(200), nullable=False)
     import_date = db.Column(db.DateTime, default=datetime.utcnow)
+    fingerprint = db.Column(db.String(64), nullable=True)  # date/amount/description/balance hash for duplicate detection
     
     # Processing status
     is_processed = db.Column(db.Boolean, default=False)
@@ -152,9 +216,82 @@ class ImportedTransaction(db.Model):
     expense_id = db.Column(db.Integer, db.ForeignKey('expense.id'), nullable=True)
     created_expense = db.relationship('Expense', backref='source_transaction')
     
+    __table_args__ = (
+        db.Index('ix_imported_transaction_user_fingerprint', 'user_id', 'fingerprint'),
+    )
+    
     def __repr__(self):
         return f'<ImportedTransaction {self.raw_description}: £{self.amount}>'
 
+class MerchantCategory(db.Model):
+    """Category and description a user has confirmed for a merchant"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    merchant_key = db.Column(db.String(200), nullable=False)  # normalized merchant name
+    category = db.Column(db.String(50), nullable=False)
+    description = db.Column(db.String(200), nullable=True)
+    hit_count = db.Column(db.Integer, default=1)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'merchant_key', name='uq_merchant_category_user_merchant'),
+    )
+
+    def __repr__(self):
+        return f'<MerchantCategory {self.merchant_key}: {self.category}>'
+
+class ParsedStatement(db.Model):
+    """Transactions parsed from a statement file, reused when the same file is uploaded again"""
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), nullable=False)  # SHA-256 of the uploaded bytes
+    parser = db.Column(db.String(50), nullable=False)  # bank parser used
+    parser_version = db.Column(db.Integer, nullable=False)
+    transactions = db.Column(db.JSON, nullable=False)
+    transaction_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('content_hash', 'parser', 'parser_version', name='uq_parsed_statement_key'),
+    )
+
+    def __repr__(self):
+        return f'<ParsedStatement {self.content_hash[:12]} ({self.parser} v{self.parser_version})>'
+
+class ImportJob(db.Model):
+    """Queued bank statement import processed outside the request cycle"""
+    id = db.Column(db.String(36), primary_key=True)  # UUID
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # uploading, queued, running, completed, failed
+    kind = db.Column(db.String(10), nullable=False, default='pdf')  # pdf, csv
+    options = db.Column(db.JSON, nullable=True)  # parser settings, e.g. CSV column names
+
+    # Upload details
+    source_file = db.Column(db.String(200), nullable=False)
+    file_path = db.Column(db.String(500), nullable=False)
+    bank_name = db.Column(db.String(50), nullable=True)
+    statement_month = db.Column(db.Integer, nullable=True)
+    statement_year = db.Column(db.Integer, nullable=True)
+    content_hash = db.Column(db.String(64), nullable=True, index=True)  # SHA-256 of the uploaded file
+
+    # Outcome
+    batch_id = db.Column(db.String(36), nullable=True)
+    total_transactions = db.Column(db.Integer, default=0)
+    duplicate_transactions = db.Column(db.Integer, default=0)  # rows skipped as already imported
+    error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)  # last chunk uploaded, or last sign of life from its worker
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    @property
+    def is_finished(self):
+        """Whether the job has stopped running, successfully or not"""
+        return self.status in ('completed', 'failed')
+
+    def __repr__(self):
+        return f'<ImportJob {self.id}: {self.status}>'
+
 class PartnerRequest(db.Model):
     """Partner request model for linking couples"""
     id = db.Column(db.Integer, primary_key=True)
@@ -0,0 +1,92 @@
+"""Money stored as integer pence
+
+Monetary columns use MoneyType: the database holds whole pence in an integer
+column, and the ORM still reads and writes pounds as floats, so forms,
+templates and parsers keep working with amounts like 12.34. What changes is
+that nothing is ever added up in floating point: SUM() over a MoneyType
+column adds integers in the database and is converted to pounds once, and
+sum_pounds does the same for amounts in Python or NumPy.
+
+Money is the value type for code that wants to stay in pence, e.g. to
+accumulate deltas exactly; binding a Money stores it as is, while any other
+number is taken to be pounds.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Iterable, Union
+
+import numpy as np
+from sqlalchemy.types import BigInteger, TypeDecorator
+
+Pounds = Union[float, int, str, Decimal]
+
+_PENNY = Decimal('0.01')
+
+
+class Money(int):
+    """A whole number of pence; arithmetic on it gives plain ints"""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_pounds(cls, value: Pounds) -> 'Money':
+        return cls(to_pence(value))
+
+    @property
+    def pounds(self) -> float:
+        return self / 100
+
+    def __str__(self):
+        sign = '-' if self < 0 else ''
+        return f'{sign}{abs(self) // 100}.{abs(self) % 100:02d}'
+
+    def __repr__(self):
+        return f'Money({str(self)})'
+
+
+def to_pence(value: Pounds) -> int:
+    """
+    Pounds to whole pence, rounding halves away from zero
+
+    Floats go through their shortest repr, so 1.005 (really
+    1.00499999999999989...) rounds to 101p as written, not to 100p.
+    """
+    if isinstance(value, Money):
+        return int(value)
+    if isinstance(value, int):
+        return value * 100
+    if isinstance(value, float):
+        pence = value * 100
+        rounded = round(pence)
+        # Only values about half a penny from a whole one need the exact route
+        if abs(abs(pence - rounded) - 0.5) > 1e-6:
+            return rounded
+    if not isinstance(value, Decimal):
+        value = Decimal(repr(value) if isinstance(value, float) else str(value))
+    return int((value * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def pence_array(amounts) -> np.ndarray:
+    """Float pound amounts as an int64 array of pence"""
+    return np.rint(np.asarray(amounts, dtype=np.float64) * 100).astype(np.int64)
+
+
+def sum_pounds(amounts: Iterable[float]) -> float:
+    """Exact total of pound amounts, added up as integer pence"""
+    if not isinstance(amounts, np.ndarray):
+        amounts = np.fromiter(amounts, dtype=np.float64)
+    return int(pence_array(amounts).sum()) / 100
+
+
+class MoneyType(TypeDecorator):
+    """Pounds in Python, whole pence in a BIGINT column"""
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_pence(value)
+
+    def process_result_value(self, value, dialect):
+        # SQLite may hand back REAL for columns created as FLOAT before the migration
+        return None if value is None else int(value) / 100
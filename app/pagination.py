@@ -0,0 +1,139 @@
+"""Keyset pagination for the expenses list
+
+Pages are read in (date, id) order, newest first, and continue from a cursor
+naming the last expense shown ("2025-08-10.1234") rather than from an
+OFFSET, so every page reads only its own rows through the (user_id, date, id)
+index however deep it is, and expenses added meanwhile don't shift a page.
+
+A couple's expenses are read with one query per household member, each a
+LIMITed index range scan, and merged here: a single user_id IN (...) query
+would have to sort all matching rows before it could take a page.
+
+Counting is optional. 'approximate' adds up the expense counts in the monthly
+spend rollup (app.spend_rollup), a few dozen rows however many expenses
+there are; 'exact' runs COUNT(*) over the expenses.
+"""
+
+import heapq
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, or_, select
+
+from app import db
+from app.models import Expense, MonthlySpend
+
+PER_PAGE = 20
+COUNT_MODES = ('approximate', 'exact', 'none')
+
+Cursor = Tuple[date, int]
+
+
+def encode_cursor(expense: Expense) -> str:
+    return f'{expense.date.isoformat()}.{expense.id}'
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Cursor]:
+    """A cursor's (date, id), or None if it is missing or malformed"""
+    try:
+        day, expense_id = cursor.split('.')
+        return date.fromisoformat(day), int(expense_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _sort_key(expense: Expense) -> Cursor:
+    return expense.date, expense.id
+
+
+class ExpensePage:
+    """One page of expenses, newest first, with cursors to the pages either side"""
+
+    def __init__(self, items: List[Expense], total: Optional[int],
+                 newer: Optional[str], older: Optional[str]):
+        self.items = items
+        self.total = total
+        self.newer = newer
+        self.older = older
+
+    @property
+    def has_newer(self) -> bool:
+        return self.newer is not None
+
+    @property
+    def has_older(self) -> bool:
+        return self.older is not None
+
+
+def _member_page(user_id: int, category: Optional[str], cursor: Optional[Cursor],
+                 newer: bool, limit: int) -> List[Expense]:
+    """Up to limit of one user's expenses past the cursor, nearest first"""
+    query = Expense.query.filter(Expense.user_id == user_id)
+    if category:
+        query = query.filter(Expense.category == category)
+    if cursor is not None:
+        day, expense_id = cursor
+        # A plain bound on date for the index range, with the id tiebreak left as a filter:
+        # neither a row value comparison nor (date < d OR date = d AND id < i) is range scanned
+        # by MySQL, or by SQLite once the two dates are separate parameters
+        if newer:
+            query = query.filter(Expense.date >= day, or_(Expense.date > day, Expense.id > expense_id))
+        else:
+            query = query.filter(Expense.date <= day, or_(Expense.date < day, Expense.id < expense_id))
+    order = (Expense.date.asc(), Expense.id.asc()) if newer else (Expense.date.desc(), Expense.id.desc())
+    return query.order_by(*order).limit(limit).all()
+
+
+def count_expenses(user_ids: Iterable[int], category: Optional[str] = None,
+                   mode: str = 'approximate') -> Optional[int]:
+    """Number of the users' expenses (in a category) by the given COUNT_MODES mode; None for 'none'"""
+    user_ids = list(user_ids)
+    if mode == 'exact':
+        query = select(func.count(Expense.id)).where(Expense.user_id.in_(user_ids))
+        if category:
+            query = query.where(Expense.category == category)
+    elif mode == 'approximate':
+        query = select(func.coalesce(func.sum(MonthlySpend.expense_count), 0)).where(
+            MonthlySpend.user_id.in_(user_ids))
+        if category:
+            query = query.where(MonthlySpend.category == category)
+    else:
+        return None
+    return db.session.execute(query).scalar()
+
+
+def expense_page(user_ids: Iterable[int], category: Optional[str] = None, after: Optional[str] = None,
+                 before: Optional[str] = None, per_page: int = PER_PAGE,
+                 count: str = 'none') -> ExpensePage:
+    """
+    A page of the users' expenses, newest first
+
+    after continues to older expenses from a page's older cursor, before goes
+    back to newer ones from its newer cursor; with neither (or a malformed
+    cursor) this is the first page. count is one of COUNT_MODES.
+    """
+    user_ids = list(user_ids)
+    older_than = decode_cursor(after)
+    newer_than = decode_cursor(before) if older_than is None else None
+    going_back = newer_than is not None
+    cursor = newer_than if going_back else older_than
+
+    # One row past the page tells whether there is another page that way
+    rows = list(heapq.merge(
+        *(_member_page(user_id, category, cursor, going_back, per_page + 1) for user_id in user_ids),
+        key=_sort_key, reverse=not going_back
+    ))[:per_page + 1]
+    more = len(rows) > per_page
+    items = rows[:per_page]
+
+    if going_back:
+        if not more:
+            # Back at the newest expenses: show a full first page rather than what's left of it
+            return expense_page(user_ids, category, per_page=per_page, count=count)
+        items.reverse()
+        newer = encode_cursor(items[0])
+        older = encode_cursor(items[-1])
+    else:
+        newer = encode_cursor(items[0]) if items and cursor is not None else None
+        older = encode_cursor(items[-1]) if more else None
+    return ExpensePage(items, count_expenses(user_ids, category, count), newer, older)
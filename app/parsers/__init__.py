@@ -0,0 +1,192 @@
+"""
+Bank statement parser registry
+
+Each bank's statement layout lives in its own module and is only imported
+the first time a statement from that bank is parsed. The registry itself
+only holds ParserSpecs: where a parser lives and the strings that identify
+its statements, so detecting the bank doesn't import every parser either.
+
+Parsers from other installed packages are discovered through the
+``money_management.bank_parsers`` entry point group, e.g. in their
+pyproject.toml::
+
+    [project.entry-points."money_management.bank_parsers"]
+    monzo = "monzo_statements:MonzoParser"
+
+The entry point name is the bank name, ending in ``_csv`` for a parser of
+CSV exports like the built-in ones, and the object is a StatementParser or
+CSVStatementParser subclass (see app.parsers.base). Plugins are imported
+like the built-in parsers, the first time they are needed: their
+``signatures`` and ``label`` attributes are read then, so detecting a bank
+imports the plugins of that kind of statement. A plugin that fails to
+import is logged and left out of detection rather than breaking it.
+"""
+
+import importlib
+import logging
+import re
+from importlib.metadata import entry_points
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = 'money_management.bank_parsers'
+
+# Header row of Lloyds Bank CSV exports
+LLOYDS_CSV_HEADER = 'Transaction Date,Transaction Type,Sort Code,Account Number'
+
+
+def sort_code_pattern(prefixes: str) -> 're.Pattern':
+    """
+    Regex signature for a sort code in a bank's range, e.g. '40' for HSBC
+
+    The code must follow a 'Sort code' label or precede an 8-digit account
+    number, so dates like 20-05-25 don't count.
+    """
+    code = rf'(?:{prefixes})-\d{{2}}-\d{{2}}'
+    return re.compile(rf'(?i:sort\s*code)\W*{code}\b|\b{code}\s+\d{{8}}\b')
+
+
+class ParserSpec:
+    """Where to find a parser and how to recognise the statements it reads"""
+
+    def __init__(self, name: str, target, kind: str = 'pdf', signatures: Sequence = (),
+                 label: Optional[str] = None):
+        self.name = name
+        self.target = target  # 'module:attribute', or the parser class itself
+        self.kind = kind      # 'pdf' or 'csv'
+        self.signatures = tuple(signatures)
+        self.label = label or name.title()
+
+    def load(self):
+        """Import the parser class"""
+        if isinstance(self.target, str):
+            module_name, _, attribute = self.target.partition(':')
+            self.target = getattr(importlib.import_module(module_name), attribute)
+        return self.target
+
+    def score(self, sample: str) -> int:
+        """
+        How many of this parser's signatures appear in a sample of the statement
+
+        A signature is a string to look for or a compiled regex to search with.
+        """
+        return sum(1 for signature in self.signatures
+                   if (signature.search(sample) if isinstance(signature, re.Pattern) else signature in sample))
+
+    def __repr__(self):
+        return f'<ParserSpec {self.kind}:{self.name}>'
+
+
+# The fallback parser for each kind of statement
+DEFAULT_PARSERS = {'pdf': 'generic', 'csv': 'generic_csv'}
+
+# Bank name meaning "pick the parser from the statement itself"
+AUTO_DETECT = 'auto'
+
+BUILTIN_PARSERS = [
+    ParserSpec('hsbc', 'app.parsers.hsbc:HSBCParser', label='HSBC',
+               signatures=('BALANCEBROUGHTFORWARD', 'BALANCECARRIEDFORWARD', 'Paymenttypeanddetails',
+                           'www.hsbc.co.uk', 'HSBC', re.compile(r'\bGB\d{2}HBUK\d'),
+                           sort_code_pattern('40'))),
+    ParserSpec('lloyds', 'app.parsers.lloyds:LloydsParser', label='Lloyds Bank',
+               signatures=('Lloyds Bank', 'lloydsbank.com', 'Money In (£)', 'Money Out (£)',
+                           re.compile(r'\bGB\d{2}LOYD\d'), sort_code_pattern('30|77'))),
+    ParserSpec('barclays', 'app.parsers.barclays:BarclaysParser', label='Barclays',
+               signatures=('Barclays', 'barclays.co.uk', re.compile(r'\bGB\d{2}BARC\d'),
+                           sort_code_pattern('20'))),
+    ParserSpec('natwest', 'app.parsers.natwest:NatWestParser', label='NatWest',
+               signatures=('NatWest', 'National Westminster', 'natwest.com',
+                           re.compile(r'\bGB\d{2}NWBK\d'), sort_code_pattern('5[0-6]|60'))),
+    ParserSpec('generic', 'app.parsers.generic:GenericParser', label='Other'),
+    ParserSpec('lloyds_csv', 'app.parsers.lloyds_csv:LloydsCSVParser', kind='csv',
+               label='Lloyds Bank', signatures=(LLOYDS_CSV_HEADER,)),
+    ParserSpec('generic_csv', 'app.parsers.generic_csv:GenericCSVParser', kind='csv', label='Other'),
+]
+
+_registry: Optional[Dict[str, Dict[str, ParserSpec]]] = None
+
+
+class EntryPointSpec(ParserSpec):
+    """A parser from an installed package, described by its class once that is imported"""
+
+    def __init__(self, entry_point):
+        kind = 'csv' if entry_point.name.endswith('_csv') else 'pdf'
+        super().__init__(entry_point.name, entry_point.value, kind=kind)
+        self.broken = False
+
+    def load(self):
+        parser_class = super().load()
+        if getattr(parser_class, 'kind', 'pdf') != self.kind:
+            raise TypeError(f'{self.name} is registered as a {self.kind} parser but {parser_class.__name__} '
+                            f'reads {parser_class.kind} statements')
+        self.signatures = tuple(getattr(parser_class, 'signatures', ()))
+        self.label = getattr(parser_class, 'label', None) or self.label
+        return parser_class
+
+    def score(self, sample: str) -> int:
+        if self.broken:
+            return 0
+        if isinstance(self.target, str):
+            try:
+                self.load()
+            except Exception:
+                logger.exception('Could not load bank parser plugin %s (%s)', self.name, self.target)
+                self.broken = True
+                return 0
+        return super().score(sample)
+
+
+def _entry_point_specs() -> List[ParserSpec]:
+    return [EntryPointSpec(entry_point) for entry_point in entry_points(group=ENTRY_POINT_GROUP)]
+
+
+def _get_registry() -> Dict[str, Dict[str, ParserSpec]]:
+    global _registry
+    if _registry is None:
+        _registry = {'pdf': {}, 'csv': {}}
+        # Installed plugins may replace a built-in parser of the same name
+        for spec in BUILTIN_PARSERS + _entry_point_specs():
+            _registry[spec.kind][spec.name] = spec
+    return _registry
+
+
+def register_parser(spec: ParserSpec) -> None:
+    """Add or replace a parser at runtime"""
+    _get_registry()[spec.kind][spec.name] = spec
+
+
+def parser_specs(kind: str = 'pdf') -> List[ParserSpec]:
+    """Registered parsers of one kind, in registration order"""
+    return list(_get_registry()[kind].values())
+
+
+def has_parser(name: str, kind: str = 'pdf') -> bool:
+    return name in _get_registry()[kind]
+
+
+def get_parser_spec(name: str, kind: str = 'pdf') -> ParserSpec:
+    """The spec registered under name, or the default parser for unknown banks"""
+    specs = _get_registry()[kind]
+    return specs.get(name) or specs[DEFAULT_PARSERS[kind]]
+
+
+def load_parser(name: str, kind: str = 'pdf'):
+    """The parser class for a bank, importing its module on first use"""
+    return get_parser_spec(name, kind).load()
+
+
+def detect_parser(sample: str, kind: str = 'pdf') -> str:
+    """
+    Name of the parser whose signatures best match a sample of the statement
+
+    The sample is the first page of a PDF or the header row of a CSV. Ties go
+    to the parser registered first; falls back to the default parser when
+    nothing matches.
+    """
+    best_name, best_score = DEFAULT_PARSERS[kind], 0
+    for spec in parser_specs(kind):
+        score = spec.score(sample)
+        if score > best_score:
+            best_name, best_score = spec.name, score
+    return best_name
@@ -0,0 +1,10 @@
+"""Barclays PDF statement parser"""
+
+from app.parsers.base import PatternStatementParser
+
+
+class BarclaysParser(PatternStatementParser):
+    """Barclays statements: date, description and amount on one line"""
+
+    transaction_pattern = r'(\d{2}\s\w{3}\s\d{4})\s+(.+?)\s+(\d+\.\d{2})'
+    date_format = '%d %b %Y'
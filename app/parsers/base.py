@@ -0,0 +1,125 @@
+"""Base classes for bank statement parsers"""
+
+import re
+from typing import Dict, Iterable, Iterator, Optional, Sequence
+
+from app.date_parsing import strptime_date
+from app.import_logging import ImportStats
+
+
+class StatementParser:
+    """
+    Parses the text lines of one bank's PDF statements into transactions
+
+    Amount, date and transaction direction helpers are shared by all banks
+    and come from the BankStatementProcessor the parser works for.
+    """
+
+    kind = 'pdf'
+    label = None
+    # Strings or compiled regexes found on the first page (see ParserSpec.score)
+    signatures: Sequence = ()
+    # False for the generic parser, which bank-specific parsers fall back to
+    bank_specific = True
+
+    def __init__(self, processor):
+        self.processor = processor
+
+    def iter_transactions(self, lines: Iterable[str]) -> Iterator[Dict]:
+        """Yield transaction dicts from a stream of statement lines"""
+        raise NotImplementedError
+
+    def _parse_amount(self, amount_str: str) -> float:
+        return self.processor._parse_amount(amount_str)
+
+    def _parse_date(self, date_str: str):
+        return self.processor._parse_date(date_str)
+
+    def _determine_transaction_type(self, description: str, amount: float) -> str:
+        return self.processor._determine_transaction_type(description, amount)
+
+
+class PatternStatementParser(StatementParser):
+    """A bank whose statement has one transaction per match of a single regex"""
+
+    # Groups: date, description, amount and optionally balance
+    transaction_pattern: Optional[str] = None
+    date_format = '%d/%m/%Y'
+
+    def iter_transactions(self, lines: Iterable[str]) -> Iterator[Dict]:
+        """Parse line by line with the bank's single transaction regex"""
+        if not self.transaction_pattern:
+            return
+
+        transaction_regex = re.compile(self.transaction_pattern)
+        date_format = self.date_format
+
+        for line in lines:
+            for match in transaction_regex.finditer(line):
+                try:
+                    groups = match.groups()
+                    if len(groups) >= 3:
+                        date_str = groups[0]
+                        description = groups[1].strip()
+                        amount_str = groups[2]
+                        balance_str = groups[3] if len(groups) > 3 else None
+
+                        # Parse date
+                        try:
+                            transaction_date = strptime_date(date_str, date_format)
+                        except ValueError:
+                            # Try alternative date formats
+                            for fmt in ['%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%d %b %Y']:
+                                try:
+                                    transaction_date = strptime_date(date_str, fmt)
+                                    break
+                                except ValueError:
+                                    continue
+                            else:
+                                continue  # Skip if date can't be parsed
+
+                        # Parse amount
+                        amount = self._parse_amount(amount_str)
+                        balance = self._parse_amount(balance_str) if balance_str else None
+
+                        # Determine transaction type
+                        transaction_type = self._determine_transaction_type(description, amount)
+
+                        yield {
+                            'date': transaction_date,
+                            'description': description,
+                            'amount': abs(amount),  # Store as positive, use type for direction
+                            'balance': balance,
+                            'type': transaction_type,
+                            'raw_text': match.group(0)
+                        }
+
+                except Exception as e:
+                    continue  # Skip problematic transactions
+
+
+class CSVStatementParser:
+    """
+    Parses rows of one bank's CSV exports into categorized transactions
+
+    mode is 'rows' (csv module, one row at a time) or 'columnar' (blocks of
+    rows with NumPy, see app.csv_columnar); both give the same transactions.
+    Counts go to stats (see app.import_logging).
+    """
+
+    kind = 'csv'
+    label = None
+    signatures: Sequence[str] = ()
+
+    def __init__(self, date_column: str = 'Date', description_column: str = 'Description',
+                 amount_column: str = 'Amount', has_header: bool = True,
+                 stats: Optional[ImportStats] = None):
+        self.date_column = date_column
+        self.description_column = description_column
+        self.amount_column = amount_column
+        self.has_header = has_header
+        self.stats = stats or ImportStats()
+
+    def iter_transactions(self, lines: Iterable[str], merchant_memo=None,
+                          mode: str = 'rows') -> Iterator[Dict]:
+        raise NotImplementedError
@@ -0,0 +1,109 @@
+"""Generic PDF statement parser, for banks without their own layout"""
+
+import logging
+import re
+from typing import Dict, Iterable, Iterator
+
+from app.parsers.base import StatementParser
+
+logger = logging.getLogger(__name__)
+
+
+class GenericParser(StatementParser):
+    """Any line with a date and an amount is a transaction"""
+    
+    bank_specific = False
+    
+    def iter_transactions(self, lines: Iterable[str]) -> Iterator[Dict]:
+        """Generic transaction parsing over a stream of lines"""
+        # More flexible patterns
+        date_patterns = [
+            r'(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4})',  # DD/MM/YYYY, DD-MM-YYYY, DD.MM.YYYY
+            r'(\d{1,2}\s+\w{3}\s+\d{2,4})',            # DD MMM YYYY
+            r'(\d{2}\s+\w+\s+\d{4})',                   # DD Month YYYY
+        ]
+        
+        amount_patterns = [
+            r'(?:£|\$|EUR|GBP)?\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',  # Currency amounts
+            r'(\d{1,3}(?:,\d{3})*\.\d{2})',                           # Decimal amounts
+        ]
+        
+        for line_num, line in enumerate(lines):
+            line = line.strip()
+            if not line or len(line) < 10:  # Skip very short lines
+                continue
+                
+            # Try to find date patterns
+            date_match = None
+            for pattern in date_patterns:
+                date_match = re.search(pattern, line)
+                if date_match:
+                    break
+                    
+            if not date_match:
+                continue
+                
+            # Try to find amount patterns
+            amount_matches = []
+            for pattern in amount_patterns:
+                amount_matches.extend(re.findall(pattern, line))
+                
+            if not amount_matches:
+                continue
+                
+            try:
+                # Parse date
+                date_str = date_match.group(1)
+                transaction_date = self._parse_date(date_str)
+                
+                if not transaction_date:
+                    logger.debug('Could not parse date: %s', date_str)
+                    self.processor.stats.add('parsing', 'bad_dates')
+                    continue
+                
+                # Extract description (text between date and amounts)
+                description_start = date_match.end()
+                description = line[description_start:].strip()
+                
+                # Find the transaction amount (usually the first significant amount)
+                amounts = []
+                for amt_str in amount_matches:
+                    amount = self._parse_amount(amt_str)
+                    if amount > 0:
+                        amounts.append(amount)
+                
+                if not amounts:
+                    continue
+                    
+                # Use the first amount as transaction amount
+                transaction_amount = amounts[0]
+                
+                # Clean description by removing amounts and extra text
+                clean_desc = description
+                for amt_match in amount_matches:
+                    clean_desc = clean_desc.replace(amt_match, '').replace('£', '').replace('$', '').replace(',', '')
+                clean_desc = re.sub(r'\s+', ' ', clean_desc).strip()
+                
+                # Skip if description is too short or looks like header/footer
+                if len(clean_desc) < 3 or clean_desc.lower() in ['balance', 'total', 'page', 'statement']:
+                    continue
+                
+                # Determine transaction type
+                transaction_type = self._determine_transaction_type(clean_desc, transaction_amount)
+                
+                transaction = {
+                    'date': transaction_date,
+                    'description': clean_desc,
+                    'amount': transaction_amount,
+                    'balance': amounts[1] if len(amounts) > 1 else None,
+                    'type': transaction_type,
+                    'raw_text': line
+                }
+                
+            except Exception as e:
+                logger.debug('Error processing line %d: %s', line_num, e)
+                self.processor.stats.add('parsing', 'errors')
+                continue
+            
+            logger.debug('Found transaction: %s - £%s', clean_desc, transaction_amount)
+            yield transaction
@@ -0,0 +1,80 @@
+"""Generic CSV statement parser, with user-chosen date, description and amount columns"""
+
+import csv
+import logging
+import math
+from typing import Dict, Iterable, Iterator
+
+from app.parsers.base import CSVStatementParser
+from app.pdf_processor import BankStatementProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class GenericCSVParser(CSVStatementParser):
+    """Any CSV export, reading the columns named in the import form"""
+
+    def iter_transactions(self, lines: Iterable[str], merchant_memo=None,
+                          mode: str = 'rows') -> Iterator[Dict]:
+        if mode == 'columnar':
+            from app.csv_columnar import iter_generic_csv_columnar
+            return iter_generic_csv_columnar(lines, self.date_column, self.description_column,
+                                             self.amount_column, self.has_header, merchant_memo,
+                                             self.stats)
+
+        processor = BankStatementProcessor('generic', stats=self.stats)
+        # Auto-categorize, using categories learned from earlier approvals first
+        return processor.categorize_transactions(self._iter_rows(processor, lines), merchant_memo)
+
+    def _iter_rows(self, processor: BankStatementProcessor, lines: Iterable[str]) -> Iterator[Dict]:
+        """Parse rows of a CSV with user-specified date, description and amount columns"""
+        csv_reader = csv.DictReader(lines) if self.has_header else csv.reader(lines)
+
+        for row_num, row in enumerate(csv_reader, 1):
+            try:
+                if self.has_header:
+                    date_str = row.get(self.date_column, '')
+                    description = row.get(self.description_column, '')
+                    amount_str = row.get(self.amount_column, '')
+                else:
+                    # Assume first 3 columns are date, description, amount
+                    if len(row) >= 3:
+                        date_str = row[0]
+                        description = row[1]
+                        amount_str = row[2]
+                    else:
+                        continue
+
+                if not date_str or not description or not amount_str:
+                    continue
+
+                # Parse date
+                transaction_date = processor._parse_date(date_str)
+                if not transaction_date:
+                    self.stats.add('parsing', 'bad_dates')
+                    continue
+
+                # Parse amount; 'nan' and 'inf' parse as floats but aren't amounts
+                amount = processor._parse_amount(amount_str)
+                if not math.isfinite(amount):
+                    self.stats.add('parsing', 'bad_amounts')
+                    continue
+                if amount <= 0:
+                    continue
+
+                # Determine transaction type
+                transaction_type = processor._determine_transaction_type(description, amount)
+
+                transaction = {
+                    'date': transaction_date,
+                    'description': description.strip(),
+                    'amount': amount,
+                    'type': transaction_type
+                }
+
+            except Exception as e:
+                logger.debug('Error processing row %d: %s', row_num, e)
+                self.stats.add('parsing', 'errors')
+                continue
+
+            yield transaction
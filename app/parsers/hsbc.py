@@ -0,0 +1,219 @@
+"""HSBC PDF statement parser"""
+
+import logging
+import re
+from collections import deque
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from app.date_parsing import strptime_date
+from app.parsers.base import StatementParser
+
+logger = logging.getLogger(__name__)
+
+# HSBC statement layout: a date line starts a group of transactions for that
+# day; the rest of the group are undated lines that begin with a payment code.
+HSBC_DATE_LINE = re.compile(r'^(\d{2}\s+\w{3}\s+\d{2})')
+HSBC_AMOUNT = re.compile(r'([\d,]+\.\d{2})')
+HSBC_AMOUNT_TAIL = re.compile(r'\s*[\d,]+\.\d{2}.*$')
+
+# Header/footer lines, which never start a group
+HSBC_SKIP_LINES = re.compile('|'.join(map(re.escape, [
+    'Contact tel', 'Text phone', 'www.hsbc.co.uk', 'Your Statement',
+    'Account Name', 'Sortcode', 'Account Number', 'Sheet Number',
+    'Opening Balance', 'Payments In', 'Payments Out', 'Closing Balance',
+    'International Bank Account Number', 'Bank Identifier Code',
+    'see reverse for call times', 'used by deaf or speech impaired',
+    'BALANCEBROUGHTFORWARD', 'BALANCECARRIEDFORWARD'
+])))
+
+# Balance and header lines inside a group
+HSBC_GROUP_SKIP_LINES = re.compile('|'.join(map(re.escape, [
+    'BALANCE', 'Contact tel', 'Text phone', 'Account Name'
+])))
+
+# Payment codes, in the order they are tried: CR = Credit, TFR = Transfer,
+# ATM = ATM withdrawal, VIS = Visa card payment, BP = Bank Payment,
+# DD = Direct Debit, OBP = Online Banking Payment, ))) = contactless card
+HSBC_DATED_CODES = (('CR', 'CR'), ('TFR', 'TFR'), ('ATM', 'ATM'), ('VIS', 'VIS'), ('BP', 'BP'),
+                    ('DD', 'DD'), ('OBP', 'OBP'), (')))', 'CARD'))
+HSBC_UNDATED_CODES = (('VIS', 'VIS'), (')))', 'CARD'), ('ATM', 'ATM'), ('BP', 'BP'),
+                      ('CR', 'CR'), ('DD', 'DD'))
+
+# Lines after a date line that may hold more of that date's transactions
+HSBC_GROUP_LINES = 9
+
+# Lines searched for the amount of a transaction that has none on its own line
+HSBC_DATED_AMOUNT_LINES = 3
+HSBC_UNDATED_AMOUNT_LINES = 1
+
+
+def _split_hsbc_code(line: str, codes: Tuple[Tuple[str, str], ...]) -> Tuple[Optional[str], str]:
+    """The payment code a line starts with and the rest of the line"""
+    for prefix, code in codes:
+        if line.startswith(prefix):
+            return code, line[len(prefix):].strip()
+    return None, line
+
+
+class _HSBCPendingTransaction:
+    """An HSBC transaction found on a line, waiting if needed for its amount on the next lines"""
+
+    __slots__ = ('date', 'date_str', 'code', 'description', 'raw_text', 'dated',
+                 'amount', 'lines_left')
+
+    def __init__(self, transaction_date, date_str: str, code: str, line: str,
+                 description: str, raw_text: str, dated: bool):
+        self.date = transaction_date
+        self.date_str = date_str
+        self.code = code
+        self.raw_text = raw_text
+        self.dated = dated
+        self.amount = None
+        self.lines_left = 0
+
+        amount_match = HSBC_AMOUNT.search(line)
+        if amount_match:
+            self.amount = amount_match.group(1)
+            # Remove amount from description
+            self.description = HSBC_AMOUNT_TAIL.sub('', description).strip()
+        else:
+            self.description = description
+            self.lines_left = HSBC_DATED_AMOUNT_LINES if dated else HSBC_UNDATED_AMOUNT_LINES
+
+    @property
+    def waiting(self) -> bool:
+        return self.lines_left > 0
+
+    def feed(self, line: str) -> None:
+        """Look for the amount on a following (stripped) line"""
+        self.lines_left -= 1
+        amount_match = HSBC_AMOUNT.search(line)
+        if amount_match:
+            self.amount = amount_match.group(1)
+            self.lines_left = 0
+            # Multi-line transactions continue their description on the amount line
+            description_part = HSBC_AMOUNT_TAIL.sub('', line).strip()
+            if description_part and len(description_part) > 2:
+                self.description = f"{self.description} {description_part}".strip()
+
+    def finish(self) -> None:
+        """No more lines to search"""
+        self.lines_left = 0
+
+
+class HSBCParser(StatementParser):
+    """HSBC statements: grouped transactions under each date line"""
+    
+    def iter_transactions(self, lines: Iterable[str]) -> Iterator[Dict]:
+        """
+        Parse HSBC statement lines in a single forward pass
+
+        Each line is tokenized once: a date line starts a group and may hold
+        a transaction, and lines up to HSBC_GROUP_LINES later (until the next
+        date line) may hold more transactions on that date. A transaction
+        without an amount on its own line takes it from the next line or
+        three, so found transactions queue in statement order until their
+        amount is known.
+        """
+        pending = deque()
+        group_date = group_date_str = None
+        group_lines_left = 0
+        
+        for raw_line in lines:
+            line = raw_line.strip()
+            
+            # Earlier transactions still looking for their amount see this line first
+            for transaction in pending:
+                if transaction.waiting:
+                    transaction.feed(line)
+            while pending and not pending[0].waiting:
+                transaction = self._hsbc_transaction(pending.popleft())
+                if transaction:
+                    yield transaction
+            
+            in_group = group_lines_left > 0
+            group_lines_left = max(group_lines_left - 1, 0)
+            if not line:
+                continue
+            
+            date_match = HSBC_DATE_LINE.match(line)
+            if date_match:
+                # Another date line ends the group
+                group_lines_left = 0
+            elif in_group and not HSBC_GROUP_SKIP_LINES.search(line):
+                code, description = _split_hsbc_code(line, HSBC_UNDATED_CODES)
+                if code:
+                    pending.append(_HSBCPendingTransaction(group_date, group_date_str, code, line,
+                                                           description, line, dated=False))
+                continue
+            
+            # Only date lines that aren't headers/footers start a group
+            if not date_match or HSBC_SKIP_LINES.search(line):
+                continue
+            
+            date_str = date_match.group(1)
+            remaining = line[date_match.end():].strip()
+            logger.debug('Found date line: %s | %s', date_str, remaining)
+            
+            try:
+                group_date = strptime_date(date_str, '%d %b %y')
+            except ValueError:
+                logger.debug('Could not parse date: %s', date_str)
+                self.processor.stats.add('parsing', 'bad_dates')
+                continue
+            group_date_str = date_str
+            group_lines_left = HSBC_GROUP_LINES
+            
+            code, details = _split_hsbc_code(remaining, HSBC_DATED_CODES)
+            if code:
+                pending.append(_HSBCPendingTransaction(group_date, date_str, code, remaining, details,
+                                                       f"{date_str} {remaining}", dated=True))
+        
+        for pending_transaction in pending:
+            pending_transaction.finish()
+            transaction = self._hsbc_transaction(pending_transaction)
+            if transaction:
+                yield transaction
+    
+    def _hsbc_transaction(self, pending: _HSBCPendingTransaction) -> Optional[Dict]:
+        """The transaction dict, if an acceptable amount was found"""
+        amount = self._parse_amount(pending.amount) if pending.amount else None
+        
+        if pending.dated:
+            if not (amount and amount > 0):
+                return None
+        # Validate amount is reasonable (not a balance)
+        elif not (amount and 0.50 <= amount <= 10000):
+            return None
+        else:
+            logger.debug('Found additional transaction on %s: %s - £%s',
+                         pending.date_str, pending.description, amount)
+        
+        return {
+            'date': pending.date,
+            'description': pending.description,
+            'amount': amount,
+            'type': self._transaction_type(pending.code, pending.description),
+            'hsbc_type': pending.code,
+            'raw_text': pending.raw_text
+        }
+    
+    def _transaction_type(self, trans_code: str, description: str) -> str:
+        """Determine transaction type based on HSBC transaction codes"""
+        # HSBC transaction type codes:
+        # CR = Credit (incoming payment/deposit)
+        # TFR = Transfer (outgoing transfer)
+        # ATM = ATM withdrawal
+        # VIS = Visa card payment
+        # BP = Bank Payment (outgoing payment)
+        # DD = Direct Debit
+        # OBP = Online Banking Payment
+        # CARD = Card transaction (starts with )))
+        
+        if trans_code in ['CR']:
+            return 'credit'
+        elif trans_code in ['TFR', 'ATM', 'VIS', 'BP', 'DD', 'OBP', 'CARD']:
+            return 'debit'
+        else:
+            # Fall back to description analysis for unknown codes
+            return self._determine_transaction_type(description, 0)
@@ -0,0 +1,115 @@
+"""Lloyds Bank PDF statement parser"""
+
+import logging
+import re
+from typing import Dict, Iterable, Iterator
+
+from app.date_parsing import strptime_date
+from app.parsers.base import StatementParser
+
+logger = logging.getLogger(__name__)
+
+
+class LloydsParser(StatementParser):
+    """Lloyds Bank statements: one transaction per date line, ending in the balance"""
+    
+    def iter_transactions(self, lines: Iterable[str]) -> Iterator[Dict]:
+        """Parse Lloyds Bank statement lines with specialized logic"""
+        # Look for transaction lines in the format we discovered
+        # Date: "21 Jul 25", Description, Type: "DEB", Money In/Out, Balance
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+                
+            # Look for date pattern at start of line
+            date_match = re.match(r'^(\d{2}\s+\w{3}\s+\d{2})', line)
+            if not date_match:
+                continue
+                
+            logger.debug('Found potential transaction line: %s', line)
+            
+            # Try to extract transaction details from this line and possibly next lines
+            date_str = date_match.group(1)
+            remaining = line[date_match.end():].strip()
+            
+            # Look for balance at the end (format: 1,566.83)
+            balance_match = re.search(r'([\d,]+\.\d{2})(?:\s*$)', remaining)
+            if not balance_match:
+                continue
+                
+            balance_str = balance_match.group(1)
+            before_balance = remaining[:balance_match.start()].strip()
+            
+            # Look for amount before balance (format: 30.48 or blank)
+            amount_match = re.search(r'([\d,]*\.?\d*)\s*$', before_balance)
+            amount_str = ""
+            description_and_type = before_balance
+            
+            if amount_match:
+                amount_str = amount_match.group(1)
+                description_and_type = before_balance[:amount_match.start()].strip()
+            
+            # Look for transaction type (DEB, FPI, FPO, TFR, CPT)
+            type_match = re.search(r'\b([A-Z]{3})\b', description_and_type)
+            trans_type = type_match.group(1) if type_match else "UNK"
+            
+            # Extract description (everything before the type)
+            if type_match:
+                description = description_and_type[:type_match.start()].strip()
+            else:
+                description = description_and_type.strip()
+                
+            # Clean up description
+            description = re.sub(r'[\.]+', ' ', description).strip()
+            description = re.sub(r'\s+', ' ', description)
+            
+            # Skip if description is too short
+            if len(description) < 3:
+                continue
+                
+            try:
+                # Parse date (format: "21 Jul 25")
+                transaction_date = strptime_date(date_str, '%d %b %y')
+                
+                # Parse amount and balance
+                amount = self._parse_amount(amount_str) if amount_str else 0.0
+                balance = self._parse_amount(balance_str)
+                
+                # Determine transaction direction based on Lloyds type codes
+                transaction_direction = self._transaction_type(trans_type, description)
+                
+            except Exception as e:
+                logger.debug('Error parsing Lloyds transaction: %s', e)
+                self.processor.stats.add('parsing', 'errors')
+                continue
+            
+            if amount > 0:
+                logger.debug('Parsed Lloyds transaction: %s - %s - %s - £%s',
+                             date_str, description, trans_type, amount)
+                yield {
+                    'date': transaction_date,
+                    'description': description,
+                    'amount': amount,
+                    'balance': balance,
+                    'type': transaction_direction,
+                    'lloyds_type': trans_type,
+                    'raw_text': line
+                }
+    
+    def _transaction_type(self, trans_code: str, description: str) -> str:
+        """Determine transaction type based on Lloyds transaction codes"""
+        # Lloyds transaction type codes:
+        # DEB = Debit (outgoing payment)
+        # FPI = Faster Payment In (incoming)
+        # FPO = Faster Payment Out (outgoing)
+        # TFR = Transfer
+        # CPT = Card Payment
+        
+        if trans_code in ['FPI', 'TFR'] and 'in' in description.lower():
+            return 'credit'
+        elif trans_code in ['DEB', 'FPO', 'CPT']:
+            return 'debit'
+        else:
+            # Fall back to description analysis
+            return self._determine_transaction_type(description, 0)
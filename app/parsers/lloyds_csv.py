@@ -0,0 +1,117 @@
+"""Lloyds Bank CSV export parser"""
+
+import csv
+import logging
+import math
+from typing import Dict, Iterable, Iterator
+
+from app.categorization import categorize_lloyds, MEMO_CONFIDENCE
+from app.date_parsing import strptime_date
+from app.parsers.base import CSVStatementParser
+from app.pdf_processor import BankStatementProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class LloydsCSVParser(CSVStatementParser):
+    """Lloyds Bank CSV exports, which have a fixed column layout"""
+
+    def iter_transactions(self, lines: Iterable[str], merchant_memo=None,
+                          mode: str = 'rows') -> Iterator[Dict]:
+        if mode == 'columnar':
+            from app.csv_columnar import iter_lloyds_csv_columnar
+            return iter_lloyds_csv_columnar(lines, merchant_memo, self.stats)
+        return self._iter_rows(lines, merchant_memo)
+
+    def _iter_rows(self, lines: Iterable[str], merchant_memo=None) -> Iterator[Dict]:
+        """Parse and categorize rows of a Lloyds Bank CSV export"""
+        processor = BankStatementProcessor('lloyds', stats=self.stats)
+        stats = self.stats
+
+        csv_reader = csv.DictReader(lines)
+
+        for row_num, row in enumerate(csv_reader, 1):
+            try:
+                # Lloyds CSV columns:
+                # Transaction Date,Transaction Type,Sort Code,Account Number,Transaction Description,Debit Amount,Credit Amount,Balance
+                date_str = row.get('Transaction Date', '').strip()
+                trans_type = row.get('Transaction Type', '').strip()
+                description = row.get('Transaction Description', '').strip()
+                debit_amount = row.get('Debit Amount', '').strip()
+                credit_amount = row.get('Credit Amount', '').strip()
+                balance_str = row.get('Balance', '').strip()
+
+                if not date_str or not description:
+                    continue
+
+                # Parse date (DD/MM/YYYY format)
+                try:
+                    transaction_date = strptime_date(date_str, '%d/%m/%Y')
+                except ValueError:
+                    logger.debug('Could not parse date: %s', date_str)
+                    stats.add('parsing', 'bad_dates')
+                    continue
+
+                # Determine amount and transaction type
+                amount = 0.0
+                transaction_direction = 'debit'  # Default
+
+                if credit_amount and credit_amount.replace('.', '').replace(',', '').isdigit():
+                    amount = processor._parse_amount(credit_amount)
+                    transaction_direction = 'credit'
+                elif debit_amount and debit_amount.replace('.', '').replace(',', '').isdigit():
+                    amount = processor._parse_amount(debit_amount)
+                    transaction_direction = 'debit'
+
+                if amount <= 0:
+                    continue
+
+                # Parse balance; a 'nan' or 'inf' cell is as missing as an empty one
+                balance = processor._parse_amount(balance_str) if balance_str else None
+                if balance is not None and not math.isfinite(balance):
+                    balance = None
+
+                # Use Lloyds-specific transaction type mapping
+                if trans_type in ['FPI', 'TFR']:
+                    # Faster Payment In or Transfer - typically credit
+                    if transaction_direction == 'debit':
+                        # But if it's in debit column, it's actually outgoing
+                        pass
+                    else:
+                        transaction_direction = 'credit'
+                elif trans_type in ['DEB', 'FPO', 'CPT']:
+                    # Debit, Faster Payment Out, Card Payment - typically debit
+                    transaction_direction = 'debit'
+
+                # Learned merchant categories first, then enhanced Lloyds-specific logic
+                learned = merchant_memo.lookup(description) if merchant_memo else None
+                cleaned_desc = processor._clean_description(description)
+                if learned:
+                    stats.add('categorization', 'memo')
+                    category, confidence = learned[0], MEMO_CONFIDENCE
+                    cleaned_desc = learned[1] or cleaned_desc
+                else:
+                    category, confidence = categorize_lloyds(description, trans_type)
+                    stats.add('categorization', 'keywords' if category != 'other' else 'uncategorized')
+
+                transaction = {
+                    'date': transaction_date,
+                    'description': description,
+                    'amount': amount,
+                    'balance': balance,
+                    'type': transaction_direction,
+                    'lloyds_type': trans_type,
+                    'suggested_category': category,
+                    'suggested_description': cleaned_desc,
+                    'confidence_score': confidence
+                }
+
+                logger.debug('Parsed Lloyds CSV transaction: %s - %s - %s - £%s',
+                             date_str, description, trans_type, amount)
+
+            except Exception as e:
+                logger.debug('Error processing Lloyds CSV row %d: %s', row_num, e)
+                stats.add('parsing', 'errors')
+                continue
+
+            yield transaction
@@ -0,0 +1,10 @@
+"""NatWest PDF statement parser"""
+
+from app.parsers.base import PatternStatementParser
+
+
+class NatWestParser(PatternStatementParser):
+    """NatWest statements: date, description, amount and balance on one line"""
+
+    transaction_pattern = r'(\d{2}\s\w{3}\s\d{4})\s+(.+?)\s+(\d+\.\d{2})\s+(\d+\.\d{2})'
+    date_format = '%d %b %Y'
@@ -1,83 +1,42 @@
 """Analytics and reporting routes"""
 
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, request
 from flask_login import login_required, current_user
-from collections import defaultdict
-import json
+from datetime import date, timedelta
 
-import plotly
-import plotly.graph_objs as go
-import plotly.express as px
-
-from app.models import Expense
-from app.utils import get_couple_user_ids
-from app import db
+from app.analytics_charts import chart_payload
+from app.utils import get_couple_user_ids, first_expense_date
 
 analytics_bp = Blueprint('analytics', __name__)
 
+MAX_DAYS = 100 * 366  # ?days= is clamped to this; larger values would overflow date arithmetic
+
 @analytics_bp.route('/')
 @login_required
 def analytics():
     """Analytics dashboard with charts and insights"""
     user_ids = get_couple_user_ids(current_user.id)
     
-    # Get all expenses for analysis
-    expenses = Expense.query.filter(Expense.user_id.in_(user_ids)).all()
-    
-    if not expenses:
-        return render_template('analytics.html', 
-                             spending_chart=None, 
-                             trend_chart=None, 
-                             category_chart=None)
-    
-    # Create spending by category chart
-    category_data = defaultdict(float)
-    for expense in expenses:
-        category_data[expense.category.title()] += expense.amount
-    
-    fig1 = go.Figure(data=[go.Pie(
-        labels=list(category_data.keys()),
-        values=list(category_data.values()),
-        title='Combined Spending by Category'
-    )])
-    spending_chart = json.dumps(fig1, cls=plotly.utils.PlotlyJSONEncoder)
-    
-    # Create monthly spending trend
-    monthly_data = defaultdict(float)
-    for expense in expenses:
-        month_key = expense.date.strftime('%Y-%m')
-        monthly_data[month_key] += expense.amount
-    
-    sorted_months = sorted(monthly_data.keys())
-    amounts = [monthly_data[month] for month in sorted_months]
-    
-    fig2 = go.Figure()
-    fig2.add_trace(go.Scatter(
-        x=sorted_months, 
-        y=amounts, 
-        mode='lines+markers', 
-        name='Combined Monthly Spending'
-    ))
-    fig2.update_layout(
-        title='Combined Monthly Spending Trend', 
-        xaxis_title='Month', 
-        yaxis_title='Amount (£)'
-    )
-    trend_chart = json.dumps(fig2, cls=plotly.utils.PlotlyJSONEncoder)
-    
-    # Create category comparison chart
-    fig3 = px.bar(
-        x=list(category_data.keys()), 
-        y=list(category_data.values()), 
-        title='Combined Category Spending Comparison'
-    )
-    fig3.update_layout(xaxis_title='Category', yaxis_title='Amount (£)')
-    category_chart = json.dumps(fig3, cls=plotly.utils.PlotlyJSONEncoder)
+    # Date range: ?start=&end= (YYYY-MM-DD), or the last ?days= days up to end;
+    # all history when neither start nor a valid days is given
+    days = request.args.get('days', type=int)
+    if days is not None and days < 1:
+        days = None
+    elif days is not None:
+        days = min(days, MAX_DAYS)
+    end = request.args.get('end', date.today(), type=date.fromisoformat)
+    if days is not None:
+        default_start = end - timedelta(days=days - 1)
+    else:
+        default_start = min(first_expense_date(user_ids) or end, end)
+    start = request.args.get('start', default_start, type=date.fromisoformat)
+    
+    payload = chart_payload(user_ids, start, end)
     
     return render_template('analytics.html', 
-                         spending_chart=spending_chart,
-                         trend_chart=trend_chart,
-                         category_chart=category_chart)
+                         charts=payload['charts'],
+                         summary=payload['summary'],
+                         start=start, end=end, days=days)
 
 @analytics_bp.route('/suggestions')
 @login_required
@@ -6,7 +6,7 @@ from datetime import datetime
 
 from app.models import Budget, Expense
 from app.forms import BudgetForm
-from app.utils import get_couple_user_ids, calculate_budget_status
+from app.utils import get_couple_user_ids, household_budget_status
 from app import db
 
 budgets_bp = Blueprint('budgets', __name__)
@@ -25,11 +25,9 @@ def list_budgets():
         Budget.year == current_year
     ).all()
     
-    # Calculate budget status
-    budget_status = {}
-    for user_id in user_ids:
-        user_status = calculate_budget_status(user_id, current_month, current_year)
-        budget_status.update(user_status)
+    # Calculate budget status (both partners' budgets combined per category)
+    budget_status = household_budget_status(user_ids, [(current_year, current_month)]).get(
+        (current_year, current_month), {})
     
     return render_template('budgets.html', budgets=budgets, budget_status=budget_status)
 
@@ -1,12 +1,13 @@
 """Expense-related routes"""
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
 from datetime import datetime
 
-from app.models import Expense, User
+from app.models import Expense
 from app.forms import ExpenseForm
-from app.utils import get_couple_user_ids
+from app.pagination import COUNT_MODES, PER_PAGE, expense_page
+from app.utils import get_couple_user_ids, household_expense_categories
 from app import db
 
 expenses_bp = Blueprint('expenses', __name__)
@@ -15,31 +16,55 @@ expenses_bp = Blueprint('expenses', __name__)
 @login_required
 def list_expenses():
     """List all expenses"""
-    page = request.args.get('page', 1, type=int)
     category = request.args.get('category', '')
+    count = request.args.get('count', 'approximate')
+    if count not in COUNT_MODES:
+        count = 'approximate'
     
     # Get user IDs for couple (includes partner if linked)
     user_ids = get_couple_user_ids(current_user.id)
     
-    query = Expense.query.filter(Expense.user_id.in_(user_ids))
-    if category:
-        query = query.filter_by(category=category)
+    # Keyset pages: ?after=/?before= cursors instead of page numbers, so deep pages stay fast
+    expenses = expense_page(user_ids, category or None, after=request.args.get('after'),
+                            before=request.args.get('before'), count=count)
     
-    expenses = query.order_by(Expense.date.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
-    
-    # Get categories for filtering (you might need to implement this function)
-    categories = ['Food', 'Transport', 'Entertainment', 'Bills', 'Shopping', 'Health', 'Other']
+    # Categories as stored on expenses, for filtering
+    categories = household_expense_categories(user_ids)
     
     # Get partner info for display
-    partner = None
-    if current_user.partner_id:
-        partner = User.query.get(current_user.partner_id)
-    else:
-        partner = User.query.filter_by(partner_id=current_user.id).first()
+    partner = current_user.get_partner()
     
-    return render_template('expenses.html', expenses=expenses, categories=categories, partner=partner)
+    return render_template('expenses.html', expenses=expenses, categories=categories, partner=partner,
+                           category=category, count=count)
+
+@expenses_bp.route('/feed')
+@login_required
+def expense_feed():
+    """A page of expenses as JSON, for infinite scroll (follow 'older' as ?after=)"""
+    category = request.args.get('category', '')
+    count = request.args.get('count', 'none')
+    if count not in COUNT_MODES:
+        count = 'none'
+    
+    expenses = expense_page(get_couple_user_ids(current_user.id), category or None,
+                            after=request.args.get('after'), before=request.args.get('before'),
+                            per_page=min(request.args.get('per_page', PER_PAGE, type=int), 100), count=count)
+    
+    return jsonify({
+        'expenses': [{
+            'id': expense.id,
+            'user_id': expense.user_id,
+            'date': expense.date.isoformat(),
+            'description': expense.description,
+            'category': expense.category,
+            'subcategory': expense.subcategory,
+            'amount': expense.amount,
+            'priority': expense.priority
+        } for expense in expenses.items],
+        'total': expenses.total,
+        'newer': expenses.newer,
+        'older': expenses.older
+    })
 
 @expenses_bp.route('/add', methods=['GET', 'POST'])
 @login_required
@@ -1,18 +1,22 @@
 """Routes for PDF import functionality"""
 
-import os
-import uuid
-from datetime import datetime
+import logging
 from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app, jsonify
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from app import db
-from app.models import ImportedTransaction
+from app.models import ImportedTransaction, ImportJob
 from app.forms import PDFImportForm, CSVImportForm, TransactionReviewForm, BulkTransactionReviewForm
-from app.pdf_processor import process_pdf_statement
+from app.import_jobs import (enqueue_import_job, create_expenses_from_batch, start_chunked_upload,
+                             append_upload_chunk, finish_chunked_upload, UploadOffsetError)
+from app.merchant_memo import learn_from_transactions
+from app.money import sum_pounds
+from app.search import search_expenses
 
 imports = Blueprint('imports', __name__)
 
+logger = logging.getLogger(__name__)
+
 ALLOWED_EXTENSIONS = {'pdf', 'csv'}
 MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
 
@@ -23,84 +27,102 @@ def allowed_file(filename):
 @imports.route('/import', methods=['GET', 'POST'])
 @login_required
 def upload_statement():
-    """Upload and process bank statement PDF"""
+    """Upload a bank statement PDF and queue it for processing"""
     form = PDFImportForm()
     
     if form.validate_on_submit():
-        print("DEBUG: Form validated successfully")
         file = form.pdf_file.data
         
         if file and allowed_file(file.filename):
-            print(f"DEBUG: Processing file: {file.filename}")
             try:
                 # Read file content
                 pdf_content = file.read()
-                print(f"DEBUG: Read {len(pdf_content)} bytes from file")
+                logger.debug('Read %d bytes from %s', len(pdf_content), file.filename)
                 
                 # Check file size
                 if len(pdf_content) > MAX_FILE_SIZE:
                     flash('File size too large. Maximum size is 16MB.', 'error')
                     return render_template('imports/upload.html', form=form)
                 
-                # Process PDF
-                print(f"DEBUG: Processing PDF with bank={form.bank_name.data}, month={form.statement_month.data}, year={form.statement_year.data}")
-                result = process_pdf_statement(
-                    pdf_content=pdf_content,
+                # Hand the statement to the import worker pool
+                job = enqueue_import_job(
+                    user_id=current_user.id,
+                    content=pdf_content,
+                    source_file=secure_filename(file.filename),
+                    kind='pdf',
                     bank_name=form.bank_name.data,
                     statement_month=int(form.statement_month.data),
                     statement_year=int(form.statement_year.data)
                 )
                 
-                print(f"DEBUG: Processing result: success={result['success']}, transactions={result['total_transactions']}")
+                logger.info('Queued import job %s with status=%s', job.id, job.status)
                 
-                if result['success']:
-                    # Save transactions to database
-                    saved_count = 0
-                    for transaction_data in result['transactions']:
-                        transaction = ImportedTransaction(
-                            user_id=current_user.id,
-                            raw_description=transaction_data['description'],
-                            amount=transaction_data['amount'],
-                            transaction_date=transaction_data['date'],
-                            balance=transaction_data.get('balance'),
-                            transaction_type=transaction_data['type'],
-                            import_batch_id=result['batch_id'],
-                            source_file=secure_filename(file.filename),
-                            suggested_category=transaction_data.get('suggested_category'),
-                            suggested_description=transaction_data.get('suggested_description'),
-                            confidence_score=transaction_data.get('confidence_score'),
-                            is_expense=(transaction_data['type'] == 'debit')
-                        )
-                        
-                        db.session.add(transaction)
-                        saved_count += 1
-                    
-                    db.session.commit()
-                    print(f"DEBUG: Saved {saved_count} transactions to database")
-                    
-                    flash(f'Successfully imported {saved_count} transactions from {form.bank_name.data.upper()} statement.', 'success')
-                    return redirect(url_for('imports.review_batch', batch_id=result['batch_id']))
-                    
+                if job.status == 'completed':
+                    bank_label = 'bank' if form.bank_name.data == 'auto' else form.bank_name.data.upper()
+                    return finished_job_redirect(job, f'{bank_label} statement')
+                elif job.status == 'failed':
+                    flash(f'Error processing PDF: {job.error or "Unknown error"}', 'error')
                 else:
-                    print(f"DEBUG: Processing failed with error: {result.get('error')}")
-                    flash(f'Error processing PDF: {result.get("error", "Unknown error")}', 'error')
+                    return redirect(url_for('imports.upload_statement', job=job.id))
                     
             except Exception as e:
-                print(f"DEBUG: Exception during processing: {str(e)}")
+                logger.exception('Exception during upload')
                 flash(f'Error processing file: {str(e)}', 'error')
         else:
-            print("DEBUG: File validation failed")
+            logger.debug('File validation failed for %s', file.filename if file else None)
             flash('Please upload a valid PDF file.', 'error')
     else:
         if form.errors:
-            print(f"DEBUG: Form validation errors: {form.errors}")
+            logger.debug('Form validation errors: %s', form.errors)
+    
+    # Show progress for a job that is still being processed
+    job = None
+    job_id = request.args.get('job')
+    if job_id:
+        job = ImportJob.query.filter_by(id=job_id, user_id=current_user.id).first()
+    
+    return render_template('imports/upload.html', form=form, job=job)
+
+def finished_job_redirect(job, source_label):
+    """Report a job that completed within the request and send the user on"""
+    if job.duplicate_transactions:
+        flash(f'Skipped {job.duplicate_transactions} transactions that were already imported.', 'info')
+    
+    if not job.batch_id:
+        flash(f'No new transactions found in {source_label}.', 'info')
+        return redirect(url_for('imports.import_history'))
     
-    return render_template('imports/upload.html', form=form)
+    flash(f'Successfully imported {job.total_transactions} transactions from {source_label}.', 'success')
+    return redirect(url_for('imports.review_batch', batch_id=job.batch_id))
+
+@imports.route('/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    """API endpoint reporting the progress of a queued import"""
+    job = ImportJob.query.filter_by(
+        id=job_id,
+        user_id=current_user.id
+    ).first_or_404()
+    
+    status = {
+        'id': job.id,
+        'status': job.status,
+        'source_file': job.source_file,
+        'total_transactions': job.total_transactions or 0,
+        'duplicate_transactions': job.duplicate_transactions or 0,
+        'error': job.error,
+        'review_url': None
+    }
+    
+    if job.status == 'completed' and job.batch_id:
+        status['review_url'] = url_for('imports.review_batch', batch_id=job.batch_id)
+    
+    return jsonify(status)
 
 @imports.route('/import_csv', methods=['GET', 'POST'])
 @login_required
 def upload_csv():
-    """Upload and process CSV bank statement"""
+    """Upload a CSV bank statement and queue it for processing"""
     form = CSVImportForm()
     
     if form.validate_on_submit():
@@ -108,316 +130,109 @@ def upload_csv():
         
         if file and file.filename.lower().endswith('.csv'):
             try:
-                # Read CSV content
-                csv_content = file.read().decode('utf-8')
-                
-                # Process CSV
-                result = process_csv_statement(
-                    csv_content=csv_content,
-                    date_column=form.date_column.data,
-                    description_column=form.description_column.data,
-                    amount_column=form.amount_column.data,
-                    has_header=form.has_header.data,
-                    filename=secure_filename(file.filename)
+                # Copied to disk from the upload stream, never decoded in memory
+                job = enqueue_import_job(
+                    user_id=current_user.id,
+                    content=file.stream,
+                    source_file=secure_filename(file.filename),
+                    kind='csv',
+                    options=csv_import_options(form)
                 )
                 
-                if result['success']:
-                    # Save transactions to database
-                    saved_count = 0
-                    for transaction_data in result['transactions']:
-                        transaction = ImportedTransaction(
-                            user_id=current_user.id,
-                            raw_description=transaction_data['description'],
-                            amount=transaction_data['amount'],
-                            transaction_date=transaction_data['date'],
-                            balance=transaction_data.get('balance'),
-                            transaction_type=transaction_data['type'],
-                            import_batch_id=result['batch_id'],
-                            source_file=secure_filename(file.filename),
-                            suggested_category=transaction_data.get('suggested_category'),
-                            suggested_description=transaction_data.get('suggested_description'),
-                            confidence_score=transaction_data.get('confidence_score'),
-                            is_expense=(transaction_data['type'] == 'debit')
-                        )
-                        
-                        db.session.add(transaction)
-                        saved_count += 1
-                    
-                    db.session.commit()
-                    
-                    flash(f'Successfully imported {saved_count} transactions from CSV file.', 'success')
-                    return redirect(url_for('imports.review_batch', batch_id=result['batch_id']))
-                    
+                if job.status == 'completed':
+                    return finished_job_redirect(job, 'CSV file')
+                elif job.status == 'failed':
+                    flash(f'Error processing CSV: {job.error or "Unknown error"}', 'error')
                 else:
-                    flash(f'Error processing CSV: {result.get("error", "Unknown error")}', 'error')
+                    return redirect(url_for('imports.upload_csv', job=job.id))
                     
             except Exception as e:
                 flash(f'Error processing CSV file: {str(e)}', 'error')
         else:
             flash('Please upload a valid CSV file.', 'error')
     
-    return render_template('imports/upload_csv.html', form=form)
-
-def process_csv_statement(csv_content: str, date_column: str, description_column: str, 
-                         amount_column: str, has_header: bool, filename: str) -> dict:
-    """Process CSV bank statement"""
-    import csv
-    import io
-    from datetime import datetime
-    import uuid
-    from app.pdf_processor import BankStatementProcessor
+    # Show progress for a job that is still being processed
+    job = None
+    job_id = request.args.get('job')
+    if job_id:
+        job = ImportJob.query.filter_by(id=job_id, user_id=current_user.id).first()
     
-    try:
-        # Detect if this is a Lloyds Bank CSV based on headers
-        is_lloyds = False
-        first_line = csv_content.split('\n')[0] if csv_content else ''
-        if 'Transaction Date,Transaction Type,Sort Code,Account Number' in first_line:
-            is_lloyds = True
-            print("DEBUG: Detected Lloyds Bank CSV format")
-        
-        transactions = []
-        
-        if is_lloyds:
-            return process_lloyds_csv(csv_content, filename)
-        
-        csv_reader = csv.DictReader(io.StringIO(csv_content)) if has_header else csv.reader(io.StringIO(csv_content))
-        
-        processor = BankStatementProcessor('generic')
-        
-        for row_num, row in enumerate(csv_reader, 1):
-            try:
-                if has_header:
-                    date_str = row.get(date_column, '')
-                    description = row.get(description_column, '')
-                    amount_str = row.get(amount_column, '')
-                else:
-                    # Assume first 3 columns are date, description, amount
-                    if len(row) >= 3:
-                        date_str = row[0]
-                        description = row[1]  
-                        amount_str = row[2]
-                    else:
-                        continue
-                
-                if not date_str or not description or not amount_str:
-                    continue
-                
-                # Parse date
-                transaction_date = processor._parse_date(date_str)
-                if not transaction_date:
-                    continue
-                
-                # Parse amount
-                amount = processor._parse_amount(amount_str)
-                if amount <= 0:
-                    continue
-                
-                # Determine transaction type
-                transaction_type = processor._determine_transaction_type(description, amount)
-                
-                # Auto-categorize
-                category, confidence = processor.categorize_transaction(description)
-                cleaned_desc = processor._clean_description(description)
-                
-                transaction = {
-                    'date': transaction_date,
-                    'description': description.strip(),
-                    'amount': amount,
-                    'type': transaction_type,
-                    'suggested_category': category,
-                    'suggested_description': cleaned_desc,
-                    'confidence_score': confidence
-                }
-                
-                transactions.append(transaction)
-                
-            except Exception as e:
-                print(f"Error processing row {row_num}: {e}")
-                continue
-        
-        batch_id = str(uuid.uuid4())
-        
-        return {
-            'success': True,
-            'batch_id': batch_id,
-            'transactions': transactions,
-            'total_transactions': len(transactions)
-        }
-        
-    except Exception as e:
-        return {
-            'success': False,
-            'error': str(e),
-            'transactions': [],
-            'total_transactions': 0
-        }
+    return render_template('imports/upload_csv.html', form=form, job=job,
+                         chunk_size=current_app.config['IMPORT_UPLOAD_CHUNK_SIZE'])
 
-
-def categorize_lloyds_transaction(description: str, trans_type: str) -> tuple:
-    """Enhanced categorization for Lloyds Bank transactions"""
-    description_lower = description.lower()
-    
-    # Lloyds-specific merchant recognition
-    lloyds_categories = {
-        'food': {
-            'keywords': ['tesco', 'asda', 'sainsbury', 'morrisons', 'aldi', 'lidl', 'waitrose',
-                        'chopstix', 'amazon* rj', 'great indian', 'subway', 'ppoint'],
-            'confidence': 0.9
-        },
-        'transportation': {
-            'keywords': ['flix', 'fuel', 'petrol', 'parking', 'train', 'bus'],
-            'confidence': 0.9
-        },
-        'utilities': {
-            'keywords': ['lebara mobile', 'phone', 'mobile', 'internet', 'gas', 'electric'],
-            'confidence': 0.9
-        },
-        'transfers': {
-            'keywords': ['sneh r', 'shivam dubey', 's dubey', 'sakshi sharma', 'ritika sneh'],
-            'confidence': 0.95
-        },
-        'rent': {
-            'keywords': ['velour homes', 'alliance east lond', 'rent', 'housing'],
-            'confidence': 0.95
-        },
-        'cash': {
-            'keywords': ['lloyds bank cashba', 'atm', 'cash'],
-            'confidence': 0.9
-        },
-        'shopping': {
-            'keywords': ['amazon', 'selecta', 'maryland s', 'mary ley'],
-            'confidence': 0.8
-        }
+def csv_import_options(form) -> dict:
+    """CSV column settings from the import form, stored on the job"""
+    return {
+        'date_column': form.date_column.data,
+        'description_column': form.description_column.data,
+        'amount_column': form.amount_column.data,
+        'has_header': form.has_header.data
     }
-    
-    # Enhanced categorization based on transaction type
-    if trans_type == 'FPI' and any(keyword in description_lower for keyword in ['sneh', 'dubey', 'sharma']):
-        return 'transfers', 0.95
-    elif trans_type == 'FPO' and 'alliance' in description_lower:
-        return 'rent', 0.95
-    elif trans_type == 'CPT':  # Card payments
-        # Check specific merchants
-        for category, data in lloyds_categories.items():
-            if any(keyword in description_lower for keyword in data['keywords']):
-                return category, data['confidence']
-        return 'shopping', 0.7
-    
-    # Standard categorization
-    for category, data in lloyds_categories.items():
-        if any(keyword in description_lower for keyword in data['keywords']):
-            return category, data['confidence']
-    
-    return 'other', 0.3
 
+@imports.route('/uploads', methods=['POST'])
+@login_required
+def start_upload():
+    """API endpoint starting a chunked upload of a large CSV statement"""
+    data = request.get_json(silent=True) or {}
+    filename = secure_filename(data.get('filename') or '')
+    
+    if not filename.lower().endswith('.csv'):
+        return jsonify({'error': 'Only CSV files can be uploaded in chunks.'}), 400
+    
+    job = start_chunked_upload(current_user.id, filename, kind='csv')
+    
+    return jsonify({
+        'id': job.id,
+        'offset': 0,
+        'chunk_size': current_app.config['IMPORT_UPLOAD_CHUNK_SIZE'],
+        'upload_url': url_for('imports.upload_chunk', job_id=job.id),
+        'complete_url': url_for('imports.complete_upload', job_id=job.id)
+    }), 201
 
-def process_lloyds_csv(csv_content: str, filename: str) -> dict:
-    """Process Lloyds Bank CSV format specifically"""
-    import csv
-    import io
-    from datetime import datetime
-    import uuid
-    from app.pdf_processor import BankStatementProcessor
+@imports.route('/uploads/<job_id>', methods=['PUT'])
+@login_required
+def upload_chunk(job_id):
+    """API endpoint appending one chunk (the raw request body) to an upload"""
+    job = ImportJob.query.filter_by(
+        id=job_id,
+        user_id=current_user.id
+    ).first_or_404()
+    
+    offset = request.args.get('offset', type=int)
+    if offset is None:
+        return jsonify({'error': 'The offset of the chunk is required.'}), 400
     
     try:
-        transactions = []
-        processor = BankStatementProcessor('lloyds')
-        
-        csv_reader = csv.DictReader(io.StringIO(csv_content))
-        
-        for row_num, row in enumerate(csv_reader, 1):
-            try:
-                # Lloyds CSV columns:
-                # Transaction Date,Transaction Type,Sort Code,Account Number,Transaction Description,Debit Amount,Credit Amount,Balance
-                date_str = row.get('Transaction Date', '').strip()
-                trans_type = row.get('Transaction Type', '').strip()
-                description = row.get('Transaction Description', '').strip()
-                debit_amount = row.get('Debit Amount', '').strip()
-                credit_amount = row.get('Credit Amount', '').strip()
-                balance_str = row.get('Balance', '').strip()
-                
-                if not date_str or not description:
-                    continue
-                
-                # Parse date (DD/MM/YYYY format)
-                try:
-                    transaction_date = datetime.strptime(date_str, '%d/%m/%Y').date()
-                except ValueError:
-                    print(f"DEBUG: Could not parse date: {date_str}")
-                    continue
-                
-                # Determine amount and transaction type
-                amount = 0.0
-                transaction_direction = 'debit'  # Default
-                
-                if credit_amount and credit_amount.replace('.', '').replace(',', '').isdigit():
-                    amount = processor._parse_amount(credit_amount)
-                    transaction_direction = 'credit'
-                elif debit_amount and debit_amount.replace('.', '').replace(',', '').isdigit():
-                    amount = processor._parse_amount(debit_amount)
-                    transaction_direction = 'debit'
-                
-                if amount <= 0:
-                    continue
-                
-                # Parse balance
-                balance = processor._parse_amount(balance_str) if balance_str else None
-                
-                # Use Lloyds-specific transaction type mapping
-                if trans_type in ['FPI', 'TFR']:
-                    # Faster Payment In or Transfer - typically credit
-                    if transaction_direction == 'debit':
-                        # But if it's in debit column, it's actually outgoing
-                        pass
-                    else:
-                        transaction_direction = 'credit'
-                elif trans_type in ['DEB', 'FPO', 'CPT']:
-                    # Debit, Faster Payment Out, Card Payment - typically debit
-                    transaction_direction = 'debit'
-                
-                # Auto-categorize using enhanced Lloyds-specific logic
-                category, confidence = categorize_lloyds_transaction(description, trans_type)
-                cleaned_desc = processor._clean_description(description)
-                
-                transaction = {
-                    'date': transaction_date,
-                    'description': description,
-                    'amount': amount,
-                    'balance': balance,
-                    'type': transaction_direction,
-                    'lloyds_type': trans_type,
-                    'suggested_category': category,
-                    'suggested_description': cleaned_desc,
-                    'confidence_score': confidence
-                }
-                
-                transactions.append(transaction)
-                print(f"DEBUG: Parsed Lloyds CSV transaction: {date_str} - {description} - {trans_type} - £{amount}")
-                
-            except Exception as e:
-                print(f"Error processing Lloyds CSV row {row_num}: {e}")
-                continue
-        
-        batch_id = str(uuid.uuid4())
-        
-        print(f"DEBUG: Successfully processed {len(transactions)} Lloyds CSV transactions")
-        
-        return {
-            'success': True,
-            'batch_id': batch_id,
-            'transactions': transactions,
-            'total_transactions': len(transactions),
-            'bank_name': 'Lloyds Bank',
-            'format': 'CSV'
-        }
-        
-    except Exception as e:
-        print(f"DEBUG: Error processing Lloyds CSV: {str(e)}")
-        return {
-            'success': False,
-            'error': str(e),
-            'transactions': [],
-            'total_transactions': 0
-        }
+        received = append_upload_chunk(job, offset, request.stream)
+    except UploadOffsetError as e:
+        # Lets the client resume from the last byte stored
+        return jsonify({'error': str(e), 'offset': e.expected_offset}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'id': job.id, 'offset': received})
+
+@imports.route('/uploads/<job_id>/complete', methods=['POST'])
+@login_required
+def complete_upload(job_id):
+    """API endpoint queueing a chunked upload once every chunk has arrived"""
+    job = ImportJob.query.filter_by(
+        id=job_id,
+        user_id=current_user.id
+    ).first_or_404()
+    
+    form = CSVImportForm()
+    try:
+        finish_chunked_upload(job, options=csv_import_options(form))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'id': job.id,
+        'status': job.status,
+        'status_url': url_for('imports.job_status', job_id=job.id),
+        'progress_url': url_for('imports.upload_csv', job=job.id)
+    })
 
 @imports.route('/review/<batch_id>')
 @login_required
@@ -437,7 +252,7 @@ def review_batch(batch_id):
     
     # Calculate summary statistics
     total_transactions = len(transactions)
-    total_amount = sum(t.amount for t in transactions if t.is_expense)
+    total_amount = sum_pounds(t.amount for t in transactions if t.is_expense)
     high_confidence = sum(1 for t in transactions if t.confidence_score and t.confidence_score > 0.8)
     
     summary = {
@@ -536,35 +351,10 @@ def bulk_action(batch_id):
 @login_required
 def create_expenses(batch_id):
     """Create expenses from approved imported transactions"""
-    from app.models import Expense
+    created_count, approved_transactions = create_expenses_from_batch(current_user.id, batch_id)
     
-    approved_transactions = ImportedTransaction.query.filter_by(
-        user_id=current_user.id,
-        import_batch_id=batch_id,
-        is_approved=True,
-        is_processed=False
-    ).all()
-    
-    created_count = 0
-    for transaction in approved_transactions:
-        if transaction.suggested_category != 'ignore' and transaction.is_expense:
-            # Create expense from transaction
-            expense = Expense(
-                user_id=current_user.id,
-                amount=transaction.amount,
-                description=transaction.suggested_description or transaction.raw_description,
-                category=transaction.suggested_category,
-                date=transaction.transaction_date,
-                tags=f"imported,{batch_id[:8]}"  # Add import tags
-            )
-            
-            db.session.add(expense)
-            
-            # Link transaction to created expense
-            transaction.expense_id = expense.id
-            transaction.is_processed = True
-            
-            created_count += 1
+    # Remember approved categories so the next import suggests them directly
+    learn_from_transactions(current_user.id, approved_transactions)
     
     db.session.commit()
     
@@ -674,12 +464,7 @@ def transaction_suggestions(transaction_id):
     ).first_or_404()
     
     # Get similar transactions from user's expense history
-    from app.models import Expense
-    
-    similar_expenses = Expense.query.filter(
-        Expense.user_id == current_user.id,
-        Expense.description.ilike(f'%{transaction.raw_description[:20]}%')
-    ).limit(5).all()
+    similar_expenses = search_expenses([current_user.id], transaction.raw_description[:20], limit=5)
     
     suggestions = {
         'suggested_category': transaction.suggested_category,
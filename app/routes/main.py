@@ -3,8 +3,9 @@
 from flask import Blueprint, render_template, send_from_directory, current_app, redirect, url_for
 from flask_login import login_required, current_user
 
-from app.models import Expense, Budget, Goal
-from app.utils import get_couple_user_ids, calculate_budget_status
+from app.models import Expense, Goal
+from app.utils import get_couple_user_ids, household_budget_status
+from app.spend_rollup import monthly_spend
 from app import db
 from datetime import datetime
 
@@ -33,37 +34,13 @@ def dashboard():
     current_month = datetime.now().month
     current_year = datetime.now().year
     
-    # Calculate total spending this month
-    monthly_expenses = Expense.query.filter(
-        Expense.user_id.in_(user_ids),
-        db.extract('month', Expense.date) == current_month,
-        db.extract('year', Expense.date) == current_year
-    ).all()
+    # Category and total spending this month, from the monthly rollup
+    category_spending = monthly_spend(user_ids, current_year, current_month)
+    monthly_spending = sum(category_spending.values())
     
-    monthly_spending = sum(expense.amount for expense in monthly_expenses)
-    
-    # Calculate category spending for this month
-    category_spending = {}
-    for expense in monthly_expenses:
-        category = expense.category
-        if category in category_spending:
-            category_spending[category] += expense.amount
-        else:
-            category_spending[category] = expense.amount
-    
-    # Get budget status
-    budget_status = {}
-    for user_id in user_ids:
-        user_budget_status = calculate_budget_status(user_id, current_month, current_year)
-        for category, status in user_budget_status.items():
-            if category in budget_status:
-                # Combine with existing data
-                budget_status[category]['spent'] += status['spent']
-                budget_status[category]['budgeted'] += status['budgeted']
-                budget_status[category]['remaining'] = budget_status[category]['budgeted'] - budget_status[category]['spent']
-                budget_status[category]['percentage'] = (budget_status[category]['spent'] / budget_status[category]['budgeted']) * 100 if budget_status[category]['budgeted'] > 0 else 0
-            else:
-                budget_status[category] = status
+    # Get budget status (budgets of both partners combined per category)
+    budget_status = household_budget_status(user_ids, [(current_year, current_month)]).get(
+        (current_year, current_month), {})
     
     # Get active goals
     goals = Goal.query.filter(
@@ -72,13 +49,7 @@ def dashboard():
     ).order_by(Goal.target_date.asc()).limit(3).all()
     
     # Calculate total budgets for this month
-    monthly_budgets = Budget.query.filter(
-        Budget.user_id.in_(user_ids),
-        Budget.month == current_month,
-        Budget.year == current_year
-    ).all()
-    
-    total_budget = sum(budget.amount for budget in monthly_budgets)
+    total_budget = sum(status['budgeted'] for status in budget_status.values())
     
     return render_template('dashboard.html',
                          recent_expenses=recent_expenses,
@@ -19,14 +19,9 @@ def profile():
     profile_form = ProfileUpdateForm()
     picture_form = ProfilePictureForm()
     password_form = ChangePasswordForm()
-    partner = None
     
     # Get current partner if exists
-    if current_user.partner_id:
-        partner = User.query.get(current_user.partner_id)
-    else:
-        # Check if someone has this user as their partner
-        partner = User.query.filter_by(partner_id=current_user.id).first()
+    partner = current_user.get_partner()
     
     # Handle partner linking (legacy)
     if partner_form.validate_on_submit() and 'partner_submit' in request.form:
@@ -116,6 +111,9 @@ def profile():
 @login_required
 def unlink_partner():
     """Unlink from partner"""
+    partner = current_user.get_partner()
+    if partner and partner.partner_id == current_user.id:
+        partner.partner_id = None
     current_user.partner_id = None
     db.session.commit()
     flash('Partner unlinked successfully!', 'success')
@@ -165,7 +163,7 @@ def send_partner_request(user_id):
         flash('You cannot send a partner request to yourself!')
         return redirect(url_for('profile.search_partners'))
     
-    if current_user.partner_id or User.query.filter_by(partner_id=current_user.id).first():
+    if current_user.partner_id or len(current_user.couple_user_ids) > 1:
         flash('You already have a partner!')
         return redirect(url_for('profile.search_partners'))
     
@@ -219,7 +217,7 @@ def respond_partner_request(request_id, action):
         return redirect(url_for('profile.search_partners'))
     
     if action == 'accept':
-        if current_user.partner_id or User.query.filter_by(partner_id=current_user.id).first():
+        if current_user.partner_id or len(current_user.couple_user_ids) > 1:
             flash('You already have a partner!')
             partner_request.status = 'rejected'
         else:
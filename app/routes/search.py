@@ -0,0 +1,48 @@
+"""Search routes"""
+
+from flask import Blueprint, request, url_for, jsonify
+from flask_login import login_required, current_user
+
+from app.search import SEARCH_LIMIT, search_expenses, search_transactions
+from app.utils import get_couple_user_ids
+
+search_bp = Blueprint('search', __name__)
+
+SEARCH_SCOPES = ('all', 'expenses', 'transactions')
+
+@search_bp.route('/')
+@login_required
+def search():
+    """Full-text search over the couple's expenses and the user's imported transactions, as JSON"""
+    query = request.args.get('q', '')
+    scope = request.args.get('scope', 'all')
+    if scope not in SEARCH_SCOPES:
+        scope = 'all'
+    limit = max(1, min(request.args.get('limit', SEARCH_LIMIT, type=int), 100))
+    
+    results = {'query': query, 'expenses': [], 'transactions': []}
+    
+    if scope in ('all', 'expenses'):
+        results['expenses'] = [{
+            'id': expense.id,
+            'user_id': expense.user_id,
+            'date': expense.date.isoformat(),
+            'description': expense.description,
+            'category': expense.category,
+            'amount': expense.amount,
+            'tags': expense.tags,
+            'url': url_for('expenses.edit_expense', expense_id=expense.id) if expense.user_id == current_user.id else None
+        } for expense in search_expenses(get_couple_user_ids(current_user.id), query, limit)]
+    
+    if scope in ('all', 'transactions'):
+        results['transactions'] = [{
+            'id': transaction.id,
+            'date': transaction.transaction_date.isoformat(),
+            'description': transaction.raw_description,
+            'amount': transaction.amount,
+            'notes': transaction.user_notes,
+            'is_processed': transaction.is_processed,
+            'url': url_for('imports.review_batch', batch_id=transaction.import_batch_id)
+        } for transaction in search_transactions(current_user.id, query, limit)]
+    
+    return jsonify(results)
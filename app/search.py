@@ -0,0 +1,222 @@
+"""Full-text search over expenses and imported transactions
+
+Expense descriptions and tags, and imported transactions' raw descriptions
+and notes, are indexed by the database itself:
+
+* SQLite: an FTS5 table per model (expense_fts, imported_transaction_fts)
+  reading its text from the model's table, indexed in the transaction that
+  writes the rows. Updates and deletes are kept in sync by triggers. New
+  rows are indexed by an ORM after_insert hook, or, for the bulk inserts of
+  app.import_jobs, a chunk at a time by index_rows: a trigger per row
+  halved the import's insert throughput.
+* MySQL: an InnoDB FULLTEXT index over the same columns, which InnoDB
+  maintains on write.
+
+Both are created alongside the tables (db.create_all) and by
+migrate_fulltext_search.py for existing databases; ``flask
+rebuild-search-index`` re-indexes everything on SQLite. Other databases fall
+back to LIKE, which scans.
+
+Every word of a query must be in the text, the last one (of two letters or
+more) as the start of a word since it may still be being typed ("tesco sto"
+finds "TESCO STORES"). Matching the earlier words whole lets the index seek
+through their rows instead of merging those of every word they begin.
+Results come best match first: bm25 on SQLite, MATCH ... AGAINST relevance
+on MySQL.
+"""
+
+import re
+from typing import Iterable, List
+
+import click
+from sqlalchemy import and_, column, event, func, insert, literal_column, or_, select, table, text
+from sqlalchemy.dialects import mysql
+
+from app import db
+from app.models import Expense, ImportedTransaction
+
+SEARCH_LIMIT = 20
+DESCRIPTION_WEIGHT = 4.0
+MIN_PREFIX_LENGTH = 2  # a shorter last word would match most of the vocabulary
+
+# Model -> indexed columns; on SQLite matches in the first count DESCRIPTION_WEIGHT times as much
+SEARCH_COLUMNS = {
+    Expense: ('description', 'tags'),
+    ImportedTransaction: ('raw_description', 'user_notes'),
+}
+
+_WORD = re.compile(r'[^\W_]+')
+
+
+def search_words(query: str) -> List[str]:
+    """The words of a search query, as the indexes split text into words"""
+    return _WORD.findall((query or '').lower())
+
+
+def _fts_table(model) -> str:
+    return f'{model.__tablename__}_fts'
+
+
+def _fulltext_index(model) -> str:
+    return f'ft_{model.__tablename__}_text'
+
+
+def _indexed_columns(model) -> tuple:
+    # user_id is indexed too, so a search intersects the user's short list of rows with
+    # the word's rather than ranking every user's matches and filtering them afterwards
+    return (*SEARCH_COLUMNS[model], 'user_id')
+
+
+def search_index_ddl(model, dialect: str) -> List[str]:
+    """Statements creating the search index of a model's table on a dialect (none where unsupported)"""
+    name, columns = model.__tablename__, SEARCH_COLUMNS[model]
+    if dialect in ('mysql', 'mariadb'):
+        return [f'CREATE FULLTEXT INDEX {_fulltext_index(model)} ON {name} ({", ".join(columns)})']
+    if dialect != 'sqlite':
+        return []
+
+    fts = _fts_table(model)
+    indexed = _indexed_columns(model)
+    names = ', '.join(indexed)
+    new = ', '.join(f'new.{c}' for c in indexed)
+    old = ', '.join(f'old.{c}' for c in indexed)
+    # External content: the text lives once, in the model's table; prefix indexes
+    # keep two and three letter prefix queries from walking the whole vocabulary.
+    # Inserts are indexed by the application (index_rows), so an insert trigger
+    # left by an earlier version is dropped.
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, content='{name}', content_rowid='id', prefix='2 3')",
+        f'DROP TRIGGER IF EXISTS {fts}_insert',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {name} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); END",
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {names} ON {name} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); "
+        f'INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END',
+    ]
+
+
+def _fts(model):
+    return table(_fts_table(model), column('rowid'), *(column(name) for name in _indexed_columns(model)))
+
+
+def _has_fts(connection, model) -> bool:
+    """Whether the model's FTS5 table exists, e.g. not before migrate_fulltext_search.py has run"""
+    return connection.dialect.name == 'sqlite' and connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (_fts_table(model),)
+    ).first() is not None
+
+
+def index_rows(model, *criteria) -> None:
+    """
+    Index the rows of a model matching criteria in one INSERT ... SELECT; the caller commits
+
+    For rows inserted without the ORM. criteria must pick out only the new
+    rows: a row indexed twice is found twice. Does nothing where the
+    database maintains its own index.
+    """
+    if not _has_fts(db.session.connection(), model):
+        return
+    names = _indexed_columns(model)
+    db.session.execute(insert(_fts(model)).from_select(
+        ['rowid', *names],
+        select(model.id, *(getattr(model, name) for name in names)).where(*criteria)
+    ))
+
+
+def _index_inserted_row(model):
+    def index(mapper, connection, target):
+        if _has_fts(connection, model):
+            connection.execute(insert(_fts(model)).values(
+                rowid=target.id, **{name: getattr(target, name) for name in _indexed_columns(model)}))
+    return index
+
+
+def _create_search_index(model):
+    def create(target, connection, **kw):
+        for statement in search_index_ddl(model, connection.dialect.name):
+            connection.exec_driver_sql(statement)
+    return create
+
+
+def _drop_search_index(model):
+    def drop(target, connection, **kw):
+        # The triggers and MySQL's index go with the table; the FTS5 table doesn't
+        if connection.dialect.name == 'sqlite':
+            connection.exec_driver_sql(f'DROP TABLE IF EXISTS {_fts_table(model)}')
+    return drop
+
+
+_listeners = {model: (_create_search_index(model), _drop_search_index(model), _index_inserted_row(model))
+              for model in SEARCH_COLUMNS}
+
+
+def rebuild_search_index() -> None:
+    """Re-index every row from the tables' current text (SQLite; MySQL maintains its own); the caller commits"""
+    if db.engine.dialect.name != 'sqlite':
+        return
+    for model in SEARCH_COLUMNS:
+        fts = _fts_table(model)
+        db.session.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def _search(model, user_ids: List[int], query: str, limit: int) -> list:
+    """Some users' rows of a model matching the query, best match first"""
+    words = search_words(query)
+    if not words or not user_ids:
+        return []
+
+    columns = [getattr(model, name) for name in SEARCH_COLUMNS[model]]
+    results = model.query.filter(model.user_id.in_(user_ids))
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        fts_name = _fts_table(model)
+        fts = table(fts_name, column('rowid'), column(fts_name))
+        # Quoted so words like AND, OR, NOT and NEAR aren't read as operators
+        users = ' OR '.join(f'user_id:"{int(user_id)}"' for user_id in user_ids)
+        terms = [f'"{word}"' for word in words]
+        if len(words[-1]) >= MIN_PREFIX_LENGTH:
+            terms[-1] += '*'
+        match = f'({users}) AND ' + ' AND '.join(terms)
+        weights = [DESCRIPTION_WEIGHT] + [1.0] * (len(columns) - 1) + [0.0]  # user_id doesn't rank
+        results = (results.join(fts, fts.c.rowid == model.id)
+                   .filter(fts.c[fts_name].match(match))
+                   .order_by(func.bm25(literal_column(fts_name), *weights)))
+    elif dialect in ('mysql', 'mariadb'):
+        against = ' '.join(f'+{word}' for word in words)
+        if len(words[-1]) >= MIN_PREFIX_LENGTH:
+            against += '*'
+        relevance = mysql.match(*columns, against=against).in_boolean_mode()
+        results = results.filter(relevance).order_by(relevance.desc())
+    else:
+        results = results.filter(and_(*(
+            or_(*(searched.ilike(f'%{word}%') for searched in columns)) for word in words
+        ))).order_by(model.id.desc())
+    return results.limit(limit).all()
+
+
+def search_expenses(user_ids: Iterable[int], query: str, limit: int = SEARCH_LIMIT) -> List[Expense]:
+    """Some users' expenses whose description or tags match the query, best match first"""
+    return _search(Expense, list(user_ids), query, limit)
+
+
+def search_transactions(user_id: int, query: str, limit: int = SEARCH_LIMIT) -> List[ImportedTransaction]:
+    """A user's imported transactions whose description or notes match the query, best match first"""
+    return _search(ImportedTransaction, [user_id], query, limit)
+
+
+def init_search(app):
+    """Create search indexes with their tables, index rows the ORM inserts and register the rebuild CLI command"""
+    for model, (create, drop, index) in _listeners.items():
+        if not event.contains(model.__table__, 'after_create', create):
+            event.listen(model.__table__, 'after_create', create)
+        if not event.contains(model.__table__, 'before_drop', drop):
+            event.listen(model.__table__, 'before_drop', drop)
+        if not event.contains(model, 'after_insert', index):
+            event.listen(model, 'after_insert', index)
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Re-index expenses and imported transactions for full-text search"""
+        rebuild_search_index()
+        db.session.commit()
+        click.echo('Rebuilt the search index')
@@ -0,0 +1,211 @@
+"""Monthly spend rollup
+
+MonthlySpend holds one row per (user, year, month, category) with the total
+and number of that user's expenses, so the dashboard and budget pages read a
+few dozen rows instead of loading every expense of the month.
+
+The rollup is kept current incrementally:
+
+* Expenses written through the ORM (adding, editing or deleting one) are
+  picked up by mapper events, which apply the change inside the same flush.
+* Bulk inserts that bypass the ORM, such as create_expenses_from_batch,
+  call add_expense_rows with the rows they inserted.
+
+``flask rebuild-monthly-spend`` (or rebuild_monthly_spend) recomputes the
+table from the expenses themselves, e.g. after editing data by hand.
+
+Every change to a user's rollup also bumps their SpendVersion, which caches
+of figures derived from expenses (app.analytics_charts) compare against.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import click
+from sqlalchemy import delete, event, func, insert, inspect, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from app import db
+from app.models import Expense, MonthlySpend, SpendVersion
+from app.money import Money, to_pence
+
+SpendKey = Tuple[int, int, int, str]  # user_id, year, month, category
+SPEND_KEY_COLUMNS = ('user_id', 'year', 'month', 'category')
+
+
+def _spend_key(user_id: int, when, category: str) -> SpendKey:
+    return user_id, when.year, when.month, category
+
+
+def _upsert_adding(connection, table, key_columns: Tuple[str, ...], rows: List[Dict],
+                   added: Tuple[str, ...]) -> None:
+    """
+    Insert rows, adding the added columns onto rows whose key already exists
+
+    Uses the database's upsert where SQLAlchemy has one (SQLite, PostgreSQL,
+    MySQL) so concurrent writers can't both insert the same key.
+    """
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        statement = (sqlite if dialect == 'sqlite' else postgresql).insert(table)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={column: table.c[column] + statement.excluded[column] for column in added}
+        ), rows)
+    elif dialect in ('mysql', 'mariadb'):
+        statement = mysql.insert(table)
+        connection.execute(statement.on_duplicate_key_update(
+            {column: table.c[column] + statement.inserted[column] for column in added}
+        ), rows)
+    else:
+        for row in rows:
+            result = connection.execute(
+                update(table)
+                .where(*(table.c[column] == row[column] for column in key_columns))
+                .values({column: table.c[column] + row[column] for column in added})
+            )
+            if result.rowcount == 0:
+                connection.execute(insert(table), [row])
+
+
+def bump_spend_versions(connection, user_ids: Iterable[int]) -> None:
+    """Mark the users' expense totals as changed (see spend_versions)"""
+    rows = [{'user_id': user_id, 'version': 1} for user_id in sorted(set(user_ids))]
+    if rows:
+        _upsert_adding(connection, SpendVersion.__table__, ('user_id',), rows, ('version',))
+
+
+def spend_versions(user_ids: Iterable[int]) -> Tuple[int, ...]:
+    """
+    Current versions of some users' expense totals, in user id order
+
+    A version changes whenever the user's rollup does, so anything derived
+    from their expense totals can be cached until the versions move on.
+    """
+    user_ids = sorted(set(user_ids))
+    versions = dict(db.session.execute(
+        select(SpendVersion.user_id, SpendVersion.version).where(SpendVersion.user_id.in_(user_ids))
+    ).all())
+    return tuple(versions.get(user_id, 0) for user_id in user_ids)
+
+
+def apply_spend_deltas(connection, deltas: Dict[SpendKey, List]) -> None:
+    """Add [amount (pounds, or Money in pence), count] to the rollup row of each key, creating missing rows"""
+    deltas = {key: delta for key, delta in deltas.items() if delta[0] or delta[1]}
+    if not deltas:
+        return
+
+    rows = [dict(zip(SPEND_KEY_COLUMNS, key), total=amount, expense_count=count)
+            for key, (amount, count) in deltas.items()]
+    _upsert_adding(connection, MonthlySpend.__table__, SPEND_KEY_COLUMNS, rows, ('total', 'expense_count'))
+    bump_spend_versions(connection, (key[0] for key in deltas))
+
+
+def add_expense_rows(rows: Iterable[Dict]) -> None:
+    """Count expense rows inserted without the ORM (dicts of Expense columns)"""
+    deltas = defaultdict(lambda: [Money(0), 0])
+    for row in rows:
+        delta = deltas[_spend_key(row['user_id'], row['date'], row['category'])]
+        delta[0] = Money(delta[0] + to_pence(row['amount']))
+        delta[1] += 1
+    apply_spend_deltas(db.session.connection(), deltas)
+
+
+def _old_value(state, attribute: str):
+    history = state.attrs[attribute].history
+    return history.deleted[0] if history.deleted else getattr(state.object, attribute)
+
+
+def _keep_old_value(expense, value, oldvalue, initiator):
+    pass
+
+
+def _expense_inserted(mapper, connection, expense):
+    apply_spend_deltas(connection, {
+        _spend_key(expense.user_id, expense.date, expense.category): [Money.from_pounds(expense.amount), 1]
+    })
+
+
+def _expense_updated(mapper, connection, expense):
+    state = inspect(expense)
+    old_key = _spend_key(_old_value(state, 'user_id'), _old_value(state, 'date'),
+                         _old_value(state, 'category'))
+    old_amount = to_pence(_old_value(state, 'amount'))
+    new_amount = to_pence(expense.amount)
+    new_key = _spend_key(expense.user_id, expense.date, expense.category)
+
+    if old_key == new_key:
+        apply_spend_deltas(connection, {new_key: [Money(new_amount - old_amount), 0]})
+        if _old_value(state, 'date') != expense.date:
+            # Same month, but date ranges within it may now include it or not
+            bump_spend_versions(connection, [expense.user_id])
+    else:
+        apply_spend_deltas(connection, {old_key: [Money(-old_amount), -1], new_key: [Money(new_amount), 1]})
+
+
+def _expense_deleted(mapper, connection, expense):
+    # before_delete, so an expired expense can still load its columns
+    apply_spend_deltas(connection, {
+        _spend_key(expense.user_id, expense.date, expense.category): [Money(-to_pence(expense.amount)), -1]
+    })
+
+
+def rebuild_monthly_spend(user_ids: Optional[List[int]] = None) -> int:
+    """Recompute the rollup from the expenses of some (default: all) users; the caller commits"""
+    table = MonthlySpend.__table__
+    year = func.extract('year', Expense.date)
+    month = func.extract('month', Expense.date)
+
+    clear = delete(table)
+    totals = select(Expense.user_id, year, month, Expense.category,
+                    func.sum(Expense.amount), func.count(Expense.id))
+    previous = select(table.c.user_id).distinct()
+    if user_ids is not None:
+        clear = clear.where(table.c.user_id.in_(user_ids))
+        totals = totals.where(Expense.user_id.in_(user_ids))
+        previous = previous.where(table.c.user_id.in_(user_ids))
+
+    changed = set(db.session.execute(previous).scalars())
+    db.session.execute(clear)
+    rows = [dict(zip(SPEND_KEY_COLUMNS, (user_id, int(y), int(m), category)),
+                 total=total, expense_count=count)
+            for user_id, y, m, category, total, count in db.session.execute(
+                totals.group_by(Expense.user_id, year, month, Expense.category))]
+    if rows:
+        db.session.execute(insert(table), rows)
+    bump_spend_versions(db.session.connection(), changed | {row['user_id'] for row in rows})
+    return len(rows)
+
+
+def monthly_spend(user_ids: Iterable[int], year: int, month: int) -> Dict[str, float]:
+    """Spending per category for some users in a month, from the rollup"""
+    return dict(db.session.execute(
+        select(MonthlySpend.category, func.sum(MonthlySpend.total))
+        .where(MonthlySpend.user_id.in_(list(user_ids)),
+               MonthlySpend.year == year,
+               MonthlySpend.month == month,
+               MonthlySpend.expense_count > 0)
+        .group_by(MonthlySpend.category)
+    ).all())
+
+
+def init_spend_rollup(app):
+    """Keep the rollup current on ORM writes and register the rebuild CLI command"""
+    for identifier, listener in (('after_insert', _expense_inserted),
+                                 ('after_update', _expense_updated),
+                                 ('before_delete', _expense_deleted)):
+        if not event.contains(Expense, identifier, listener):
+            event.listen(Expense, identifier, listener)
+
+    # Load a committed (expired) value before it is overwritten, so
+    # _expense_updated can see what the expense used to count towards
+    for attribute in ('user_id', 'date', 'category', 'amount'):
+        if not event.contains(getattr(Expense, attribute), 'set', _keep_old_value):
+            event.listen(getattr(Expense, attribute), 'set', _keep_old_value, active_history=True)
+
+    @app.cli.command('rebuild-monthly-spend')
+    def rebuild_monthly_spend_command():
+        """Recompute the monthly spend rollup from all expenses"""
+        count = rebuild_monthly_spend()
+        db.session.commit()
+        click.echo(f'Rebuilt {count} monthly spend rows')
@@ -5,7 +5,9 @@ import uuid
 from datetime import datetime, timedelta
 from collections import defaultdict
 from flask import current_app
-from app.models import User, Expense, Budget
+from sqlalchemy import func, tuple_
+from app.models import User, Expense, Budget, MonthlySpend
+from app.households import household_user_ids
 from app import db
 
 def get_expense_categories():
@@ -26,45 +28,108 @@ def get_expense_categories():
         'other': ['miscellaneous']
     }
 
+def household_expense_categories(user_ids):
+    """
+    The default expense categories followed by any others the users have used
+
+    Grouped by (user_id, category) so the database reads the distinct values
+    straight off ix_expense_user_category_date_id without sorting.
+    """
+    categories = list(get_expense_categories())
+    used = db.session.query(Expense.category).filter(
+        Expense.user_id.in_(user_ids)
+    ).group_by(Expense.user_id, Expense.category)
+    return categories + sorted({category for (category,) in used} - set(categories))
+
 def get_couple_user_ids(user_id):
-    """Get user IDs for both partners in a couple"""
-    user = User.query.get(user_id)
-    user_ids = [user_id]
+    """Get user IDs for both partners in a couple (the user's own first)"""
+    return household_user_ids(user_id)
+
+def _budget_status(budgeted, spent, alert_threshold):
+    percentage = (spent / budgeted) * 100 if budgeted > 0 else 0
+    return {
+        'budgeted': budgeted,
+        'spent': spent,
+        'remaining': budgeted - spent,
+        'percentage': percentage,
+        'status': 'over' if percentage > 100 else 'warning' if percentage > alert_threshold else 'good'
+    }
+
+def household_budget_status(user_ids, months):
+    """
+    Budget status per category for some users over some (year, month) pairs
+
+    Returns {(year, month): {category: status}}. Partners' budgets for the
+    same category are added together, each against its owner's spending;
+    the lowest alert threshold applies. Budgets are joined to the monthly
+    spend rollup and grouped in one query, however many expenses there are.
+    """
+    months = list(months)
+    if not months:
+        return {}
     
-    if user.partner_id:
-        user_ids.append(user.partner_id)
+    # One row per user, month and category first: joined directly, a user's spending
+    # would be counted once for each of their budget rows in the category
+    budgets = db.session.query(
+        Budget.user_id, Budget.year, Budget.month, Budget.category,
+        func.sum(Budget.amount).label('amount'),
+        func.min(Budget.alert_threshold).label('alert_threshold')
+    ).filter(
+        Budget.user_id.in_(user_ids),
+        tuple_(Budget.year, Budget.month).in_(months)
+    ).group_by(Budget.user_id, Budget.year, Budget.month, Budget.category).subquery()
     
-    # Also check if someone has this user as their partner
-    partner = User.query.filter_by(partner_id=user_id).first()
-    if partner and partner.id not in user_ids:
-        user_ids.append(partner.id)
+    spent = func.coalesce(func.sum(MonthlySpend.total), 0.0)
+    rows = db.session.query(
+        budgets.c.year, budgets.c.month, budgets.c.category,
+        func.sum(budgets.c.amount), spent, func.min(budgets.c.alert_threshold)
+    ).outerjoin(MonthlySpend, db.and_(
+        MonthlySpend.user_id == budgets.c.user_id,
+        MonthlySpend.year == budgets.c.year,
+        MonthlySpend.month == budgets.c.month,
+        MonthlySpend.category == budgets.c.category,
+        MonthlySpend.expense_count > 0
+    )).group_by(budgets.c.year, budgets.c.month, budgets.c.category)
     
-    return user_ids
+    status = {}
+    for year, month, category, budgeted, total_spent, alert_threshold in rows:
+        status.setdefault((year, month), {})[category] = _budget_status(
+            budgeted, total_spent, alert_threshold if alert_threshold is not None else 80.0)
+    return status
 
 def calculate_budget_status(user_id, month, year):
     """Calculate budget status for a user in a specific month/year"""
-    budgets = Budget.query.filter_by(user_id=user_id, month=month, year=year).all()
-    expenses = Expense.query.filter(
-        Expense.user_id == user_id,
-        db.extract('month', Expense.date) == month,
-        db.extract('year', Expense.date) == year
-    ).all()
-    
-    status = {}
-    for budget in budgets:
-        category_expenses = [e for e in expenses if e.category == budget.category]
-        total_spent = sum(e.amount for e in category_expenses)
-        percentage = (total_spent / budget.amount) * 100 if budget.amount > 0 else 0
-        
-        status[budget.category] = {
-            'budgeted': budget.amount,
-            'spent': total_spent,
-            'remaining': budget.amount - total_spent,
-            'percentage': percentage,
-            'status': 'over' if percentage > 100 else 'warning' if percentage > budget.alert_threshold else 'good'
-        }
-    
-    return status
+    return household_budget_status([user_id], [(year, month)]).get((year, month), {})
+
+def spending_summary(user_ids, start, end):
+    """
+    Spending between two dates (inclusive), aggregated in the database
+
+    Returns ({category: (total, count)}, {'YYYY-MM': total}); only the grouped
+    rows leave the database, however many expenses there are.
+    """
+    in_range = (Expense.user_id.in_(user_ids), Expense.date >= start, Expense.date <= end)
+
+    by_category = {}
+    for category, total, count in db.session.query(
+        Expense.category, func.sum(Expense.amount), func.count(Expense.id)
+    ).filter(*in_range).group_by(Expense.category):
+        # Categories differing only in case are shown as one
+        previous_total, previous_count = by_category.get(category.title(), (0, 0))
+        by_category[category.title()] = (previous_total + total, previous_count + count)
+
+    year = func.extract('year', Expense.date)
+    month = func.extract('month', Expense.date)
+    by_month = {
+        f'{int(y):04d}-{int(m):02d}': total
+        for y, m, total in db.session.query(year, month, func.sum(Expense.amount))
+        .filter(*in_range).group_by(year, month)
+    }
+    return by_category, by_month
+
+def first_expense_date(user_ids):
+    """Date of the earliest expense of any of the users, or None if they have none"""
+    return db.session.query(func.min(Expense.date)).filter(Expense.user_id.in_(user_ids)).scalar()
 
 def allowed_file(filename):
     """Check if file has an allowed extension"""
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark saving imported transactions
+
+Compares the original one-ORM-object-per-row loop with the chunked bulk
+insert in save_imported_transactions and reports rows/sec for each size. The
+ORM loop is skipped above --orm-limit rows since it only gets slower.
+
+Usage:
+    python benchmarks/bench_bulk_insert.py [--sizes 10000 100000 1000000]
+                                           [--chunk-size 500] [--database-url sqlite:///bench.db]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import config
+from app import create_app, db
+from app.models import User, ImportedTransaction
+from app.import_jobs import save_imported_transactions
+
+MERCHANTS = ['TESCO STORES', 'AMAZON MARKETPLACE', 'TFL TRAVEL CH', 'NETFLIX.COM',
+             'SHELL PETROL', 'COUNCIL TAX DD', 'SALARY ACME LTD', 'PRET A MANGER']
+
+
+def generate_transactions(count, seed=42):
+    """Yield count parsed-transaction dicts without holding them all in memory"""
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    for i in range(count):
+        merchant = rng.choice(MERCHANTS)
+        yield {
+            'date': start + timedelta(days=i % 2000),
+            'description': f'{merchant} {rng.randrange(10000)}',
+            'amount': round(rng.uniform(1, 500), 2),
+            'balance': None,
+            'type': 'credit' if merchant.startswith('SALARY') else 'debit',
+            'suggested_category': 'other',
+            'suggested_description': merchant.title(),
+            'confidence_score': 0.3
+        }
+
+
+def orm_insert(user_id, transactions, batch_id):
+    """The original per-row ORM path, for comparison"""
+    for transaction_data in transactions:
+        db.session.add(ImportedTransaction(
+            user_id=user_id,
+            raw_description=transaction_data['description'],
+            amount=transaction_data['amount'],
+            transaction_date=transaction_data['date'],
+            balance=transaction_data.get('balance'),
+            transaction_type=transaction_data['type'],
+            import_batch_id=batch_id,
+            source_file='bench.csv',
+            suggested_category=transaction_data.get('suggested_category'),
+            suggested_description=transaction_data.get('suggested_description'),
+            confidence_score=transaction_data.get('confidence_score'),
+            is_expense=(transaction_data['type'] == 'debit')
+        ))
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    db.session.commit()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--orm-limit', type=int, default=100_000)
+    parser.add_argument('--database-url', default='sqlite:///:memory:')
+    args = parser.parse_args()
+
+    config['testing'].SQLALCHEMY_DATABASE_URI = args.database_url
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+        print(f"{'rows':>10} {'orm rows/s':>14} {'bulk rows/s':>14}")
+        for size in args.sizes:
+            orm_rate = None
+            if size <= args.orm_limit:
+                elapsed = timed(lambda: orm_insert(user_id, generate_transactions(size), str(uuid.uuid4())))
+                orm_rate = size / elapsed
+                db.session.expunge_all()
+
+            batch_id = str(uuid.uuid4())
+            elapsed = timed(lambda: save_imported_transactions(
+                user_id, generate_transactions(size), batch_id, 'bench.csv', args.chunk_size))
+            assert ImportedTransaction.query.filter_by(import_batch_id=batch_id).count() == size
+            bulk_rate = size / elapsed
+
+            orm_column = f'{orm_rate:>14,.0f}' if orm_rate else f"{'skipped':>14}"
+            print(f'{size:>10,} {orm_column} {bulk_rate:>14,.0f}')
+
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
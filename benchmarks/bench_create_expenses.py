@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark turning an approved import batch into expenses
+
+Imports --rows approved transactions, runs create_expenses_from_batch in one
+transaction and checks every transaction ends up linked to its expense. With
+--legacy the original one-Expense-object-per-row loop is timed as well.
+
+Usage:
+    python benchmarks/bench_create_expenses.py [--rows 50000] [--legacy] [--database-url sqlite:///bench.db]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import config
+from app import create_app, db
+from app.models import User, Expense, ImportedTransaction
+from app.import_jobs import save_imported_transactions, create_expenses_from_batch
+from bench_bulk_insert import generate_transactions
+
+
+def legacy_create_expenses(user_id, batch_id):
+    """The original per-row ORM conversion, for comparison"""
+    created_count = 0
+    for transaction in ImportedTransaction.query.filter_by(user_id=user_id, import_batch_id=batch_id,
+                                                          is_approved=True, is_processed=False):
+        if transaction.suggested_category != 'ignore' and transaction.is_expense:
+            expense = Expense(user_id=user_id, amount=transaction.amount,
+                              description=transaction.suggested_description or transaction.raw_description,
+                              category=transaction.suggested_category, date=transaction.transaction_date,
+                              tags=f"imported,{batch_id[:8]}")
+            db.session.add(expense)
+            transaction.expense_id = expense.id
+            transaction.is_processed = True
+            created_count += 1
+    return created_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--legacy', action='store_true')
+    parser.add_argument('--database-url', default='sqlite:///:memory:')
+    args = parser.parse_args()
+
+    config['testing'].SQLALCHEMY_DATABASE_URI = args.database_url
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+        if args.legacy:
+            save_imported_transactions(user_id, generate_transactions(args.rows), 'legacy-batch', 'bench.csv')
+            ImportedTransaction.query.update({'is_approved': True, 'is_reviewed': True})
+            db.session.commit()
+
+            start = time.perf_counter()
+            created = legacy_create_expenses(user_id, 'legacy-batch')
+            db.session.commit()
+            elapsed = time.perf_counter() - start
+            print(f'legacy: {created:,} expenses created in {elapsed:.3f}s ({created / elapsed:,.0f} rows/s)')
+
+            db.session.expunge_all()
+            ImportedTransaction.query.delete()
+            Expense.query.delete()
+            db.session.commit()
+
+        save_imported_transactions(user_id, generate_transactions(args.rows), 'bench-batch', 'bench.csv')
+        ImportedTransaction.query.update({'is_approved': True, 'is_reviewed': True})
+        db.session.commit()
+
+        start = time.perf_counter()
+        created, _ = create_expenses_from_batch(user_id, 'bench-batch')
+        db.session.commit()
+        elapsed = time.perf_counter() - start
+
+        unlinked = ImportedTransaction.query.filter(
+            ImportedTransaction.is_expense == True,
+            ImportedTransaction.expense_id == None
+        ).count()
+        assert unlinked == 0, f'{unlinked} transactions were not linked to an expense'
+        assert Expense.query.count() == created
+
+        print(f'{created:,} expenses created in {elapsed:.3f}s ({created / elapsed:,.0f} rows/s)')
+
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
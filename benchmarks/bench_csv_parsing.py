@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark row-wise and columnar CSV statement parsing
+
+Generates synthetic Lloyds and generic CSV exports, checks that both parse
+modes of stream_csv_statement produce the same transactions, and reports
+rows/sec for each.
+
+Usage:
+    python benchmarks/bench_csv_parsing.py [--sizes 10000 100000 500000] [--unique 2000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.csv_processor import LLOYDS_CSV_HEADER, stream_csv_statement
+
+MERCHANTS = ['TESCO STORES', 'AMAZON MARKETPLACE', 'TFL TRAVEL CH', 'NETFLIX.COM',
+             'SHELL PETROL', 'COUNCIL TAX DD', 'SALARY ACME LTD', 'PRET A MANGER']
+
+
+def generate_csv(kind, count, unique, seed=42):
+    """Build a CSV export of count rows drawing on unique distinct descriptions"""
+    rng = random.Random(seed)
+    descriptions = [f'{rng.choice(MERCHANTS)} {rng.randrange(10000)}' for _ in range(unique)]
+    start = date(2020, 1, 1)
+    out = io.StringIO()
+    if kind == 'lloyds':
+        out.write(LLOYDS_CSV_HEADER + ',Transaction Description,Debit Amount,Credit Amount,Balance\n')
+    else:
+        out.write('Date,Description,Amount\n')
+
+    for i in range(count):
+        day = (start + timedelta(days=i // 50)).strftime('%d/%m/%Y')
+        description = rng.choice(descriptions)
+        amount = f'{rng.uniform(1, 2000):.2f}'
+        if kind == 'lloyds':
+            credit = description.startswith('SALARY')
+            out.write(f"{day},{'FPI' if credit else 'DEB'},30-00-00,12345678,{description},"
+                      f"{'' if credit else amount},{amount if credit else ''},{rng.uniform(0, 5000):.2f}\n")
+        else:
+            out.write(f'{day},{description},{amount}\n')
+    return out.getvalue()
+
+
+def parse(text, mode):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return list(stream_csv_statement(io.StringIO(text), 'Date', 'Description', 'Amount',
+                                         True, mode=mode))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 500_000])
+    parser.add_argument('--unique', type=int, default=2000, help='distinct descriptions per file')
+    args = parser.parse_args()
+
+    print(f"{'format':>8} {'rows':>10} {'rows/s (rows)':>15} {'rows/s (columnar)':>19} {'speedup':>8}")
+    for kind in ('generic', 'lloyds'):
+        for size in args.sizes:
+            text = generate_csv(kind, size, args.unique)
+            rates = {}
+            results = {}
+            for mode in ('rows', 'columnar'):
+                start = time.perf_counter()
+                results[mode] = parse(text, mode)
+                rates[mode] = size / (time.perf_counter() - start)
+
+            assert results['rows'] == results['columnar'], f'{kind} modes disagree at {size} rows'
+            print(f"{kind:>8} {size:>10,} {rates['rows']:>15,.0f} {rates['columnar']:>19,.0f} "
+                  f"{rates['columnar'] / rates['rows']:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
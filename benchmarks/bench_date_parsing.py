@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark statement date parsing
+
+Writes a CSV of --rows transactions (50 per day) for several date formats,
+reads back the date column and times the original try-each-format loop
+against DateParser, checking both give the same dates. HSBC-style
+'DD Mon YY' dates are timed against a plain strptime call.
+
+Usage:
+    python benchmarks/bench_date_parsing.py [--rows 500000]
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.date_parsing import DATE_FORMATS, DateParser, strptime_date
+
+
+def legacy_parse_date(date_str):
+    """The original BankStatementProcessor._parse_date, for comparison"""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def legacy_strptime(date_str, fmt):
+    try:
+        return datetime.strptime(date_str, fmt).date()
+    except ValueError:
+        return None
+
+
+def date_column(fmt, rows):
+    """Dates read back from a generated CSV statement"""
+    start = date(2015, 1, 1)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(['Date', 'Description', 'Amount'])
+    for i in range(rows):
+        writer.writerow([(start + timedelta(days=i // 50)).strftime(fmt), 'TESCO STORES', '12.50'])
+    out.seek(0)
+    return [row['Date'] for row in csv.DictReader(out)]
+
+
+def timed(func, values):
+    start = time.perf_counter()
+    result = [func(value) for value in values]
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500_000)
+    args = parser.parse_args()
+
+    print(f"{'format':>10} {'rows':>10} {'legacy s':>10} {'parser s':>10} {'speedup':>8}")
+    cases = [(fmt, legacy_parse_date, DateParser().parse) for fmt in ('%d/%m/%Y', '%d.%m.%y', '%d %B %Y')]
+    cases.append(('%d %b %y', lambda s: legacy_strptime(s, '%d %b %y'),
+                   lambda s: strptime_date(s, '%d %b %y')))
+
+    for fmt, legacy, current in cases:
+        values = date_column(fmt, args.rows)
+        expected, legacy_time = timed(legacy, values)
+        result, parser_time = timed(current, values)
+        assert result == expected, f'{fmt} results differ'
+        print(f'{fmt:>10} {args.rows:>10,} {legacy_time:>10.2f} {parser_time:>10.2f} '
+              f'{legacy_time / parser_time:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark the HSBC statement text parser
+
+Builds synthetic HSBC statement text (date lines, undated card payments,
+multi-line transactions, page headers) at several sizes and reports lines/sec,
+which should stay flat as the statement grows.
+
+Usage:
+    python benchmarks/bench_hsbc_parsing.py [--lines 1000 10000 100000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.pdf_processor import BankStatementProcessor
+
+HEADER = ['Your Statement', 'Contact tel 03457 404 404', 'Account Name', 'Sortcode 40-11-62 Sheet Number 42',
+          'BALANCEBROUGHTFORWARD 1,234.56']
+UNDATED = ['VISAmazon Prime*RM5QQ {amount}', ')))FCA STRATFORD {amount}', 'ATMCASH YCSH JUL31 {amount}',
+           'BPRitika Sneh wise {amount}', 'DDHSBC CARD PYMT {amount}', 'VISRevolut**9937*', 'London {amount}']
+
+
+def generate_lines(count, seed=42):
+    """count lines of statement text, a page header every 40 lines"""
+    rng = random.Random(seed)
+    day = date(2024, 1, 1)
+    lines = []
+    while len(lines) < count:
+        if len(lines) % 40 == 0:
+            lines.extend(HEADER)
+        day += timedelta(days=1)
+        amount = f'{rng.uniform(1, 500):,.2f}'
+        lines.append(f"{day.strftime('%d %b %y')} {rng.choice(['VIS', 'CR', 'TFR', 'DD', ')))'])}"
+                     f"MERCHANT {rng.randrange(1000)} {amount}")
+        for _ in range(rng.randrange(0, 5)):
+            lines.append(rng.choice(UNDATED).format(amount=f'{rng.uniform(1, 500):,.2f}'))
+    return lines[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lines', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'lines':>10} {'transactions':>13} {'seconds':>9} {'lines/s':>12}")
+    for count in args.lines:
+        lines = generate_lines(count)
+        processor = BankStatementProcessor('hsbc')
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            transactions = list(processor.parser.iter_transactions(lines))
+            elapsed = time.perf_counter() - start
+        print(f'{count:>10,} {len(transactions):>13,} {elapsed:>9.3f} {count / elapsed:>12,.0f}')
+
+
+if __name__ == '__main__':
+    main()
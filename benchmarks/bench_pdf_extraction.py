@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark serial vs page-parallel PDF text extraction
+
+Replicates the pages of the sample statement to build large documents and
+times BankStatementProcessor.extract_text_from_pdf in both modes.
+
+Usage:
+    python benchmarks/bench_pdf_extraction.py [--pages 4 20 40 80] [--workers N]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import PyPDF2
+from app.pdf_processor import BankStatementProcessor
+
+SAMPLE_STATEMENT = os.path.join(os.path.dirname(__file__), '..', '2025-08-29_Statement.pdf')
+
+
+def build_statement(page_count):
+    """Build a PDF of page_count pages by repeating the sample statement"""
+    reader = PyPDF2.PdfReader(SAMPLE_STATEMENT)
+    writer = PyPDF2.PdfWriter()
+    for page_num in range(page_count):
+        writer.add_page(reader.pages[page_num % len(reader.pages)])
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def time_extraction(processor, pdf_content, repeat):
+    """Return the best wall time over repeat runs and the extracted text"""
+    best = float('inf')
+    text = ''
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            text = processor.extract_text_from_pdf(pdf_content)
+        best = min(best, time.perf_counter() - start)
+    return best, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, nargs='+', default=[4, 20, 40, 80])
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    serial = BankStatementProcessor('hsbc', extraction_mode='serial')
+    parallel = BankStatementProcessor('hsbc', extraction_mode='parallel',
+                                      extraction_workers=args.workers, parallel_min_pages=1)
+
+    # Warm the process pool so pool start-up is not billed to the first size
+    time_extraction(parallel, build_statement(args.workers or 1), 1)
+
+    print(f"{'pages':>6} {'serial (s)':>11} {'parallel (s)':>13} {'speedup':>8}   workers={args.workers}")
+    for page_count in args.pages:
+        pdf_content = build_statement(page_count)
+        serial_time, serial_text = time_extraction(serial, pdf_content, args.repeat)
+        parallel_time, parallel_text = time_extraction(parallel, pdf_content, args.repeat)
+        assert serial_text == parallel_text, 'parallel extraction changed the output'
+        print(f"{page_count:>6} {serial_time:>11.3f} {parallel_time:>13.3f} {serial_time / parallel_time:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Benchmark the statement import pipeline stage by stage
+
+Generates synthetic HSBC, Lloyds and generic PDF statements and Lloyds and
+generic CSV exports (see benchmarks/corpus.py) and times each stage of the
+import separately:
+
+    extraction      PDF page text (PDF corpora only)
+    parsing         text lines to transactions; for CSVs this includes the
+                    categorization the CSV parsers do inline
+    categorization  suggested categories and descriptions (PDF corpora only)
+    insert          save_imported_transactions into an in-memory SQLite database
+
+Each stage reports transactions/sec (best of --repeat runs) and its peak
+Python memory from a separate tracemalloc run. With --check, results are
+compared with a stored baseline and the script exits with status 1 when a
+stage's throughput drops, or its peak memory grows, by more than --threshold.
+Baselines are only comparable on the machine that recorded them; record one
+with --update-baseline before relying on --check elsewhere.
+
+Usage:
+    python benchmarks/bench_suite.py [--sizes 1000 10000 100000] [--corpora hsbc lloyds_csv]
+                                     [--check] [--update-baseline] [--threshold 0.25]
+                                     [--baseline benchmarks/baseline.json] [--no-memory]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import config
+from app import create_app, db
+from app.models import User
+from app.categorization import KeywordMatcher
+from app import categorization
+from app.csv_processor import stream_csv_statement
+from app.import_cache import fingerprint_transactions
+from app.import_jobs import save_imported_transactions
+from app.pdf_processor import BankStatementProcessor
+
+import corpus
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+STAGES = ('extraction', 'parsing', 'categorization', 'insert')
+
+
+def _clear_match_caches():
+    """Forget memoised categorizations so every run categorizes from scratch"""
+    for matcher in vars(categorization).values():
+        if isinstance(matcher, KeywordMatcher):
+            matcher.match.cache_clear()
+
+
+def _insert(transactions):
+    user = User(username=f'bench-{uuid.uuid4().hex[:12]}', email=f'{uuid.uuid4().hex}@example.com')
+    db.session.add(user)
+    db.session.flush()
+    save_imported_transactions(user.id, fingerprint_transactions(transactions),
+                               str(uuid.uuid4()), 'bench')
+    db.session.commit()
+
+
+def pdf_stages(name, pdf_content):
+    """(stage, function of the previous stage's output) for a PDF corpus"""
+    bank_name = name
+
+    def extraction(_):
+        return list(BankStatementProcessor(bank_name).iter_page_texts(pdf_content))
+
+    def parsing(page_texts):
+        processor = BankStatementProcessor(bank_name)
+        return list(processor.iter_transactions(processor.iter_lines(page_texts)))
+
+    def categorization(transactions):
+        _clear_match_caches()
+        processor = BankStatementProcessor(bank_name)
+        return list(processor.categorize_transactions(dict(t) for t in transactions))
+
+    return [('extraction', extraction), ('parsing', parsing),
+            ('categorization', categorization), ('insert', _insert)]
+
+
+def csv_stages(name, text, mode):
+    """(stage, function of the previous stage's output) for a CSV corpus"""
+    def parsing(_):
+        _clear_match_caches()
+        return list(stream_csv_statement(io.StringIO(text), 'Date', 'Description', 'Amount',
+                                         True, mode=mode))
+
+    return [('parsing', parsing), ('insert', _insert)]
+
+
+def run_stage(function, data, repeat, memory):
+    """Best wall time over repeat runs, peak traced memory in bytes, and the output"""
+    best = float('inf')
+    output = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            output = function(data)
+            best = min(best, time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        with contextlib.redirect_stdout(io.StringIO()):
+            tracemalloc.start()
+            try:
+                function(data)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    return best, peak, output
+
+
+def run_suite(corpora, sizes, repeat, memory, csv_mode):
+    """{corpus: {size: {stage: {'rate': transactions/sec, 'peak_kib': ...}}}}"""
+    results = {}
+    for name in corpora:
+        for size in sizes:
+            content = corpus.build(name, size)
+            if name in corpus.PDF_CORPORA:
+                stages = pdf_stages(name, content)
+            else:
+                stages = csv_stages(name, content, csv_mode)
+
+            data = None
+            measured = {}
+            for stage, function in stages:
+                seconds, peak, data = run_stage(function, data, repeat, memory)
+                measured[stage] = {'rate': round(size / seconds, 1),
+                                   'peak_kib': round(peak / 1024) if peak is not None else None}
+                if stage == 'parsing' and len(data) != size:
+                    raise AssertionError(f'{name}: parsed {len(data)} of {size} transactions')
+
+            results.setdefault(name, {})[str(size)] = measured
+            print(f'{name:>12} {size:>9,} ' + ' '.join(
+                f"{measured[stage]['rate']:>14,.0f}" if stage in measured else f"{'-':>14}"
+                for stage in STAGES))
+    return results
+
+
+def find_regressions(results, baseline, threshold):
+    """Descriptions of every stage that got slower or bigger than the baseline allows"""
+    regressions = []
+    for name, sizes in results.items():
+        for size, stages in sizes.items():
+            for stage, measured in stages.items():
+                expected = baseline.get(name, {}).get(size, {}).get(stage)
+                if not expected:
+                    continue
+                if measured['rate'] < expected['rate'] * (1 - threshold):
+                    regressions.append(f"{name} {size} {stage}: {measured['rate']:,.0f} transactions/s, "
+                                       f"baseline {expected['rate']:,.0f}")
+                if (measured['peak_kib'] is not None and expected.get('peak_kib')
+                        and measured['peak_kib'] > expected['peak_kib'] * (1 + threshold)):
+                    regressions.append(f"{name} {size} {stage}: peak {measured['peak_kib']:,} KiB, "
+                                       f"baseline {expected['peak_kib']:,} KiB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--corpora', nargs='+', choices=corpus.CORPORA, default=list(corpus.CORPORA))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--csv-mode', choices=['rows', 'columnar'], default='columnar')
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help='skip the tracemalloc runs (faster, no peak memory)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed fractional drop in throughput or growth in memory')
+    parser.add_argument('--check', action='store_true', help='fail on regressions against the baseline')
+    parser.add_argument('--update-baseline', action='store_true', help='store these results as the baseline')
+    args = parser.parse_args()
+
+    config['testing'].SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        print(f"{'corpus':>12} {'size':>9} " + ' '.join(f'{stage + "/s":>14}' for stage in STAGES))
+        results = run_suite(args.corpora, args.sizes, args.repeat, args.memory, args.csv_mode)
+        db.drop_all()
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f).get('results', {})
+        for name, sizes in results.items():
+            baseline.setdefault(name, {}).update(sizes)
+        with open(args.baseline, 'w') as f:
+            json.dump({'machine': platform.node(), 'python': platform.python_version(),
+                       'results': baseline}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'Baseline written to {args.baseline}')
+
+    if args.check:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = find_regressions(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+        print(f'No regressions beyond {args.threshold:.0%} of the baseline')
+
+
+if __name__ == '__main__':
+    main()
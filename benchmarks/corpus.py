@@ -0,0 +1,152 @@
+"""
+Synthetic statement corpus for the benchmark suite
+
+Builds HSBC, Lloyds and generic PDF statements and Lloyds and generic CSV
+exports with a given number of transactions. Output is deterministic for a
+seed, so runs on the same machine time the same work. PDFs are written by a
+small text-only writer (Helvetica, one line per text row) that PyPDF2
+extracts line for line, so no PDF library is needed.
+"""
+import io
+import random
+from datetime import date, timedelta
+
+LINES_PER_PAGE = 70
+
+MERCHANTS = ['TESCO STORES', 'AMAZON MARKETPLACE', 'TFL TRAVEL CH', 'NETFLIX.COM',
+             'SHELL PETROL', 'COUNCIL TAX', 'SALARY ACME LTD', 'PRET A MANGER',
+             'SAINSBURYS', 'UBER TRIP', 'DELIVEROO', 'BOOTS CHEMIST']
+
+HSBC_HEADER = ['Your Statement', 'HSBC UK Bank plc', 'www.hsbc.co.uk', 'Contact tel 03457 404 404',
+               'Miss A Customer 40-11-62 12345678', 'BALANCEBROUGHTFORWARD 1,234.56']
+HSBC_CODES = ['VIS', ')))', 'DD', 'BP', 'CR', 'ATM']
+
+LLOYDS_HEADER = ['Lloyds Bank', 'Your Account', 'Sort code 30-96-34 Account number 12345678',
+                 'Date Description Type Money In (£) Money Out (£) Balance (£)']
+LLOYDS_CODES = ['DEB', 'FPO', 'CPT', 'FPI']
+
+GENERIC_HEADER = ['Statement of Account', 'Date Description Amount Balance']
+
+LLOYDS_CSV_COLUMNS = ('Transaction Date,Transaction Type,Sort Code,Account Number,'
+                      'Transaction Description,Debit Amount,Credit Amount,Balance')
+
+PDF_CORPORA = ('hsbc', 'lloyds', 'generic')
+CSV_CORPORA = ('lloyds_csv', 'generic_csv')
+CORPORA = PDF_CORPORA + CSV_CORPORA
+
+
+def _descriptions(rng, unique):
+    return [f'{rng.choice(MERCHANTS)} {rng.randrange(10000)}' for _ in range(unique)]
+
+
+def _days(count, per_day=3, start=date(2020, 1, 1)):
+    """Transaction dates in statement order, about per_day transactions a day"""
+    for i in range(count):
+        yield start + timedelta(days=i // per_day)
+
+
+def hsbc_lines(count, unique=2000, seed=42):
+    """HSBC statement text: the date only on the first transaction of each day"""
+    rng = random.Random(seed)
+    descriptions = _descriptions(rng, unique)
+    lines = []
+    previous = None
+    for day in _days(count):
+        amount = f'{rng.uniform(1, 500):,.2f}'
+        text = f'{rng.choice(HSBC_CODES)}{rng.choice(descriptions)} {amount}'
+        lines.append(text if day == previous else f"{day.strftime('%d %b %y')} {text}")
+        previous = day
+    return lines
+
+
+def lloyds_lines(count, unique=2000, seed=42):
+    """Lloyds statement text: date, description, type, amount and balance per line"""
+    rng = random.Random(seed)
+    # Lloyds types are the first three-capital word, so descriptions are title case
+    descriptions = [description.title() for description in _descriptions(rng, unique)]
+    return [f"{day.strftime('%d %b %y')} {rng.choice(descriptions)} {rng.choice(LLOYDS_CODES)} "
+            f"{rng.uniform(1, 500):,.2f} {rng.uniform(0, 5000):,.2f}"
+            for day in _days(count)]
+
+
+def generic_lines(count, unique=2000, seed=42):
+    """Statement text with one DD/MM/YYYY line per transaction"""
+    rng = random.Random(seed)
+    descriptions = _descriptions(rng, unique)
+    return [f"{day.strftime('%d/%m/%Y')}  {rng.choice(descriptions)}  "
+            f"{rng.uniform(1, 500):,.2f}  {rng.uniform(0, 5000):,.2f}"
+            for day in _days(count)]
+
+
+def _escape(line):
+    return (line.encode('cp1252').replace(b'\\', b'\\\\')
+            .replace(b'(', b'\\(').replace(b')', b'\\)'))
+
+
+def build_pdf(pages):
+    """A PDF with one page per list of text lines"""
+    objects = [b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>']
+    pages_id = 2 + 2 * len(pages)
+    page_ids = []
+    for lines in pages:
+        stream = b'BT /F1 8 Tf 10 TL 36 806 Td ' + b''.join(
+            b'(' + _escape(line) + b') Tj T* ' for line in lines) + b'ET'
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+        objects.append(b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] /Contents %d 0 R '
+                       b'/Resources << /Font << /F1 1 0 R >> >> >>' % (pages_id, len(objects)))
+        page_ids.append(len(objects))
+    objects.append(b'<< /Type /Pages /Kids [%s] /Count %d >>'
+                   % (b' '.join(b'%d 0 R' % page_id for page_id in page_ids), len(page_ids)))
+    objects.append(b'<< /Type /Catalog /Pages %d 0 R >>' % pages_id)
+
+    out = io.BytesIO()
+    out.write(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b'%d 0 obj\n%s\nendobj\n' % (number, body))
+    xref = out.tell()
+    out.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+    out.write(b''.join(b'%010d 00000 n \n' % offset for offset in offsets))
+    out.write(b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+              % (len(objects) + 1, len(objects), xref))
+    return out.getvalue()
+
+
+def build_statement(header, lines):
+    """Lay statement lines out on pages, repeating the header at the top of each"""
+    per_page = LINES_PER_PAGE - len(header)
+    return build_pdf([header + lines[start:start + per_page]
+                      for start in range(0, max(len(lines), 1), per_page)])
+
+
+def build_csv(kind, count, unique=2000, seed=42):
+    """A Lloyds ('lloyds_csv') or Date,Description,Amount ('generic_csv') export"""
+    rng = random.Random(seed)
+    descriptions = _descriptions(rng, unique)
+    out = io.StringIO()
+    out.write((LLOYDS_CSV_COLUMNS if kind == 'lloyds_csv' else 'Date,Description,Amount') + '\n')
+    for day in _days(count):
+        day = day.strftime('%d/%m/%Y')
+        description = rng.choice(descriptions)
+        amount = f'{rng.uniform(1, 2000):.2f}'
+        if kind == 'lloyds_csv':
+            credit = description.startswith('SALARY')
+            out.write(f"{day},{'FPI' if credit else 'DEB'},30-96-34,12345678,{description},"
+                      f"{'' if credit else amount},{amount if credit else ''},{rng.uniform(0, 5000):.2f}\n")
+        else:
+            out.write(f'{day},{description},{amount}\n')
+    return out.getvalue()
+
+
+def build(corpus, count, unique=2000, seed=42):
+    """PDF bytes or CSV text for one corpus at count transactions"""
+    if corpus == 'hsbc':
+        return build_statement(HSBC_HEADER, hsbc_lines(count, unique, seed))
+    if corpus == 'lloyds':
+        return build_statement(LLOYDS_HEADER, lloyds_lines(count, unique, seed))
+    if corpus == 'generic':
+        return build_statement(GENERIC_HEADER, generic_lines(count, unique, seed))
+    if corpus in CSV_CORPORA:
+        return build_csv(corpus, count, unique, seed)
+    raise ValueError(f'Unknown corpus: {corpus}')
@@ -0,0 +1,47 @@
+from run import app
+from app import db
+from sqlalchemy import text
+
+INDEXES = [
+    ('ix_expense_user_date_id', 'expense (user_id, date, id)'),
+    ('ix_expense_user_category_date_id', 'expense (user_id, category, date, id)'),
+    ('ix_budget_user_year_month', 'budget (user_id, year, month)'),
+]
+
+# Earlier indexes that are prefixes of the ones above
+SUPERSEDED_INDEXES = [
+    ('ix_expense_user_date', 'expense'),
+    ('ix_expense_user_category_date', 'expense'),
+]
+
+def add_expense_indexes():
+    """Add composite indexes for per-user date range, month and keyset page queries on Expense and Budget"""
+    with app.app_context():
+        for name, columns in INDEXES:
+            try:
+                with db.engine.connect() as conn:
+                    conn.execute(text(f'CREATE INDEX {name} ON {columns}'))
+                    conn.commit()
+                print(f'✓ Added {name} index successfully')
+            except Exception as e:
+                if 'already exists' in str(e).lower() or 'duplicate key name' in str(e).lower():
+                    print(f'✓ {name} index already exists')
+                else:
+                    print(f'✗ Error adding {name} index: {e}')
+
+        for name, table in SUPERSEDED_INDEXES:
+            drop = f'DROP INDEX {name} ON {table}' if db.engine.dialect.name in ('mysql', 'mariadb') \
+                else f'DROP INDEX IF EXISTS {name}'
+            try:
+                with db.engine.connect() as conn:
+                    conn.execute(text(drop))
+                    conn.commit()
+                print(f'✓ Dropped {name} index')
+            except Exception as e:
+                if "can't drop" in str(e).lower() or 'check that' in str(e).lower():
+                    print(f'✓ {name} index already dropped')
+                else:
+                    print(f'✗ Error dropping {name} index: {e}')
+
+if __name__ == '__main__':
+    add_expense_indexes()
@@ -0,0 +1,32 @@
+from run import app
+from app import db
+from app.search import SEARCH_COLUMNS, rebuild_search_index, search_index_ddl
+
+def add_fulltext_search():
+    """Add full-text search indexes over expenses and imported transactions and index existing rows"""
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        for model in SEARCH_COLUMNS:
+            statements = search_index_ddl(model, dialect)
+            if not statements:
+                print(f'✗ No full-text index on {dialect}; {model.__tablename__} search will use LIKE')
+                continue
+            try:
+                with db.engine.connect() as conn:
+                    for statement in statements:
+                        conn.exec_driver_sql(statement)
+                    conn.commit()
+                print(f'✓ Added search index on {model.__tablename__}')
+            except Exception as e:
+                if 'already exists' in str(e).lower() or 'duplicate key name' in str(e).lower():
+                    print(f'✓ Search index on {model.__tablename__} already exists')
+                else:
+                    print(f'✗ Error adding search index on {model.__tablename__}: {e}')
+
+        # MySQL indexes existing rows as it builds the index; FTS5 needs telling
+        rebuild_search_index()
+        db.session.commit()
+        print('✓ Indexed existing rows')
+
+if __name__ == '__main__':
+    add_fulltext_search()
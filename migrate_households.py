@@ -0,0 +1,16 @@
+from run import app
+from app import db
+from app.households import backfill_households
+
+def add_household_tables():
+    """Create the Household and HouseholdMember tables and fill them from existing partner links"""
+    with app.app_context():
+        # New tables only, so create_all leaves the existing ones alone
+        db.create_all()
+
+        count = backfill_households()
+        db.session.commit()
+        print(f'✓ Added households for {count} linked users')
+
+if __name__ == '__main__':
+    add_household_tables()
@@ -0,0 +1,60 @@
+from run import app
+from app import db
+from app.models import ImportedTransaction
+from app.import_cache import fingerprint_transactions
+from sqlalchemy import text
+
+def add_fingerprint_column():
+    """Add fingerprint column and index to ImportedTransaction table and backfill it"""
+    with app.app_context():
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(text('ALTER TABLE imported_transaction ADD COLUMN fingerprint VARCHAR(64)'))
+                conn.commit()
+            print('✓ Added fingerprint column successfully')
+        except Exception as e:
+            if 'duplicate column name' in str(e).lower() or 'already exists' in str(e).lower():
+                print('✓ Fingerprint column already exists')
+            else:
+                print(f'✗ Error adding fingerprint column: {e}')
+                return
+
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(text('CREATE INDEX ix_imported_transaction_user_fingerprint '
+                                  'ON imported_transaction (user_id, fingerprint)'))
+                conn.commit()
+            print('✓ Added fingerprint index successfully')
+        except Exception as e:
+            if 'already exists' in str(e).lower() or 'duplicate key name' in str(e).lower():
+                print('✓ Fingerprint index already exists')
+            else:
+                print(f'✗ Error adding fingerprint index: {e}')
+
+        # New tables (parsed statement cache) are created by create_all
+        db.create_all()
+
+        # Fingerprint existing rows batch by batch, in statement order
+        batch_ids = [batch_id for (batch_id,) in db.session.query(
+            ImportedTransaction.import_batch_id
+        ).filter(ImportedTransaction.fingerprint == None).distinct()]
+
+        for batch_id in batch_ids:
+            rows = ImportedTransaction.query.filter_by(import_batch_id=batch_id).order_by(
+                ImportedTransaction.transaction_date, ImportedTransaction.id
+            ).all()
+            transactions = ({
+                'row': row,
+                'date': row.transaction_date,
+                'amount': row.amount,
+                'description': row.raw_description,
+                'balance': row.balance
+            } for row in rows)
+            for transaction in fingerprint_transactions(transactions):
+                transaction['row'].fingerprint = transaction['fingerprint']
+            db.session.commit()
+
+        print(f'✓ Fingerprinted {len(batch_ids)} import batches')
+
+if __name__ == '__main__':
+    add_fingerprint_column()
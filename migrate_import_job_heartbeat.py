@@ -0,0 +1,20 @@
+from run import app
+from app import db
+from sqlalchemy import text
+
+def add_heartbeat_column():
+    """Add heartbeat_at column to ImportJob table"""
+    with app.app_context():
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(text('ALTER TABLE import_job ADD COLUMN heartbeat_at DATETIME'))
+                conn.commit()
+            print('✓ Added heartbeat_at column successfully')
+        except Exception as e:
+            if 'duplicate column name' in str(e).lower() or 'already exists' in str(e).lower():
+                print('✓ heartbeat_at column already exists')
+            else:
+                print(f'✗ Error adding heartbeat_at column: {e}')
+
+if __name__ == '__main__':
+    add_heartbeat_column()
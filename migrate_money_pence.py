@@ -0,0 +1,62 @@
+from run import app
+from app import db
+from sqlalchemy import inspect, text
+
+# Monetary columns that move from float pounds to integer pence (see app.money)
+MONEY_COLUMNS = [
+    ('expense', 'amount'),
+    ('monthly_spend', 'total'),
+    ('budget', 'amount'),
+    ('goal', 'target_amount'),
+    ('goal', 'current_amount'),
+    ('investment', 'amount'),
+    ('investment', 'current_value'),
+    ('imported_transaction', 'amount'),
+    ('imported_transaction', 'balance'),
+]
+
+# Created once the data is converted, so running the script again can't multiply it twice
+MARKER_TABLE = 'money_in_pence'
+
+def pence(column, dialect):
+    """SQL for a float pounds column as whole pence, rounding halves away from zero like app.money.to_pence"""
+    if dialect == 'postgresql':
+        return f'ROUND(CAST({column} AS NUMERIC) * 100)'
+    if dialect in ('mysql', 'mariadb'):
+        return f'ROUND(CAST({column} AS DECIMAL(20, 6)) * 100)'
+    # SQLite has no decimals: drop float noise (1.005 * 100 = 100.49999...) before rounding
+    return f'ROUND(ROUND({column} * 100, 6))'
+
+def convert_money_to_pence():
+    """Store monetary columns as whole pence instead of float pounds"""
+    with app.app_context():
+        inspector = inspect(db.engine)
+        if inspector.has_table(MARKER_TABLE):
+            print('✓ Money columns already hold pence')
+            return
+
+        dialect = db.engine.dialect.name
+        try:
+            with db.engine.begin() as conn:
+                for table, column in MONEY_COLUMNS:
+                    if not inspector.has_table(table):
+                        continue
+                    if dialect == 'postgresql':
+                        conn.execute(text(f'ALTER TABLE {table} ALTER COLUMN {column} TYPE BIGINT '
+                                          f'USING {pence(column, dialect)}'))
+                    else:
+                        conn.execute(text(f'UPDATE {table} SET {column} = {pence(column, dialect)}'))
+                        # SQLite can't change a column's type; its REAL values hold whole pence exactly
+                        if dialect in ('mysql', 'mariadb'):
+                            nullable = '' if column in ('current_amount', 'current_value', 'balance') else ' NOT NULL'
+                            conn.execute(text(f'ALTER TABLE {table} MODIFY {column} BIGINT{nullable}'))
+                    print(f'✓ Converted {table}.{column} to pence')
+                conn.execute(text(f'CREATE TABLE {MARKER_TABLE} (id INTEGER PRIMARY KEY)'))
+        except Exception as e:
+            print(f'✗ Error converting money columns: {e}')
+            return
+
+        print('✓ Money columns now hold pence')
+
+if __name__ == '__main__':
+    convert_money_to_pence()
@@ -0,0 +1,16 @@
+from run import app
+from app import db
+from app.spend_rollup import rebuild_monthly_spend
+
+def add_monthly_spend_table():
+    """Create the MonthlySpend rollup and SpendVersion tables and fill them from existing expenses"""
+    with app.app_context():
+        # The rollup tables are new, so create_all adds them without touching the rest
+        db.create_all()
+
+        count = rebuild_monthly_spend()
+        db.session.commit()
+        print(f'✓ Rolled up existing expenses into {count} monthly spend rows')
+
+if __name__ == '__main__':
+    add_monthly_spend_table()
@@ -2,7 +2,9 @@
 import unittest
 import os
 import tempfile
+from flask import g
 from app import create_app, db
+from app.households import invalidate_households
 from app.models import User, Expense, Budget, Goal, Investment, PartnerRequest
 
 class TestCase(unittest.TestCase):
@@ -27,6 +29,9 @@ class TestCase(unittest.TestCase):
         # Create all database tables
         db.create_all()
         
+        # Ids repeat in every fresh database, so forget households cached by earlier tests
+        invalidate_households()
+        
     def tearDown(self):
         """Clean up after tests"""
         db.session.remove()
@@ -54,3 +59,11 @@ class TestCase(unittest.TestCase):
     def logout(self):
         """Helper method to log out"""
         return self.client.get('/auth/logout', follow_redirects=True)
+    
+    def login_as(self, user):
+        """Helper method to log in a user without going through the login form"""
+        with self.client.session_transaction() as session:
+            session['_user_id'] = str(user.id)
+            session['_fresh'] = True
+        # Requests share the test app context, so drop Flask-Login's cached user
+        g.pop('_login_user', None)
@@ -0,0 +1,116 @@
+"""Tests for the analytics page"""
+import json
+import unittest
+from datetime import date
+from unittest import mock
+from app import db, analytics_charts
+from app.models import Expense
+from app.spend_rollup import spend_versions
+from app.utils import spending_summary
+from tests import TestCase
+
+class AnalyticsTestCase(TestCase):
+    """Test analytics aggregates"""
+
+    def setUp(self):
+        super().setUp()
+        analytics_charts._cache.clear()
+        self.user = self.create_user()
+        for amount, category, when in [(10.0, 'food', date(2025, 7, 31)),
+                                       (5.0, 'Food', date(2025, 8, 1)),
+                                       (20.0, 'bills', date(2025, 8, 15)),
+                                       (99.0, 'bills', date(2025, 9, 1))]:
+            db.session.add(Expense(user_id=self.user.id, amount=amount, category=category,
+                                   description='Test', date=when))
+        db.session.commit()
+
+    def test_spending_summary(self):
+        """Test totals are grouped by category and month within the range"""
+        by_category, by_month = spending_summary([self.user.id], date(2025, 7, 31), date(2025, 8, 31))
+        self.assertEqual(by_category, {'Food': (15.0, 2), 'Bills': (20.0, 1)})
+        self.assertEqual(by_month, {'2025-07': 10.0, '2025-08': 25.0})
+
+        self.assertEqual(spending_summary([self.user.id], date(2025, 10, 1), date(2025, 10, 31)), ({}, {}))
+
+    def test_analytics_date_range(self):
+        """Test the page only reports spending in the requested range"""
+        self.login_as(self.user)
+        response = self.client.get('/analytics/?start=2025-08-01&end=2025-08-31')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'\xc2\xa325.00', response.data)
+        self.assertIn(b'01 Aug 2025', response.data)
+
+        response = self.client.get('/analytics/?start=2024-01-01&end=2024-12-31')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'No data to analyze yet', response.data)
+
+    def test_analytics_defaults_to_all_history(self):
+        """Test the page covers every expense when no range is given"""
+        self.login_as(self.user)
+        response = self.client.get('/analytics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'\xc2\xa3134.00', response.data)
+        self.assertIn(b'31 Jul 2025', response.data)
+
+    def test_analytics_days_out_of_range(self):
+        """Test huge or invalid ?days= values are clamped or ignored rather than failing"""
+        self.login_as(self.user)
+        response = self.client.get('/analytics/?days=99999999&end=2025-08-31')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'\xc2\xa335.00', response.data)
+
+        for days in ('0', '-5', 'abc'):
+            response = self.client.get(f'/analytics/?days={days}')
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(b'\xc2\xa3134.00', response.data)
+
+    def test_chart_payload_is_plain_plotly_json(self):
+        """Test the chart spec holds the aggregates as Plotly traces"""
+        payload = analytics_charts.chart_payload([self.user.id], date(2025, 8, 1), date(2025, 8, 31))
+        charts = json.loads(payload['charts'])
+        self.assertEqual(charts['spending']['data'][0], {
+            'type': 'pie', 'labels': ['Food', 'Bills'], 'values': [5.0, 20.0],
+            'title': {'text': 'Combined Spending by Category'}})
+        self.assertEqual(charts['trend']['data'][0]['x'], ['2025-08'])
+        self.assertEqual(charts['category']['data'][0]['y'], [5.0, 20.0])
+        self.assertEqual(payload['summary']['top_category'], 'Bills')
+
+    def test_chart_payload_cached_until_expenses_change(self):
+        """Test cached charts are reused, and rebuilt once the spend version moves"""
+        start, end = date(2025, 8, 1), date(2025, 8, 31)
+        first = analytics_charts.chart_payload([self.user.id], start, end)
+        with mock.patch.object(analytics_charts, 'spending_summary') as summary:
+            self.assertIs(analytics_charts.chart_payload([self.user.id], start, end), first)
+            summary.assert_not_called()
+
+        versions = spend_versions([self.user.id])
+        db.session.add(Expense(user_id=self.user.id, amount=1.0, category='food',
+                               description='Test', date=date(2025, 8, 2)))
+        db.session.commit()
+        self.assertGreater(spend_versions([self.user.id]), versions)
+
+        # Inline revalidation in testing: the stale entry is rebuilt in the request
+        refreshed = analytics_charts.chart_payload([self.user.id], start, end)
+        self.assertEqual(refreshed['summary']['total'], 26.0)
+
+    def test_stale_charts_served_while_rebuilding(self):
+        """Test a stale entry is returned at once and rebuilt in the background"""
+        start, end = date(2025, 8, 1), date(2025, 8, 31)
+        stale = analytics_charts.chart_payload([self.user.id], start, end)
+        db.session.add(Expense(user_id=self.user.id, amount=1.0, category='food',
+                               description='Test', date=date(2025, 8, 2)))
+        db.session.commit()
+
+        self.app.config['ANALYTICS_REVALIDATE'] = 'background'
+        with mock.patch.object(analytics_charts.threading, 'Thread') as thread:
+            self.assertIs(analytics_charts.chart_payload([self.user.id], start, end), stale)
+            # Only one rebuild at a time per entry
+            self.assertIs(analytics_charts.chart_payload([self.user.id], start, end), stale)
+        thread.assert_called_once()
+
+        app, key = thread.call_args.kwargs['args']
+        analytics_charts._refresh_in_background(app, key)
+        self.assertEqual(analytics_charts.chart_payload([self.user.id], start, end)['summary']['total'], 26.0)
+
+if __name__ == '__main__':
+    unittest.main()
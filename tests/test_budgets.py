@@ -0,0 +1,73 @@
+"""Tests for budget status"""
+import unittest
+from unittest import mock
+from datetime import date
+from app import db
+from app.models import Budget, Expense
+from app.utils import calculate_budget_status, household_budget_status
+from tests import TestCase
+
+class BudgetStatusTestCase(TestCase):
+    """Test budgeted vs spent per category"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user()
+        self.partner = self.create_user('partner', 'partner@example.com')
+        self.user.partner_id = self.partner.id
+        db.session.add_all([
+            Budget(user_id=self.user.id, category='food', amount=100.0, month=8, year=2025),
+            Budget(user_id=self.partner.id, category='food', amount=50.0, month=8, year=2025,
+                   alert_threshold=50.0),
+            Budget(user_id=self.user.id, category='bills', amount=200.0, month=8, year=2025),
+            Budget(user_id=self.user.id, category='food', amount=100.0, month=9, year=2025),
+        ])
+        for user, amount, category, day in [(self.user, 60.0, 'food', date(2025, 8, 3)),
+                                            (self.partner, 30.0, 'food', date(2025, 8, 4)),
+                                            (self.user, 250.0, 'bills', date(2025, 8, 5)),
+                                            (self.user, 500.0, 'shopping', date(2025, 8, 6)),
+                                            (self.user, 10.0, 'food', date(2025, 9, 1))]:
+            db.session.add(Expense(user_id=user.id, amount=amount, category=category,
+                                   description='Test', date=day))
+        db.session.commit()
+
+    def test_single_user_status(self):
+        """Test a user's budgets are measured against their own spending"""
+        status = calculate_budget_status(self.user.id, 8, 2025)
+        self.assertEqual(set(status), {'food', 'bills'})
+        self.assertEqual(status['food'], {'budgeted': 100.0, 'spent': 60.0, 'remaining': 40.0,
+                                          'percentage': 60.0, 'status': 'good'})
+        self.assertEqual(status['bills']['status'], 'over')
+        self.assertEqual(calculate_budget_status(self.user.id, 10, 2025), {})
+
+    def test_household_status_over_months(self):
+        """Test partners' budgets are combined, for several months at once"""
+        status = household_budget_status([self.user.id, self.partner.id], [(2025, 8), (2025, 9)])
+        self.assertEqual(status[(2025, 8)]['food']['budgeted'], 150.0)
+        self.assertEqual(status[(2025, 8)]['food']['spent'], 90.0)
+        # The partner's lower alert threshold applies to the combined budget
+        self.assertEqual(status[(2025, 8)]['food']['status'], 'warning')
+        self.assertEqual(status[(2025, 9)], {'food': {'budgeted': 100.0, 'spent': 10.0, 'remaining': 90.0,
+                                                      'percentage': 10.0, 'status': 'good'}})
+
+    def test_duplicate_budget_rows_count_spending_once(self):
+        """Test a user with two budget rows for a category has their spending counted once"""
+        db.session.add(Budget(user_id=self.user.id, category='bills', amount=50.0, month=8, year=2025))
+        db.session.commit()
+
+        status = household_budget_status([self.user.id, self.partner.id], [(2025, 8)])
+        self.assertEqual(status[(2025, 8)]['bills']['budgeted'], 250.0)
+        self.assertEqual(status[(2025, 8)]['bills']['spent'], 250.0)
+        self.assertEqual(status[(2025, 8)]['food']['spent'], 90.0)
+
+    def test_dashboard_combines_budgets(self):
+        """Test the dashboard shows the household's combined budgets"""
+        self.login_as(self.user)
+        with mock.patch('app.routes.main.datetime') as now:
+            now.now.return_value = date(2025, 8, 20)
+            response = self.client.get('/dashboard')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('£90 / £150'.encode(), response.data)
+
+if __name__ == '__main__':
+    unittest.main()
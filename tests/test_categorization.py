@@ -0,0 +1,45 @@
+"""Test transaction categorization"""
+import unittest
+from app.categorization import (KeywordMatcher, GENERIC_RULES, HSBC_RULES, LLOYDS_RULES,
+                                categorize, categorize_lloyds)
+
+def legacy_match(rules, description):
+    """Original categorization loop the engine must agree with"""
+    description_lower = description.lower()
+    for category, keywords, confidence in rules:
+        if any(keyword in description_lower for keyword in keywords):
+            return category, confidence
+    return 'other', 0.3
+
+class KeywordMatcherTestCase(unittest.TestCase):
+    """Test the compiled keyword engine"""
+
+    def test_matches_legacy_rules(self):
+        """Test every keyword and overlapping combinations categorize as before"""
+        for rules in (GENERIC_RULES, HSBC_RULES, LLOYDS_RULES):
+            matcher = KeywordMatcher(rules)
+            keywords = [keyword for _, words, _ in rules for keyword in words]
+            descriptions = ['NO MATCH HERE 123'] + [f'CARD {keyword.upper()} 42' for keyword in keywords]
+            descriptions += [f'{a}{b}' for a in keywords[::3] for b in keywords[1::4]]
+            for description in descriptions:
+                self.assertEqual(matcher.match(description), legacy_match(rules, description), description)
+
+    def test_overlapping_keywords_use_rule_order(self):
+        """Test a better ranked keyword overlapping a worse one still wins"""
+        # 'gas' (utilities) overlaps 'asda' (food); food is listed first
+        self.assertEqual(categorize('GASDA STORE'), ('food', 0.9))
+        # 'amazon prime' (entertainment) is listed before its prefix 'amazon' (shopping)
+        self.assertEqual(categorize('AMAZON PRIME*RM5QQ'), ('entertainment', 0.8))
+        self.assertEqual(categorize('AMAZON MARKETPLACE'), ('shopping', 0.7))
+
+    def test_bank_specific_rules(self):
+        """Test HSBC and Lloyds rules take precedence over the generic ones"""
+        self.assertEqual(categorize('TFL TRAVEL CH', 'hsbc'), ('transportation', 0.95))
+        self.assertEqual(categorize('UNKNOWN TESCO', 'hsbc'), ('food', 0.9))
+        self.assertEqual(categorize_lloyds('RITIKA SNEH', 'FPI'), ('transfers', 0.95))
+        self.assertEqual(categorize_lloyds('ALLIANCE EAST LOND', 'FPO'), ('rent', 0.95))
+        self.assertEqual(categorize_lloyds('SOME SHOP', 'CPT'), ('shopping', 0.7))
+        self.assertEqual(categorize_lloyds('SOME SHOP', 'DEB'), ('other', 0.3))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -140,3 +140,23 @@ class ExpenseTestCase(TestCase):
         
         # Should not be able to access other user's expense
         self.assertEqual(response.status_code, 404)
+
+    def test_category_filter_lists_household_categories(self):
+        """Test the category filter offers the couple's own categories as well as the defaults"""
+        user = self.create_user()
+        partner = self.create_user(username='partner', email='partner@example.com')
+        other = self.create_user(username='other', email='other@example.com')
+        user.partner_id = partner.id
+        db.session.commit()
+
+        for owner, category in [(user, 'food'), (partner, 'pets'), (other, 'yacht')]:
+            db.session.add(Expense(amount=10.0, description='Test', category=category,
+                                   user_id=owner.id, date=date.today()))
+        db.session.commit()
+
+        self.login_as(user)
+        response = self.client.get('/expenses/')
+        self.assertIn(b'<option value="pets">', response.data)
+        self.assertIn(b'<option value="housing">', response.data)
+        self.assertEqual(response.data.count(b'<option value="food">'), 1)
+        self.assertNotIn(b'<option value="yacht">', response.data)
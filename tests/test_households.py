@@ -0,0 +1,88 @@
+"""Tests for households and the couple membership cache"""
+import unittest
+from sqlalchemy import event
+from app import db
+from app.models import User, Household, HouseholdMember, PartnerRequest
+from app.households import backfill_households, household_user_ids
+from app.utils import get_couple_user_ids
+from tests import TestCase
+
+class HouseholdTestCase(TestCase):
+    """Test households follow partner links"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user()
+        self.partner = self.create_user('partner', 'partner@example.com')
+
+    def count_queries(self, function):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            function()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        return len(statements)
+
+    def test_accepting_request_creates_household(self):
+        """Test an accepted partner request puts both users in one household"""
+        partner_request = PartnerRequest(sender_id=self.partner.id, receiver_id=self.user.id)
+        db.session.add(partner_request)
+        db.session.commit()
+        self.assertEqual(get_couple_user_ids(self.user.id), [self.user.id])
+
+        self.login_as(self.user)
+        self.client.get(f'/profile/respond_partner_request/{partner_request.id}/accept')
+
+        self.assertEqual(Household.query.count(), 1)
+        self.assertEqual(get_couple_user_ids(self.user.id), [self.user.id, self.partner.id])
+        self.assertEqual(get_couple_user_ids(self.partner.id), [self.partner.id, self.user.id])
+        self.assertEqual(self.user.get_partner(), self.partner)
+
+    def test_one_way_link_is_shared(self):
+        """Test a partner_id set on one user alone still links both ways"""
+        self.user.partner_id = self.partner.id
+        db.session.commit()
+        self.assertEqual(self.partner.couple_user_ids, [self.partner.id, self.user.id])
+
+    def test_cached_household_needs_no_queries(self):
+        """Test repeat lookups are answered from the cache"""
+        user_id, partner_id = self.user.id, self.partner.id
+        self.user.partner_id = partner_id
+        db.session.commit()
+        self.assertEqual(self.count_queries(lambda: household_user_ids(user_id)), 1)
+        self.assertEqual(self.count_queries(lambda: household_user_ids(user_id)), 0)
+        # Looking one partner up caches the household for the other too
+        self.assertEqual(self.count_queries(lambda: household_user_ids(partner_id)), 0)
+
+    def test_unlink_dissolves_household(self):
+        """Test unlinking clears both sides and the cached household"""
+        self.user.partner_id = self.partner.id
+        self.partner.partner_id = self.user.id
+        db.session.commit()
+        self.assertEqual(len(get_couple_user_ids(self.partner.id)), 2)
+
+        self.login_as(self.user)
+        self.client.get('/profile/unlink_partner')
+
+        self.assertIsNone(db.session.get(User, self.partner.id).partner_id)
+        self.assertEqual(HouseholdMember.query.count(), 0)
+        self.assertEqual(Household.query.count(), 0)
+        self.assertEqual(get_couple_user_ids(self.partner.id), [self.partner.id])
+
+    def test_backfill_existing_links(self):
+        """Test partners linked before households existed get one"""
+        self.user.partner_id = self.partner.id
+        db.session.commit()
+        HouseholdMember.query.delete()
+        Household.query.delete()
+        db.session.commit()
+
+        backfill_households()
+        db.session.commit()
+        self.assertEqual(HouseholdMember.query.count(), 2)
+        self.assertEqual(get_couple_user_ids(self.partner.id), [self.partner.id, self.user.id])
+
+if __name__ == '__main__':
+    unittest.main()
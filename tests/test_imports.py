@@ -0,0 +1,616 @@
+"""Test bank statement import functionality"""
+import io
+import os
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+from unittest import mock
+from tests import TestCase
+from datetime import date, datetime, timedelta
+from app.models import ImportJob, ImportedTransaction, MerchantCategory, Expense, ParsedStatement
+from app.import_jobs import (run_worker, DatabaseJobQueue, save_imported_transactions,
+                             create_expenses_from_batch)
+from app.import_cache import hash_bytes, StatementParseCache, fingerprint_transactions, _OccurrenceCounter
+from app import merchant_memo
+from app.merchant_memo import MerchantMemo, normalize_merchant, learn_merchants
+from app.csv_processor import process_csv_statement
+from app.csv_processor import LLOYDS_CSV_HEADER, stream_csv_statement
+from app.pdf_processor import PARSER_VERSION
+from app import db
+
+SAMPLE_STATEMENT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                '2025-08-29_Statement.pdf')
+
+class ImportJobTestCase(TestCase):
+    """Test queued statement imports"""
+
+    def setUp(self):
+        super().setUp()
+        self.job_folder = tempfile.mkdtemp()
+        self.app.config['IMPORT_JOB_FOLDER'] = self.job_folder
+
+    def tearDown(self):
+        shutil.rmtree(self.job_folder, ignore_errors=True)
+        super().tearDown()
+
+    def upload_sample(self):
+        with open(SAMPLE_STATEMENT, 'rb') as f:
+            pdf_content = f.read()
+        return self.client.post('/imports/import', data={
+            'pdf_file': (io.BytesIO(pdf_content), 'statement.pdf'),
+            'bank_name': 'hsbc',
+            'statement_month': '8',
+            'statement_year': '2025'
+        }, content_type='multipart/form-data')
+
+    def test_upload_runs_job_and_redirects_to_review(self):
+        """Test an inline job imports the statement and redirects to the batch"""
+        user = self.create_user()
+        self.login_as(user)
+
+        response = self.upload_sample()
+
+        job = ImportJob.query.one()
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(f'/imports/review/{job.batch_id}', response.location)
+        self.assertEqual(ImportedTransaction.query.filter_by(import_batch_id=job.batch_id).count(),
+                         job.total_transactions)
+        self.assertGreater(job.total_transactions, 0)
+        self.assertFalse(os.path.exists(job.file_path))
+
+    def test_reupload_uses_parse_cache_and_skips_duplicates(self):
+        """Test uploading the same statement again adds nothing and skips extraction"""
+        user = self.create_user()
+        self.login_as(user)
+        self.upload_sample()
+        first = ImportJob.query.one()
+        self.assertEqual(ParsedStatement.query.count(), 1)
+
+        with mock.patch('app.pdf_processor.BankStatementProcessor.iter_statement_transactions',
+                        side_effect=AssertionError('statement was parsed again')):
+            response = self.upload_sample()
+
+        second = ImportJob.query.filter(ImportJob.id != first.id).one()
+        self.assertEqual(second.status, 'completed')
+        self.assertEqual(second.content_hash, first.content_hash)
+        self.assertEqual(second.total_transactions, 0)
+        self.assertEqual(second.duplicate_transactions, first.total_transactions)
+        self.assertIsNone(second.batch_id)
+        self.assertIn('/imports/history', response.location)
+        self.assertEqual(ImportedTransaction.query.count(), first.total_transactions)
+
+    def test_parse_cache_ignores_older_parser_versions(self):
+        """Test a statement cached by an older parser version is parsed again"""
+        user = self.create_user()
+        self.login_as(user)
+        with open(SAMPLE_STATEMENT, 'rb') as f:
+            content_hash = hash_bytes(f.read())
+        db.session.add(ParsedStatement(content_hash=content_hash, parser='hsbc',
+                                       parser_version=PARSER_VERSION - 1,
+                                       transactions=[], transaction_count=0))
+        db.session.commit()
+
+        self.upload_sample()
+
+        job = ImportJob.query.one()
+        self.assertEqual(job.status, 'completed')
+        self.assertGreater(job.total_transactions, 0)
+        self.assertEqual(ParsedStatement.query.filter_by(parser_version=PARSER_VERSION).count(), 1)
+        self.assertTrue(StatementParseCache(content_hash, 'hsbc').load())
+
+    def test_job_status_endpoint(self):
+        """Test job status is reported as JSON to its owner only"""
+        user = self.create_user()
+        other = self.create_user(username='other', email='other@example.com')
+        job = ImportJob(id='job-1', user_id=user.id, source_file='statement.pdf',
+                        file_path=os.path.join(self.job_folder, 'job-1.pdf'))
+        db.session.add(job)
+        db.session.commit()
+
+        self.login_as(user)
+        response = self.client.get('/imports/jobs/job-1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['status'], 'queued')
+        self.assertIsNone(response.get_json()['review_url'])
+
+        self.login_as(other)
+        response = self.client.get('/imports/jobs/job-1', headers={'Accept': 'application/json'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_database_queue_worker(self):
+        """Test the worker drains jobs queued in the database"""
+        self.app.config['IMPORT_QUEUE_BACKEND'] = 'database'
+        self.app.config['IMPORT_QUEUE_POLL_INTERVAL'] = 0
+        self.app.extensions.pop('import_queue', None)
+        user = self.create_user()
+        self.login_as(user)
+
+        response = self.upload_sample()
+        job = ImportJob.query.one()
+        self.assertEqual(job.status, 'queued')
+        self.assertIn(f'job={job.id}', response.location)
+        self.assertIsInstance(self.app.extensions['import_queue'], DatabaseJobQueue)
+
+        run_worker(self.app, burst=True)
+
+        db.session.expire_all()
+        job = db.session.get(ImportJob, job.id)
+        self.assertEqual(job.status, 'completed')
+        self.assertGreater(job.total_transactions, 0)
+
+    def test_worker_fails_stale_running_jobs(self):
+        """Test jobs left running by a worker that died are failed and cleaned up"""
+        self.app.config['IMPORT_QUEUE_BACKEND'] = 'database'
+        self.app.extensions.pop('import_queue', None)
+        user = self.create_user()
+        now = datetime.utcnow()
+        for job_id, heartbeat in (('stale', now - timedelta(hours=1)), ('alive', now)):
+            file_path = os.path.join(self.job_folder, f'{job_id}.csv')
+            open(file_path, 'wb').close()
+            db.session.add(ImportJob(id=job_id, user_id=user.id, status='running', kind='csv',
+                                     source_file='statement.csv', file_path=file_path,
+                                     batch_id=f'{job_id}-batch', started_at=heartbeat,
+                                     heartbeat_at=heartbeat))
+            db.session.add(ImportedTransaction(user_id=user.id, raw_description='TESCO', amount=25.5,
+                                               transaction_date=date(2025, 8, 1),
+                                               import_batch_id=f'{job_id}-batch', source_file='statement.csv'))
+        db.session.commit()
+
+        run_worker(self.app, burst=True)
+
+        db.session.expire_all()
+        stale, alive = db.session.get(ImportJob, 'stale'), db.session.get(ImportJob, 'alive')
+        self.assertEqual(stale.status, 'failed')
+        self.assertIsNotNone(stale.error)
+        self.assertIsNone(stale.batch_id)
+        self.assertFalse(os.path.exists(stale.file_path))
+        self.assertEqual(ImportedTransaction.query.filter_by(import_batch_id='stale-batch').count(), 0)
+        self.assertEqual(alive.status, 'running')
+        self.assertTrue(os.path.exists(alive.file_path))
+        self.assertEqual(ImportedTransaction.query.filter_by(import_batch_id='alive-batch').count(), 1)
+
+    def test_bulk_save_in_chunks(self):
+        """Test transactions from a generator are inserted across several chunks"""
+        user = self.create_user()
+        transactions = ({
+            'date': date(2025, 8, day),
+            'description': f'SHOP {day}',
+            'amount': float(day),
+            'type': 'credit' if day == 3 else 'debit'
+        } for day in range(1, 6))
+
+        saved = save_imported_transactions(user.id, transactions, 'batch-1', 'statement.csv', chunk_size=2)
+        db.session.commit()
+
+        self.assertEqual(saved, 5)
+        rows = ImportedTransaction.query.filter_by(import_batch_id='batch-1').order_by(
+            ImportedTransaction.transaction_date).all()
+        self.assertEqual([t.amount for t in rows], [1.0, 2.0, 3.0, 4.0, 5.0])
+        self.assertEqual([t.is_expense for t in rows], [True, True, False, True, True])
+        self.assertFalse(any(t.is_processed or t.is_approved for t in rows))
+        self.assertIsNotNone(rows[0].import_date)
+
+    def test_create_expenses_links_transactions(self):
+        """Test approved debits become expenses linked back to their transactions"""
+        user = self.create_user()
+        transactions = [
+            {'date': date(2025, 8, 1), 'description': 'TESCO STORES 1', 'amount': 10.0, 'type': 'debit',
+             'suggested_category': 'food', 'suggested_description': 'Tesco'},
+            {'date': date(2025, 8, 2), 'description': 'SALARY', 'amount': 2000.0, 'type': 'credit',
+             'suggested_category': 'income'},
+            {'date': date(2025, 8, 3), 'description': 'TRANSFER', 'amount': 50.0, 'type': 'debit',
+             'suggested_category': 'ignore'},
+            {'date': date(2025, 8, 4), 'description': 'SHELL PETROL', 'amount': 40.0, 'type': 'debit',
+             'suggested_category': 'transportation'},
+        ]
+        save_imported_transactions(user.id, transactions, 'batch-1', 'statement.csv')
+        ImportedTransaction.query.update({'is_approved': True, 'is_reviewed': True})
+        db.session.commit()
+
+        self.login_as(user)
+        response = self.client.get('/imports/create_expenses/batch-1')
+        self.assertEqual(response.status_code, 302)
+
+        rows = {t.raw_description: t for t in ImportedTransaction.query.all()}
+        self.assertEqual(Expense.query.count(), 2)
+        for raw_description in ('TESCO STORES 1', 'SHELL PETROL'):
+            transaction = rows[raw_description]
+            self.assertTrue(transaction.is_processed)
+            self.assertEqual(transaction.created_expense.amount, transaction.amount)
+            self.assertEqual(transaction.created_expense.tags, 'imported,batch-1')
+        self.assertEqual(rows['TESCO STORES 1'].created_expense.description, 'Tesco')
+        self.assertEqual(rows['SHELL PETROL'].created_expense.description, 'SHELL PETROL')
+        for raw_description in ('SALARY', 'TRANSFER'):
+            self.assertFalse(rows[raw_description].is_processed)
+            self.assertIsNone(rows[raw_description].expense_id)
+
+    def test_create_expenses_without_returning(self):
+        """Test the ORM fallback for databases without ordered RETURNING"""
+        user = self.create_user()
+        transactions = [{'date': date(2025, 8, day), 'description': f'SHOP {day}', 'amount': float(day),
+                         'type': 'debit', 'suggested_category': 'shopping'} for day in range(1, 4)]
+        save_imported_transactions(user.id, transactions, 'batch-1', 'statement.csv')
+        ImportedTransaction.query.update({'is_approved': True})
+        db.session.commit()
+
+        with mock.patch.object(db.engine.dialect, 'insert_executemany_returning_sort_by_parameter_order', False):
+            created, _ = create_expenses_from_batch(user.id, 'batch-1')
+            db.session.commit()
+
+        self.assertEqual(created, 3)
+        for transaction in ImportedTransaction.query.all():
+            self.assertEqual(transaction.created_expense.amount, transaction.amount)
+
+class CSVImportTestCase(TestCase):
+    """Test streamed and chunked CSV imports"""
+
+    CSV_CONTENT = ('Date,Description,Amount\n'
+                   '01/08/2025,TESCO STORES 1234,25.50\n'
+                   '02/08/2025,NETFLIX,12.99\n'
+                   '03/08/2025,SHELL PETROL,40.00\n')
+
+    def setUp(self):
+        super().setUp()
+        self.job_folder = tempfile.mkdtemp()
+        self.app.config['IMPORT_JOB_FOLDER'] = self.job_folder
+
+    def tearDown(self):
+        shutil.rmtree(self.job_folder, ignore_errors=True)
+        super().tearDown()
+
+    def test_upload_csv_runs_job(self):
+        """Test a CSV upload is imported as a job and redirects to the batch"""
+        user = self.create_user()
+        self.login_as(user)
+
+        response = self.client.post('/imports/import_csv', data={
+            'csv_file': (io.BytesIO(self.CSV_CONTENT.encode('utf-8')), 'statement.csv'),
+            'date_column': 'Date',
+            'description_column': 'Description',
+            'amount_column': 'Amount',
+            'has_header': 'y'
+        }, content_type='multipart/form-data')
+
+        job = ImportJob.query.one()
+        self.assertEqual(job.kind, 'csv')
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.total_transactions, 3)
+        self.assertIn(f'/imports/review/{job.batch_id}', response.location)
+        categories = {t.raw_description: t.suggested_category for t in ImportedTransaction.query.all()}
+        self.assertEqual(categories['TESCO STORES 1234'], 'food')
+
+    def test_job_logs_one_summary(self):
+        """Test an import logs a per-stage summary rather than a line per row"""
+        user = self.create_user()
+        self.login_as(user)
+
+        with self.assertLogs('app.import_jobs', level='DEBUG') as logs:
+            self.client.post('/imports/import_csv', data={
+                'csv_file': (io.BytesIO(self.CSV_CONTENT.encode('utf-8')), 'statement.csv'),
+                'date_column': 'Date',
+                'description_column': 'Description',
+                'amount_column': 'Amount',
+                'has_header': 'y'
+            }, content_type='multipart/form-data')
+
+        summaries = [line for line in logs.output if 'finished' in line]
+        self.assertEqual(len(summaries), 1)
+        self.assertIn('parsing: transactions=3', summaries[0])
+        self.assertIn('insert: duplicates=0 saved=3', summaries[0])
+
+    def test_chunked_upload(self):
+        """Test a CSV sent in several chunks is imported once completed"""
+        user = self.create_user()
+        self.login_as(user)
+        content = self.CSV_CONTENT.encode('utf-8')
+
+        response = self.client.post('/imports/uploads', json={'filename': 'big.csv'})
+        self.assertEqual(response.status_code, 201)
+        upload = response.get_json()
+
+        response = self.client.put(f"{upload['upload_url']}?offset=0", data=content[:30])
+        self.assertEqual(response.get_json()['offset'], 30)
+
+        # A retried or out-of-order chunk is rejected with the offset to resume from
+        response = self.client.put(f"{upload['upload_url']}?offset=10", data=content[10:30])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()['offset'], 30)
+
+        response = self.client.put(f"{upload['upload_url']}?offset=30", data=content[30:])
+        self.assertEqual(response.get_json()['offset'], len(content))
+
+        job = ImportJob.query.one()
+        self.assertEqual(job.status, 'uploading')
+
+        response = self.client.post(upload['complete_url'], data={
+            'date_column': 'Date',
+            'description_column': 'Description',
+            'amount_column': 'Amount',
+            'has_header': 'y'
+        })
+        self.assertEqual(response.status_code, 200)
+
+        db.session.expire_all()
+        job = db.session.get(ImportJob, job.id)
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.total_transactions, 3)
+
+        response = self.client.put(f"{upload['upload_url']}?offset={len(content)}", data=b'more')
+        self.assertEqual(response.status_code, 400)
+
+    def test_chunked_upload_size_limit(self):
+        """Test uploads stop at IMPORT_MAX_UPLOAD_SIZE"""
+        self.app.config['IMPORT_MAX_UPLOAD_SIZE'] = 16
+        user = self.create_user()
+        self.login_as(user)
+
+        upload = self.client.post('/imports/uploads', json={'filename': 'big.csv'}).get_json()
+        response = self.client.put(f"{upload['upload_url']}?offset=0", data=b'x' * 10)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.put(f"{upload['upload_url']}?offset=10", data=b'x' * 10)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(os.path.getsize(ImportJob.query.one().file_path), 10)
+
+    def test_abandoned_uploads_are_deleted(self):
+        """Test chunked uploads with no chunk for IMPORT_UPLOAD_TTL are deleted with their files"""
+        user = self.create_user()
+        self.login_as(user)
+        abandoned = self.client.post('/imports/uploads', json={'filename': 'old.csv'}).get_json()
+        self.client.put(f"{abandoned['upload_url']}?offset=0", data=b'Date,Description')
+        old_job = db.session.get(ImportJob, abandoned['id'])
+        old_job.heartbeat_at = datetime.utcnow() - timedelta(seconds=self.app.config['IMPORT_UPLOAD_TTL'] + 60)
+        old_path = old_job.file_path
+        db.session.commit()
+
+        # Starting another upload sweeps up the abandoned one
+        current = self.client.post('/imports/uploads', json={'filename': 'new.csv'}).get_json()
+
+        self.assertIsNone(db.session.get(ImportJob, abandoned['id']))
+        self.assertFalse(os.path.exists(old_path))
+        self.assertEqual(db.session.get(ImportJob, current['id']).status, 'uploading')
+        response = self.client.put(f"{abandoned['upload_url']}?offset=16", data=b',Amount')
+        self.assertEqual(response.status_code, 404)
+
+    def test_overlapping_csv_imports_only_new_rows(self):
+        """Test rows already imported are skipped, while repeated rows in one file are kept"""
+        user = self.create_user()
+        self.login_as(user)
+
+        def upload(content):
+            return self.client.post('/imports/import_csv', data={
+                'csv_file': (io.BytesIO(content.encode('utf-8')), 'statement.csv'),
+                'date_column': 'Date',
+                'description_column': 'Description',
+                'amount_column': 'Amount',
+                'has_header': 'y'
+            }, content_type='multipart/form-data')
+
+        upload(self.CSV_CONTENT + '03/08/2025,SHELL PETROL,40.00\n')
+        self.assertEqual(ImportedTransaction.query.count(), 4)
+
+        upload(self.CSV_CONTENT + '03/08/2025,SHELL PETROL,40.00\n04/08/2025,ARGOS,15.00\n')
+        latest = ImportJob.query.order_by(ImportJob.created_at.desc()).first()
+        self.assertEqual(latest.total_transactions, 1)
+        self.assertEqual(latest.duplicate_transactions, 4)
+        self.assertEqual(ImportedTransaction.query.filter_by(import_batch_id=latest.batch_id).one().raw_description,
+                         'ARGOS')
+
+    def test_unsorted_csv_keeps_repeated_rows(self):
+        """Test identical rows from the same day are all kept when they aren't next to each other"""
+        user = self.create_user()
+        self.login_as(user)
+        content = ('Date,Description,Amount\n'
+                   '03/08/2025,PRET A MANGER,4.20\n'
+                   '01/08/2025,TESCO STORES 1234,25.50\n'
+                   '03/08/2025,PRET A MANGER,4.20\n')
+
+        self.client.post('/imports/import_csv', data={
+            'csv_file': (io.BytesIO(content.encode('utf-8')), 'statement.csv'),
+            'date_column': 'Date',
+            'description_column': 'Description',
+            'amount_column': 'Amount',
+            'has_header': 'y'
+        }, content_type='multipart/form-data')
+
+        job = ImportJob.query.one()
+        self.assertEqual(job.total_transactions, 3)
+        self.assertEqual(job.duplicate_transactions, 0)
+        self.assertEqual(ImportedTransaction.query.filter_by(raw_description='PRET A MANGER').count(), 2)
+
+    def test_nan_amount_skipped(self):
+        """Test a row whose amount isn't a finite number is skipped and the rest imported"""
+        user = self.create_user()
+        self.login_as(user)
+        content = self.CSV_CONTENT + '04/08/2025,NOT A NUMBER,nan\n05/08/2025,ARGOS,15.00\n'
+
+        for mode in ('rows', 'columnar'):
+            with self.subTest(mode=mode):
+                self.app.config['CSV_PARSE_MODE'] = mode
+                ImportedTransaction.query.delete()
+                db.session.commit()
+                self.client.post('/imports/import_csv', data={
+                    'csv_file': (io.BytesIO(content.encode('utf-8')), 'statement.csv'),
+                    'date_column': 'Date',
+                    'description_column': 'Description',
+                    'amount_column': 'Amount',
+                    'has_header': 'y'
+                }, content_type='multipart/form-data')
+
+                job = ImportJob.query.order_by(ImportJob.created_at.desc()).first()
+                self.assertEqual(job.status, 'completed')
+                self.assertEqual(job.total_transactions, 4)
+                self.assertEqual(ImportedTransaction.query.filter_by(raw_description='NOT A NUMBER').count(), 0)
+
+    def test_csv_is_streamed(self):
+        """Test rows are parsed as they are read rather than after the whole file"""
+        lines_read = []
+
+        def lines():
+            for line in io.StringIO(self.CSV_CONTENT * 1000):
+                lines_read.append(line)
+                yield line
+
+        transactions = stream_csv_statement(lines(), 'Date', 'Description', 'Amount', True)
+        first = next(transactions)
+
+        self.assertEqual(first['description'], 'TESCO STORES 1234')
+        self.assertLess(len(lines_read), 5)
+
+    def test_columnar_mode_matches_rows(self):
+        """Test the NumPy parser gives the same transactions as the row-by-row parser"""
+        generic = (self.CSV_CONTENT +
+                   '\n'
+                   '04/08/2025,"AMAZON MARKETPLACE","1,250.00"\n'
+                   '31/02/2025,IMPOSSIBLE DATE,5.00\n'
+                   '05-08-2025,DASHED DATE,£7.50\n'
+                   '6 Aug 2025,SPELLED DATE,8.00\n'
+                   '07/08/2025,SALARY ACME,-2500.00\n'
+                   '08/08/2025,NO AMOUNT,\n'
+                   '09/08/2025,SHORT ROW\n'
+                   '10/08/2025,NAN AMOUNT,nan\n'
+                   '11/08/2025,INF AMOUNT,-inf\n')
+        lloyds = (LLOYDS_CSV_HEADER + ',Transaction Description,Debit Amount,Credit Amount,Balance\n'
+                  '01/08/2025,DEB,30-00-00,12345678,TESCO STORES 1234,25.50,,974.50\n'
+                  '02/08/2025,FPI,30-00-00,12345678,SALARY ACME LTD,,"2,500.00",3474.50\n'
+                  '03/08/2025,FPO,30-00-00,12345678,RENT,,900.00,\n'
+                  '4/8/2025,CPT,30-00-00,12345678,PRET A MANGER,4.20,,\n'
+                  '05/08/2025,DEB,30-00-00,12345678,NO AMOUNT,,,\n'
+                  '06/08/2025,DEB,30-00-00\n'
+                  '07/08/2025,DEB,30-00-00,12345678,NAN BALANCE,3.00,,nan\n'
+                  '08/08/2025,DEB,30-00-00,12345678,INF BALANCE,3.00,,inf\n')
+
+        for content in (generic, lloyds):
+            rows = list(stream_csv_statement(io.StringIO(content), 'Date', 'Description', 'Amount',
+                                             True, mode='rows'))
+            columnar = list(stream_csv_statement(io.StringIO(content), 'Date', 'Description', 'Amount',
+                                                 True, mode='columnar'))
+            self.assertTrue(rows)
+            self.assertEqual(columnar, rows)
+            self.assertTrue(all(t.get('balance') == t.get('balance') for t in rows))  # no NaN
+            self.assertNotIn('NAN AMOUNT', [t['description'] for t in rows])
+
+class FingerprintTestCase(unittest.TestCase):
+    """Test identical rows in a statement get distinct fingerprints"""
+
+    def rows(self, count, days=1):
+        for i in range(count):
+            yield {'date': date(2020, 1, 1) + timedelta(days=i % days), 'amount': 4.2,
+                   'description': 'PRET A MANGER', 'balance': None}
+
+    def test_repeats_counted_across_packs(self):
+        """Test occurrences carry on once earlier rows are packed away"""
+        with mock.patch.object(_OccurrenceCounter, 'PACK_ROWS', 2):
+            fingerprints = [t['fingerprint'] for t in fingerprint_transactions(self.rows(30, days=3))]
+        self.assertEqual(len(set(fingerprints)), 30)
+        self.assertEqual(fingerprints[:3], [t['fingerprint'] for t in fingerprint_transactions(self.rows(3, days=3))])
+
+    def test_memory_stays_small_on_large_statement(self):
+        """Test counting rows takes a few bytes per row, not a key per row"""
+        rows = 50_000
+
+        def statement():
+            for i in range(rows):
+                yield {'date': date(2000, 1, 1) + timedelta(days=i), 'amount': 1.0 + i % 100,
+                       'description': f'CARD PAYMENT {i % 1000}', 'balance': None}
+
+        tracemalloc.start()
+        try:
+            # Packing more often than in production so the latest rows' Counter is small beside the rest
+            with mock.patch.object(_OccurrenceCounter, 'PACK_ROWS', 4096):
+                for _ in fingerprint_transactions(statement()):
+                    pass
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak / rows, 64)
+
+class MerchantMemoTestCase(TestCase):
+    """Test categories learned from approved imports"""
+
+    def approve_and_create(self, user, raw_description, category, description):
+        transaction = ImportedTransaction(
+            user_id=user.id,
+            raw_description=raw_description,
+            amount=12.5,
+            transaction_date=date(2025, 8, 1),
+            transaction_type='debit',
+            import_batch_id='batch-1',
+            source_file='statement.csv',
+            suggested_category=category,
+            suggested_description=description,
+            is_reviewed=True,
+            is_approved=True
+        )
+        db.session.add(transaction)
+        db.session.commit()
+        self.login_as(user)
+        return self.client.get('/imports/create_expenses/batch-1')
+
+    def test_normalize_merchant(self):
+        """Test store numbers and references are dropped from merchant keys"""
+        self.assertEqual(normalize_merchant('TESCO STORES 1234 LONDON'), 'tesco stores')
+        self.assertEqual(normalize_merchant('Tesco Stores 5678'), 'tesco stores')
+        self.assertEqual(normalize_merchant('AMAZON PRIME*RM5QQ'), 'amazon prime')
+        self.assertEqual(normalize_merchant('1234'), '')
+
+    def test_approval_is_learned_for_couple(self):
+        """Test an approved category is suggested to both partners on the next import"""
+        user = self.create_user()
+        partner = self.create_user(username='partner', email='partner@example.com')
+        user.partner_id = partner.id
+        db.session.commit()
+
+        self.approve_and_create(user, 'CORNER SHOP 1234', 'food', 'Corner Shop')
+
+        self.assertEqual(Expense.query.count(), 1)
+        learned = MerchantCategory.query.filter_by(user_id=user.id).one()
+        self.assertEqual(learned.merchant_key, 'corner shop')
+
+        csv_content = 'Date,Description,Amount\n02/09/2025,CORNER SHOP 9876,4.20\n03/09/2025,NETFLIX,9.99\n'
+        result = process_csv_statement(csv_content, 'Date', 'Description', 'Amount', True,
+                                       'statement.csv', merchant_memo=MerchantMemo.for_user(partner.id))
+
+        shop, netflix = result['transactions']
+        self.assertEqual(shop['suggested_category'], 'food')
+        self.assertEqual(shop['suggested_description'], 'Corner Shop')
+        self.assertGreater(shop['confidence_score'], 0.95)
+        self.assertEqual(netflix['suggested_category'], 'entertainment')
+        self.assertEqual(netflix['confidence_score'], 0.8)
+
+    def test_memo_not_shared_outside_couple(self):
+        """Test other users' approvals are not suggested"""
+        user = self.create_user()
+        other = self.create_user(username='other', email='other@example.com')
+
+        self.approve_and_create(user, 'CORNER SHOP 1234', 'food', 'Corner Shop')
+
+        self.assertIsNone(MerchantMemo.for_user(other.id).lookup('CORNER SHOP 1234'))
+
+    def test_cache_cleared_after_commit(self):
+        """Test a lookup cached before learned merchants commit is not kept"""
+        user = self.create_user()
+        memo = MerchantMemo.for_user(user.id)
+        self.assertIsNone(memo.lookup('CORNER SHOP 1234'))
+
+        learn_merchants(user.id, [('CORNER SHOP 1234', 'food', 'Corner Shop')])
+        # As if another request read the memo before this one committed
+        merchant_memo._cache.put((memo.user_ids, 'corner shop'), None)
+        db.session.commit()
+
+        self.assertEqual(memo.lookup('CORNER SHOP 1234'), ('food', 'Corner Shop'))
+
+    def test_backfill_twice_gives_same_counts(self):
+        """Test running learn-merchants again recounts instead of adding"""
+        user = self.create_user()
+        self.approve_and_create(user, 'CORNER SHOP 1234', 'food', 'Corner Shop')
+
+        runner = self.app.test_cli_runner()
+        for _ in range(2):
+            result = runner.invoke(args=['learn-merchants'])
+            self.assertIn('Learned 1 merchants for 1 users', result.output)
+            self.assertEqual(MerchantCategory.query.filter_by(user_id=user.id).one().hit_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
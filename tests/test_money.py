@@ -0,0 +1,62 @@
+"""Tests for money stored as integer pence"""
+import unittest
+from datetime import datetime
+from decimal import Decimal
+import numpy as np
+from sqlalchemy import func, select, text
+from app import db
+from app.models import Expense
+from app.money import Money, to_pence, pence_array, sum_pounds
+from tests import TestCase
+
+class MoneyTestCase(unittest.TestCase):
+    """Test conversions between pounds and pence"""
+
+    def test_to_pence_rounds_half_away_from_zero(self):
+        """Test floats round as written, including the awkward halves"""
+        self.assertEqual(to_pence(12.34), 1234)
+        self.assertEqual(to_pence(1.005), 101)
+        self.assertEqual(to_pence(-1.005), -101)
+        self.assertEqual(to_pence(0.125), 13)
+        self.assertEqual(to_pence(0.1 + 0.2), 30)
+        self.assertEqual(to_pence(19.999), 2000)
+
+    def test_to_pence_other_types(self):
+        """Test ints are pounds, strings and Decimals are exact, Money passes through"""
+        self.assertEqual(to_pence(3), 300)
+        self.assertEqual(to_pence('2.675'), 268)
+        self.assertEqual(to_pence(Decimal('-0.015')), -2)
+        self.assertEqual(to_pence(Money(250)), 250)
+
+    def test_money_formatting(self):
+        """Test Money prints as pounds and pence"""
+        self.assertEqual(str(Money(1234)), '12.34')
+        self.assertEqual(str(Money(-5)), '-0.05')
+        self.assertEqual(Money.from_pounds(0.1).pounds, 0.1)
+        self.assertEqual(repr(Money(100)), 'Money(1.00)')
+
+    def test_sums_are_exact(self):
+        """Test summing pounds through pence has no float drift"""
+        amounts = [0.1] * 1000
+        self.assertNotEqual(sum(amounts), 100.0)
+        self.assertEqual(sum_pounds(amounts), 100.0)
+        self.assertEqual(sum_pounds(np.array([19.99, 0.01, -5.0])), 15.0)
+        self.assertEqual(pence_array([1.1, 2.675]).tolist(), [110, 268])
+
+class MoneyColumnTestCase(TestCase):
+    """Test MoneyType columns store pence and read back pounds"""
+
+    def test_round_trip_and_sum(self):
+        """Test amounts are stored as integers and summed exactly"""
+        user = self.create_user()
+        db.session.add_all(Expense(user_id=user.id, amount=0.1, category='food', description='Test',
+                                   date=datetime(2025, 8, 10)) for _ in range(1000))
+        db.session.commit()
+
+        stored = db.session.execute(text('SELECT amount, typeof(amount) FROM expense LIMIT 1')).one()
+        self.assertEqual(tuple(stored), (10, 'integer'))
+        self.assertEqual(Expense.query.first().amount, 0.1)
+        self.assertEqual(db.session.execute(select(func.sum(Expense.amount))).scalar(), 100.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""Tests for keyset pagination of the expenses list"""
+import unittest
+from datetime import date, timedelta
+from app import db
+from app.models import Expense
+from app.pagination import decode_cursor, encode_cursor, expense_page
+from tests import TestCase
+
+class PaginationTestCase(TestCase):
+    """Test expense pages follow (date, id) order across a couple"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user()
+        self.partner = self.create_user(username='partner', email='partner@example.com')
+        self.user.partner_id = self.partner.id
+        db.session.commit()
+        # Several expenses a day, alternating between partners, so pages split ties
+        db.session.add_all(Expense(user_id=(self.user.id, self.partner.id)[n % 2], amount=n + 1.0,
+                                   category=('food', 'shopping')[n % 3 == 0], description=f'Expense {n}',
+                                   date=date(2025, 8, 1) + timedelta(days=n // 4))
+                           for n in range(47))
+        db.session.commit()
+        self.user_ids = [self.user.id, self.partner.id]
+
+    def expected(self, category=None):
+        query = Expense.query.filter(Expense.user_id.in_(self.user_ids))
+        if category:
+            query = query.filter_by(category=category)
+        return [expense.id for expense in query.order_by(Expense.date.desc(), Expense.id.desc())]
+
+    def walk(self, category=None, per_page=10):
+        pages = [expense_page(self.user_ids, category, per_page=per_page)]
+        while pages[-1].has_older:
+            pages.append(expense_page(self.user_ids, category, after=pages[-1].older, per_page=per_page))
+        return pages
+
+    def test_pages_cover_every_expense_in_order(self):
+        """Test following older cursors lists each expense once, newest first"""
+        pages = self.walk()
+        self.assertEqual([len(page.items) for page in pages], [10, 10, 10, 10, 7])
+        self.assertEqual([expense.id for page in pages for expense in page.items], self.expected())
+        self.assertFalse(pages[0].has_newer)
+        self.assertTrue(pages[1].has_newer)
+
+    def test_newer_cursor_goes_back(self):
+        """Test newer cursors return the previous pages, and the first page in full"""
+        pages = self.walk()
+        for previous, page in zip(pages, pages[1:]):
+            back = expense_page(self.user_ids, before=page.newer, per_page=10)
+            self.assertEqual([expense.id for expense in back.items], [expense.id for expense in previous.items])
+            self.assertEqual(back.older, previous.older)
+
+    def test_category_filter(self):
+        """Test pages of one category"""
+        pages = self.walk('shopping', per_page=4)
+        self.assertEqual([expense.id for page in pages for expense in page.items], self.expected('shopping'))
+
+    def test_counts(self):
+        """Test the rollup count matches COUNT(*) and no count is made unless asked"""
+        self.assertIsNone(expense_page(self.user_ids).total)
+        for category in (None, 'food', 'shopping'):
+            with self.subTest(category=category):
+                self.assertEqual(expense_page(self.user_ids, category, count='approximate').total,
+                                 len(self.expected(category)))
+                self.assertEqual(expense_page(self.user_ids, category, count='exact').total,
+                                 len(self.expected(category)))
+
+    def test_cursors(self):
+        """Test cursors round-trip and malformed ones mean the first page"""
+        expense = Expense.query.first()
+        self.assertEqual(decode_cursor(encode_cursor(expense)), (expense.date, expense.id))
+        for cursor in (None, '', 'yesterday', '2025-08-01', '2025-13-01.5', '2025-08-01.x'):
+            self.assertIsNone(decode_cursor(cursor))
+        first = expense_page(self.user_ids, after='nonsense', per_page=10)
+        self.assertEqual([expense.id for expense in first.items], self.expected()[:10])
+
+    def test_list_and_feed_routes(self):
+        """Test the expenses page and JSON feed follow cursors"""
+        self.login_as(self.user)
+        response = self.client.get('/expenses/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Older', response.data)
+        self.assertIn(b'47', response.data)
+
+        ids, after = [], None
+        while True:
+            feed = self.client.get('/expenses/feed', query_string={'after': after or '', 'per_page': 15}).get_json()
+            ids += [expense['id'] for expense in feed['expenses']]
+            after = feed['older']
+            if after is None:
+                break
+        self.assertEqual(ids, self.expected())
+
+        response = self.client.get('/expenses/', query_string={'after': encode_cursor(db.session.get(Expense, ids[19]))})
+        self.assertIn(b'Newer', response.data)
+
+if __name__ == '__main__':
+    unittest.main()
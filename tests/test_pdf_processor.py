@@ -0,0 +1,264 @@
+"""Test bank statement parsing"""
+import io
+import os
+import unittest
+from app.pdf_processor import (BankStatementProcessor, process_pdf_statement,
+                               stream_pdf_statement)
+from app.date_parsing import DateParser, DATE_FORMATS, strptime_date
+from app.import_logging import ImportStats
+from app import parsers
+from app.parsers import ParserSpec, detect_parser, get_parser_spec, load_parser, register_parser
+from app.parsers.base import StatementParser
+from unittest import mock
+from datetime import date, datetime
+
+SAMPLE_STATEMENT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                '2025-08-29_Statement.pdf')
+
+class PDFExtractionTestCase(unittest.TestCase):
+    """Test PDF text extraction"""
+
+    def setUp(self):
+        with open(SAMPLE_STATEMENT, 'rb') as f:
+            self.pdf_content = f.read()
+
+    def test_parallel_extraction_matches_serial(self):
+        """Test page-parallel extraction joins pages in document order"""
+        serial = BankStatementProcessor('hsbc')
+        parallel = BankStatementProcessor('hsbc', extraction_mode='parallel',
+                                          extraction_workers=2, parallel_min_pages=1)
+
+        self.assertTrue(parallel._use_parallel_extraction(4))
+        self.assertEqual(parallel.extract_text_from_pdf(self.pdf_content),
+                         serial.extract_text_from_pdf(self.pdf_content))
+
+    def test_small_documents_fall_back_to_serial(self):
+        """Test documents below the page threshold are not sent to the pool"""
+        processor = BankStatementProcessor('hsbc', extraction_mode='parallel',
+                                           extraction_workers=4, parallel_min_pages=8)
+
+        self.assertFalse(processor._use_parallel_extraction(4))
+        self.assertTrue(processor._use_parallel_extraction(8))
+
+class StreamingPipelineTestCase(unittest.TestCase):
+    """Test the page-at-a-time parsing pipeline"""
+
+    def setUp(self):
+        with open(SAMPLE_STATEMENT, 'rb') as f:
+            self.pdf_content = f.read()
+
+    def test_stream_matches_batch_processing(self):
+        """Test streaming yields the same categorized transactions as process_pdf_statement"""
+        result = process_pdf_statement(self.pdf_content, 'hsbc', 8, 2025)
+        streamed = list(stream_pdf_statement(self.pdf_content, 'hsbc', 8, 2025))
+
+        self.assertTrue(result['success'])
+        self.assertGreater(len(streamed), 0)
+        self.assertEqual(streamed, result['transactions'])
+        for transaction in streamed:
+            self.assertEqual((transaction['date'].month, transaction['date'].year), (8, 2025))
+            self.assertIn('suggested_category', transaction)
+
+    def test_counts_stages_without_printing(self):
+        """Test parsing counts into ImportStats and writes nothing to stdout"""
+        stats = ImportStats()
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            transactions = list(stream_pdf_statement(self.pdf_content, 'hsbc', 8, 2025, stats=stats))
+
+        self.assertEqual(stdout.getvalue(), '')
+        self.assertEqual(stats.get('extraction', 'pages'), 4)
+        self.assertEqual(stats.get('parsing', 'transactions'), 31)
+        self.assertEqual(stats.get('categorization', 'keywords') + stats.get('categorization', 'uncategorized'),
+                         len(transactions))
+        self.assertIn('extraction: characters=', str(stats))
+
+    def test_stream_is_lazy(self):
+        """Test the first transaction is available before the whole document is read"""
+        processor = BankStatementProcessor('hsbc')
+        transactions = processor.iter_statement_transactions(self.pdf_content)
+
+        next(transactions)
+        self.assertLess(processor.pages_extracted, 4)
+
+    def test_hsbc_single_pass(self):
+        """Test HSBC groups, multi-line amounts and header skipping in one pass over the lines"""
+        lines = [
+            '30 Jul 25 TFR401265 35769132',
+            '',
+            'INTERNET TRANSFER 2,000.00',
+            'VISRevolut**9937*',
+            'London 50.00',
+            'BALANCE CARRIED 1,234.56',
+            '31 Jul 25 CRCOGNIZANT 2,853.99',
+            ')))FCA STRATFORD 4.50',
+            'Contact tel 03457 404 404',
+            '01 Aug 25 BALANCEBROUGHTFORWARD 3,000.00',
+            'VISNot in a group 9.99',
+        ]
+        transactions = list(BankStatementProcessor('hsbc').parser.iter_transactions(iter(lines)))
+
+        self.assertEqual([(t['date'], t['hsbc_type'], t['description'], t['amount'], t['type'])
+                          for t in transactions], [
+            (date(2025, 7, 30), 'TFR', '401265 35769132 INTERNET TRANSFER', 2000.0, 'debit'),
+            (date(2025, 7, 30), 'VIS', 'Revolut**9937* London', 50.0, 'debit'),
+            (date(2025, 7, 31), 'CR', 'COGNIZANT', 2853.99, 'credit'),
+            (date(2025, 7, 31), 'CARD', 'FCA STRATFORD', 4.5, 'debit'),
+        ])
+
+    def test_detects_bank_from_first_page(self):
+        """Test 'auto' and a wrongly chosen bank both go straight to the matching parser"""
+        expected = list(BankStatementProcessor('hsbc').iter_statement_transactions(self.pdf_content))
+
+        for bank_name in ('auto', 'lloyds', 'generic'):
+            processor = BankStatementProcessor(bank_name)
+            with mock.patch.object(processor, '_iter_generic') as iter_generic:
+                transactions = list(processor.iter_statement_transactions(self.pdf_content))
+
+            self.assertEqual(processor.bank_name, 'hsbc')
+            self.assertEqual(transactions, expected)
+            iter_generic.assert_not_called()
+
+    def test_generic_fallback_reuses_extracted_pages(self):
+        """Test falling back to generic parsing doesn't extract the document twice"""
+        processor = BankStatementProcessor('barclays')
+        with mock.patch('app.pdf_processor.detect_parser', return_value='generic'), \
+                mock.patch.object(processor, '_iter_generic', return_value=iter(())) as iter_generic:
+            list(processor.iter_statement_transactions(self.pdf_content))
+
+        self.assertEqual(processor.bank_name, 'barclays')
+        self.assertEqual(processor.pages_extracted, 4)
+        lines = list(iter_generic.call_args[0][0])
+        self.assertIn('BALANCEBROUGHTFORWARD', ''.join(lines))
+
+class FakeBankParser(StatementParser):
+    """A plugin parser for the registry tests"""
+
+    kind = 'pdf'
+    label = 'Fake Bank'
+    signatures = ('FAKE BANK PLC',)
+
+    def iter_transactions(self, lines):
+        for line in lines:
+            if line.startswith('FAKE'):
+                yield {'date': date(2025, 8, 1), 'description': line, 'amount': 1.0, 'type': 'debit'}
+
+class ParserRegistryTestCase(unittest.TestCase):
+    """Test the bank parser registry"""
+
+    def setUp(self):
+        parsers._registry = None
+
+    def tearDown(self):
+        parsers._registry = None
+
+    def test_detects_bank_from_signatures(self):
+        """Test the best-matching parser is chosen, with the generic parser as fallback"""
+        self.assertEqual(detect_parser('Your Statement\nwww.hsbc.co.uk\nBALANCEBROUGHTFORWARD'), 'hsbc')
+        self.assertEqual(detect_parser('Some other bank'), 'generic')
+        self.assertEqual(detect_parser('Transaction Date,Transaction Type,Sort Code,Account Number,'
+                                       'Transaction Description', kind='csv'), 'lloyds_csv')
+        self.assertEqual(detect_parser('Date,Description,Amount', kind='csv'), 'generic_csv')
+
+    def test_sort_code_and_iban_signatures(self):
+        """Test sort code ranges and IBAN bank codes identify the bank, but dates don't"""
+        self.assertEqual(detect_parser('Sort code: 30-96-34'), 'lloyds')
+        self.assertEqual(detect_parser('Miss A Customer 40-12-65 02699486'), 'hsbc')
+        self.assertEqual(detect_parser('IBAN GB33BARC20000012345678'), 'barclays')
+        self.assertEqual(detect_parser('20-05-25 CARD PAYMENT 12.50'), 'generic')
+
+    def test_unknown_banks_use_generic_parser(self):
+        """Test banks without a parser fall back to generic parsing"""
+        processor = BankStatementProcessor('santander')
+
+        self.assertIs(load_parser('santander'), load_parser('generic'))
+        self.assertFalse(processor.is_bank_specific)
+
+    def test_parsers_load_lazily(self):
+        """Test a registered parser's module is only imported when it is used"""
+        spec = ParserSpec('fake', 'tests.test_pdf_processor:FakeBankParser')
+        register_parser(spec)
+        self.assertIsInstance(spec.target, str)
+
+        processor = BankStatementProcessor('fake')
+        transactions = list(processor.iter_transactions(['FAKE 1', 'OTHER']))
+
+        self.assertIs(spec.target, FakeBankParser)
+        self.assertEqual([t['description'] for t in transactions], ['FAKE 1'])
+
+    def entry_point(self, name, value):
+        entry_point = mock.Mock(value=value)
+        entry_point.name = name
+        return entry_point
+
+    def test_entry_point_plugins(self):
+        """Test parsers from installed packages are discovered through entry points, and imported lazily"""
+        plugin = self.entry_point('fake', 'tests.test_pdf_processor:FakeBankParser')
+
+        with mock.patch('app.parsers.entry_points', return_value=[plugin]) as entry_points:
+            self.assertEqual(load_parser('hsbc').__name__, 'HSBCParser')
+            spec = get_parser_spec('fake')
+            self.assertIsInstance(spec.target, str)
+            self.assertEqual(detect_parser('FAKE BANK PLC statement'), 'fake')
+
+        entry_points.assert_called_once_with(group=parsers.ENTRY_POINT_GROUP)
+        plugin.load.assert_not_called()
+        self.assertIs(load_parser('fake'), FakeBankParser)
+        self.assertEqual(spec.label, 'Fake Bank')
+
+    def test_broken_plugin_is_skipped(self):
+        """Test a plugin that won't import is logged and left out of detection"""
+        plugins = [self.entry_point('broken', 'no_such_module:Parser'),
+                   self.entry_point('wrong_kind', 'app.parsers.generic_csv:GenericCSVParser')]
+
+        with mock.patch('app.parsers.entry_points', return_value=plugins):
+            with self.assertLogs('app.parsers', level='ERROR') as logs:
+                self.assertEqual(detect_parser('www.hsbc.co.uk BALANCEBROUGHTFORWARD'), 'hsbc')
+
+        self.assertEqual(len(logs.output), 2)
+        self.assertEqual(detect_parser('Some other bank'), 'generic')
+        with self.assertRaises(ImportError):
+            load_parser('broken')
+
+class DateParserTestCase(unittest.TestCase):
+    """Test statement date parsing"""
+
+    def legacy_parse(self, date_str):
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(date_str, fmt).date()
+            except ValueError:
+                continue
+        return None
+
+    def test_matches_strptime_formats(self):
+        """Test results agree with trying each format in turn"""
+        parser = DateParser()
+        samples = ['21/07/2025', '1/7/2025', '21-07-2025', '21.07.25', '21/07/25', '21 Jul 2025',
+                   '21 July 2025', '01 May 2025', '31/02/2025', '00/01/2025', '21/13/2025',
+                   '21 Jul 25', '2025-07-21', '', 'not a date']
+
+        for date_str in samples + samples[::-1]:
+            self.assertEqual(parser.parse(date_str), self.legacy_parse(date_str), date_str)
+
+    def test_pins_winning_format(self):
+        """Test the format that matched is tried first for later dates"""
+        parser = DateParser()
+        self.assertEqual(parser.parse('21.07.25'), date(2025, 7, 21))
+        self.assertEqual(parser.pinned, '%d.%m.%y')
+
+        self.assertEqual(parser.parse('22 Jul 2025'), date(2025, 7, 22))
+        self.assertEqual(parser.pinned, '%d %b %Y')
+
+    def test_fast_paths(self):
+        """Test hand-parsed shapes match strptime, including its two-digit year pivot"""
+        self.assertEqual(strptime_date('21 Jul 25', '%d %b %y'), date(2025, 7, 21))
+        self.assertEqual(strptime_date('21 jul 69', '%d %b %y'), date(1969, 7, 21))
+        self.assertEqual(strptime_date('29/02/2024', '%d/%m/%Y'), date(2024, 2, 29))
+        self.assertEqual(strptime_date('1/2/2024', '%d/%m/%Y'), date(2024, 2, 1))
+        with self.assertRaises(ValueError):
+            strptime_date('29/02/2023', '%d/%m/%Y')
+        with self.assertRaises(ValueError):
+            strptime_date('31 Foo 25', '%d %b %y')
+
+if __name__ == '__main__':
+    unittest.main()
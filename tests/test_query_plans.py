@@ -0,0 +1,113 @@
+"""Tests that month and date range queries use the Expense and Budget indexes"""
+import os
+import unittest
+from datetime import date, timedelta
+from sqlalchemy import create_engine, insert, select, text, tuple_
+from app import db
+from app.models import User, Expense, Budget
+from tests import TestCase
+
+def month_range_query():
+    """A couple's expenses in August 2025, as the range filters in app.utils"""
+    return select(Expense.category, Expense.amount).where(
+        Expense.user_id.in_([1, 2]), Expense.date >= date(2025, 8, 1), Expense.date < date(2025, 9, 1))
+
+def category_listing_query():
+    """The expenses list filtered to one category, newest first"""
+    return select(Expense.id).where(
+        Expense.user_id.in_([1, 2]), Expense.category == 'food').order_by(Expense.date.desc())
+
+def household_categories_query():
+    """The distinct categories a couple has used, as household_expense_categories"""
+    return select(Expense.category).where(Expense.user_id.in_([1, 2])).group_by(Expense.user_id, Expense.category)
+
+def keyset_page_query():
+    """One partner's share of an expenses page after a cursor, as app.pagination"""
+    return select(Expense.id).where(
+        Expense.user_id == 1, Expense.date <= date(2025, 8, 10),
+        (Expense.date < date(2025, 8, 10)) | (Expense.id < 500)
+    ).order_by(Expense.date.desc(), Expense.id.desc()).limit(21)
+
+def budget_month_query():
+    """A couple's budgets for some months, as household_budget_status"""
+    return select(Budget.id).where(Budget.user_id.in_([1, 2]), tuple_(Budget.year, Budget.month).in_([(2025, 8)]))
+
+EXPECTED_INDEXES = [
+    (month_range_query, 'ix_expense_user_date_id'),
+    (category_listing_query, 'ix_expense_user_category_date_id'),
+    (household_categories_query, 'ix_expense_user_category_date_id'),
+    (keyset_page_query, 'ix_expense_user_date_id'),
+    (budget_month_query, 'ix_budget_user_year_month'),
+]
+
+def compile_literal(statement, dialect):
+    return str(statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+
+class SQLiteQueryPlanTestCase(TestCase):
+    """Test the SQLite query planner picks the composite indexes"""
+
+    def test_queries_use_indexes(self):
+        """Test month, category and budget queries search an index"""
+        for query, index in EXPECTED_INDEXES:
+            with self.subTest(index=index):
+                plan = ' '.join(row[-1] for row in db.session.execute(
+                    text('EXPLAIN QUERY PLAN ' + compile_literal(query(), db.engine.dialect))))
+                self.assertRegex(plan, rf'SEARCH \w+ USING (COVERING )?INDEX {index} ')
+
+    def test_keyset_page_reads_in_index_order(self):
+        """Test a keyset page starts at the cursor and needs no sort, so it stops after a page of rows"""
+        # Bound parameters as the app sends them, not literals the planner could compare
+        compiled = keyset_page_query().compile(db.engine)
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+        plan = ' '.join(row[-1] for row in db.session.connection().exec_driver_sql(
+            'EXPLAIN QUERY PLAN ' + str(compiled), params))
+        self.assertIn('date<', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_extract_filter_cannot_use_index(self):
+        """Test the old extract(month/year) filter cannot narrow the index by date"""
+        query = select(Expense.id).where(Expense.user_id.in_([1, 2]),
+                                         db.extract('month', Expense.date) == 8,
+                                         db.extract('year', Expense.date) == 2025)
+        plan = ' '.join(row[-1] for row in db.session.execute(
+            text('EXPLAIN QUERY PLAN ' + compile_literal(query, db.engine.dialect))))
+        self.assertNotIn('(user_id=? AND date', plan)
+
+@unittest.skipUnless(os.environ.get('TEST_MYSQL_URL'), 'set TEST_MYSQL_URL to check MySQL query plans')
+class MySQLQueryPlanTestCase(unittest.TestCase):
+    """Test the MySQL optimizer picks the composite indexes (needs a scratch database)"""
+
+    TABLES = [User.__table__, Expense.__table__, Budget.__table__]
+
+    def setUp(self):
+        self.engine = create_engine(os.environ['TEST_MYSQL_URL'])
+        db.metadata.create_all(self.engine, tables=self.TABLES)
+        # Enough rows across users and months that an index beats a table scan
+        with self.engine.begin() as conn:
+            conn.execute(insert(User.__table__), [
+                {'id': user_id, 'username': f'user{user_id}', 'email': f'user{user_id}@example.com'}
+                for user_id in range(1, 21)])
+            conn.execute(insert(Expense.__table__), [
+                {'user_id': user_id, 'amount': 1.0, 'description': 'Test',
+                 'category': ('food', 'bills', 'shopping')[day // 3 % 3],
+                 'date': date(2024, 1, 1) + timedelta(days=day)}
+                for user_id in range(1, 21) for day in range(0, 730, 3)])
+            conn.execute(insert(Budget.__table__), [
+                {'user_id': user_id, 'category': 'food', 'amount': 100.0, 'month': month, 'year': year}
+                for user_id in range(1, 21) for year in (2024, 2025) for month in range(1, 13)])
+            conn.execute(text('ANALYZE TABLE expense, budget'))
+
+    def tearDown(self):
+        db.metadata.drop_all(self.engine, tables=self.TABLES)
+        self.engine.dispose()
+
+    def test_queries_use_indexes(self):
+        """Test month, category and budget queries read through an index"""
+        with self.engine.connect() as conn:
+            for query, index in EXPECTED_INDEXES:
+                with self.subTest(index=index):
+                    plan = conn.execute(text('EXPLAIN ' + compile_literal(query(), self.engine.dialect)))
+                    self.assertEqual([row._mapping['key'] for row in plan], [index])
+
+if __name__ == '__main__':
+    unittest.main()
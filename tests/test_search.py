@@ -0,0 +1,150 @@
+"""Tests for full-text search over expenses and imported transactions"""
+import unittest
+from datetime import date
+from app import db
+from app.models import Expense, ImportedTransaction
+from app.import_jobs import save_imported_transactions, create_expenses_from_batch
+from app.search import search_expenses, search_index_ddl, search_transactions, rebuild_search_index
+from tests import TestCase
+
+class SearchTestCase(TestCase):
+    """Test searches find what was written, however it was written"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user()
+        self.partner = self.create_user(username='partner', email='partner@example.com')
+        self.other = self.create_user(username='other', email='other@example.com')
+        self.user.partner_id = self.partner.id
+        db.session.commit()
+
+    def add_expense(self, user, description, tags=None):
+        expense = Expense(user_id=user.id, amount=10.0, description=description, tags=tags,
+                          category='food', date=date(2025, 8, 10))
+        db.session.add(expense)
+        db.session.commit()
+        return expense
+
+    def found(self, query, user_ids=None):
+        return [expense.description for expense in
+                search_expenses(user_ids or [self.user.id, self.partner.id], query)]
+
+    def test_orm_writes_are_searchable(self):
+        """Test adding, editing and deleting expenses updates the index"""
+        expense = self.add_expense(self.user, 'Tesco Express')
+        self.assertEqual(self.found('tesco'), ['Tesco Express'])
+
+        expense.description = 'Sainsburys Local'
+        db.session.commit()
+        self.assertEqual(self.found('tesco'), [])
+        self.assertEqual(self.found('sainsburys'), ['Sainsburys Local'])
+
+        db.session.delete(expense)
+        db.session.commit()
+        self.assertEqual(self.found('sainsburys'), [])
+
+    def test_bulk_imports_are_searchable(self):
+        """Test transactions and expenses inserted without the ORM are indexed"""
+        transactions = [{'date': date(2025, 8, 1), 'description': 'CARD PAYMENT TO PRET A MANGER',
+                         'amount': 4.5, 'type': 'debit', 'suggested_category': 'food'},
+                        {'date': date(2025, 8, 2), 'description': 'AMAZON MKTPLACE', 'amount': 12.0,
+                         'type': 'debit', 'suggested_category': 'shopping'}]
+        # A chunk at a time, each indexed once
+        save_imported_transactions(self.user.id, transactions, 'batch-1', 'statement.csv', chunk_size=1)
+        ImportedTransaction.query.update({'is_approved': True})
+        db.session.commit()
+        self.assertEqual([t.raw_description for t in search_transactions(self.user.id, 'pret')],
+                         ['CARD PAYMENT TO PRET A MANGER'])
+
+        create_expenses_from_batch(self.user.id, 'batch-1')
+        db.session.commit()
+        self.assertEqual(self.found('amazon mkt'), ['AMAZON MKTPLACE'])
+        self.assertEqual(len(self.found('imported')), 2)
+        self.assertEqual([t.raw_description for t in search_transactions(self.user.id, 'amazon')],
+                         ['AMAZON MKTPLACE'])
+
+        transaction = ImportedTransaction.query.filter_by(raw_description='AMAZON MKTPLACE').one()
+        transaction.user_notes = 'Birthday present for Sam'
+        db.session.commit()
+        self.assertEqual([t.id for t in search_transactions(self.user.id, 'birthday')], [transaction.id])
+
+    def test_query_words(self):
+        """Test every word must match, the last as a prefix of two letters or more"""
+        self.add_expense(self.user, 'TESCO STORES 3297')
+        self.add_expense(self.user, 'Tesco Express')
+        self.assertEqual(sorted(self.found('tes')), ['TESCO STORES 3297', 'Tesco Express'])
+        self.assertEqual(self.found('tesco sto'), ['TESCO STORES 3297'])
+        self.assertEqual(self.found('tes stores'), [])
+        self.assertEqual(self.found('t'), [])
+        self.assertEqual(self.found('TESCO-STORES'), ['TESCO STORES 3297'])
+        for query in ('', '  ', '"*:()', 'and', 'near or not'):
+            with self.subTest(query=query):
+                self.assertEqual(self.found(query), [])
+
+    def test_household_only(self):
+        """Test searches see the couple's expenses and no one else's"""
+        self.add_expense(self.user, 'Costa Coffee')
+        self.add_expense(self.partner, 'Costa Coffee Euston')
+        self.add_expense(self.other, 'Costa Coffee Leeds')
+        self.assertEqual(sorted(self.found('costa')), ['Costa Coffee', 'Costa Coffee Euston'])
+        self.assertEqual(self.found('costa', [self.other.id]), ['Costa Coffee Leeds'])
+        self.assertEqual(search_transactions(self.partner.id, 'costa'), [])
+
+    def test_description_matches_rank_first(self):
+        """Test a match in the description outranks one in the tags"""
+        self.add_expense(self.user, 'Weekly shop', tags='groceries,tesco')
+        self.add_expense(self.user, 'Tesco Extra weekly shop')
+        self.assertEqual(self.found('tesco'), ['Tesco Extra weekly shop', 'Weekly shop'])
+
+    def test_rebuild(self):
+        """Test rebuilding the index leaves searches unchanged"""
+        self.add_expense(self.user, 'Shell Garage')
+        rebuild_search_index()
+        db.session.commit()
+        self.assertEqual(self.found('shell'), ['Shell Garage'])
+
+    def test_mysql_fulltext_index(self):
+        """Test MySQL gets a FULLTEXT index over the searched columns"""
+        self.assertEqual(search_index_ddl(Expense, 'mysql'),
+                         ['CREATE FULLTEXT INDEX ft_expense_text ON expense (description, tags)'])
+        self.assertEqual(search_index_ddl(ImportedTransaction, 'postgresql'), [])
+
+    def test_search_endpoint(self):
+        """Test the search endpoint returns matching expenses and transactions as JSON"""
+        mine = self.add_expense(self.user, 'Uber Trip')
+        partners = self.add_expense(self.partner, 'Uber Eats')
+        save_imported_transactions(self.user.id, [{'date': date(2025, 8, 1), 'description': 'UBER *TRIP',
+                                                   'amount': 9.0, 'type': 'debit'}], 'batch-1', 'statement.csv')
+        db.session.commit()
+        self.login_as(self.user)
+
+        results = self.client.get('/search/', query_string={'q': 'uber'}).get_json()
+        self.assertEqual(sorted(e['description'] for e in results['expenses']), ['Uber Eats', 'Uber Trip'])
+        self.assertEqual([t['description'] for t in results['transactions']], ['UBER *TRIP'])
+        urls = {e['id']: e['url'] for e in results['expenses']}
+        self.assertEqual(urls[mine.id], f'/expenses/edit/{mine.id}')
+        self.assertIsNone(urls[partners.id])
+
+        results = self.client.get('/search/', query_string={'q': 'uber', 'scope': 'transactions'}).get_json()
+        self.assertEqual(results['expenses'], [])
+        self.assertEqual(len(results['transactions']), 1)
+
+        results = self.client.get('/search/', query_string={'q': 'uber', 'limit': 1}).get_json()
+        self.assertEqual(len(results['expenses']), 1)
+
+    def test_transaction_suggestions(self):
+        """Test similar expenses for an imported transaction come from the search index"""
+        self.add_expense(self.user, 'Netflix Subscription')
+        self.add_expense(self.user, 'Spotify')
+        save_imported_transactions(self.user.id, [{'date': date(2025, 8, 1), 'description': 'NETFLIX SUBSCRIPTION 0123456',
+                                                   'amount': 10.99, 'type': 'debit'}], 'batch-1', 'statement.csv')
+        db.session.commit()
+        self.login_as(self.user)
+        transaction = ImportedTransaction.query.one()
+
+        response = self.client.get(f'/imports/api/transaction_suggestions/{transaction.id}')
+        self.assertEqual([e['description'] for e in response.get_json()['similar_transactions']],
+                         ['Netflix Subscription'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Tests for the monthly spend rollup"""
+import unittest
+from datetime import date, datetime
+from app import db
+from app.models import Expense, ImportedTransaction, MonthlySpend
+from app.import_jobs import save_imported_transactions, create_expenses_from_batch
+from app.spend_rollup import monthly_spend, rebuild_monthly_spend
+from tests import TestCase
+
+class SpendRollupTestCase(TestCase):
+    """Test MonthlySpend follows expense writes"""
+
+    def add_expense(self, user, amount, category, when=datetime(2025, 8, 10)):
+        expense = Expense(user_id=user.id, amount=amount, category=category,
+                          description='Test', date=when)
+        db.session.add(expense)
+        db.session.commit()
+        return expense
+
+    def rollup(self):
+        return {(row.user_id, row.year, row.month, row.category): (round(row.total, 2), row.expense_count)
+                for row in MonthlySpend.query.all() if row.expense_count}
+
+    def assert_matches_rebuild(self):
+        incremental = self.rollup()
+        rebuild_monthly_spend()
+        db.session.commit()
+        self.assertEqual(incremental, self.rollup())
+
+    def test_orm_add_edit_delete(self):
+        """Test adding, editing and deleting expenses moves the monthly totals"""
+        user = self.create_user()
+        food = self.add_expense(user, 10.0, 'food')
+        self.add_expense(user, 5.5, 'food')
+        other = self.add_expense(user, 20.0, 'transportation')
+        self.assertEqual(monthly_spend([user.id], 2025, 8), {'food': 15.5, 'transportation': 20.0})
+
+        food.amount = 12.0
+        other.category = 'food'
+        db.session.commit()
+        self.assertEqual(monthly_spend([user.id], 2025, 8), {'food': 37.5})
+
+        other.date = datetime(2025, 9, 1)
+        db.session.commit()
+        self.assertEqual(monthly_spend([user.id], 2025, 8), {'food': 17.5})
+        self.assertEqual(monthly_spend([user.id], 2025, 9), {'food': 20.0})
+
+        db.session.delete(other)
+        db.session.commit()
+        self.assertEqual(monthly_spend([user.id], 2025, 9), {})
+        self.assert_matches_rebuild()
+
+    def test_partners_are_summed(self):
+        """Test spending for several users is added up per category"""
+        user = self.create_user()
+        partner = self.create_user('partner', 'partner@example.com')
+        self.add_expense(user, 10.0, 'food')
+        self.add_expense(partner, 2.5, 'food')
+        self.add_expense(partner, 4.0, 'bills', datetime(2025, 7, 31))
+        self.assertEqual(monthly_spend([user.id, partner.id], 2025, 8), {'food': 12.5})
+        self.assertEqual(monthly_spend([user.id], 2025, 7), {})
+
+    def test_bulk_created_expenses(self):
+        """Test expenses created from an import batch without the ORM are counted once"""
+        user = self.create_user()
+        transactions = [{'date': date(2025, 8, day), 'description': f'SHOP {day}', 'amount': float(day),
+                         'type': 'debit', 'suggested_category': 'shopping'} for day in range(1, 4)]
+        save_imported_transactions(user.id, transactions, 'batch-1', 'statement.csv')
+        ImportedTransaction.query.update({'is_approved': True})
+        db.session.commit()
+
+        created, _ = create_expenses_from_batch(user.id, 'batch-1')
+        db.session.commit()
+
+        self.assertEqual(created, 3)
+        self.assertEqual(monthly_spend([user.id], 2025, 8), {'shopping': 6.0})
+        self.assert_matches_rebuild()
+
+if __name__ == '__main__':
+    unittest.main()